@@ -1,4 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends cuyo contenido no ven los demás procesos
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
 
 
 class ReflexoConfig(AppConfig):
@@ -8,7 +16,23 @@ class ReflexoConfig(AppConfig):
     
     def ready(self):
         """Método que se ejecuta cuando la aplicación está lista"""
+        check_shared_cache()
         try:
             import Reflexo.signals  # noqa
         except ImportError:
             pass
+
+
+def check_shared_cache():
+    """
+    Los índices en memoria se invalidan con contadores guardados en la caché
+    ``default``; con un backend local al proceso, las escrituras de otro
+    worker (o de un comando como ``load_ubigeo_data``) nunca llegarían a los
+    procesos que sirven las peticiones. Solo se permite con ``DEBUG``.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES and not settings.DEBUG:
+        raise ImproperlyConfigured(
+            f'La caché "default" ({backend}) es local al proceso; configure un '
+            'backend compartido (Redis, DatabaseCache, ...) en CACHES.'
+        )
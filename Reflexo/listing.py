@@ -0,0 +1,165 @@
+"""
+Listados de ubigeo consultados a la base con parámetros opcionales.
+
+Sin parámetros, los listados se sirven desde el índice en memoria. Con
+alguno de ``limit``, ``cursor``, ``fields``, ``updated_since`` u
+``ordering`` se arma una consulta a medida:
+
+* ``fields=id,name`` se traduce a ``.values('id', 'name')``, así que los
+  JOIN como ``province__name`` solo se hacen si se piden.
+* ``ordering`` solo acepta columnas indexadas (``id``, ``name``,
+  ``ubigeo_code``), con ``-`` para orden descendente.
+* ``limit`` / ``cursor`` paginan por keyset sobre ``(ordering, id)``, sin
+  ``OFFSET`` ni ``COUNT(*)``.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+LIST_PARAMS = ('limit', 'cursor', 'fields', 'updated_since', 'ordering')
+ORDERING_FIELDS = ('id', 'name', 'ubigeo_code')
+MAX_LIMIT = 1000
+
+
+class ListQueryError(ValueError):
+    """Parámetro de listado inválido (se responde con 400)"""
+
+
+def wants_query(request):
+    """Indica si la petición pidió alguno de los parámetros de consulta"""
+    return any(param in request.GET for param in LIST_PARAMS)
+
+
+def parse_fields(request, allowed, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    invalid = [field for field in fields if field not in allowed]
+    if invalid or not fields:
+        raise ListQueryError(f'Campos inválidos: {", ".join(invalid)}. Permitidos: {", ".join(allowed)}')
+    return list(dict.fromkeys(fields))
+
+
+def parse_ordering(request):
+    raw = request.GET.get('ordering', 'id').strip()
+    descending = raw.startswith('-')
+    field = raw.lstrip('-')
+    if field not in ORDERING_FIELDS:
+        raise ListQueryError(f'Orden inválido: {raw}. Permitidos: {", ".join(ORDERING_FIELDS)}')
+    return field, descending
+
+
+def parse_updated_since(request):
+    raw = request.GET.get('updated_since')
+    if not raw:
+        return None
+    value = parse_datetime(raw)
+    if value is None:
+        day = parse_date(raw)
+        if day is None:
+            raise ListQueryError('updated_since debe ser una fecha ISO 8601')
+        value = datetime.combine(day, time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def parse_limit(request):
+    raw = request.GET.get('limit')
+    if raw is None:
+        return None
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ListQueryError('El parámetro limit debe ser un número')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(value, pk):
+    return base64.urlsafe_b64encode(json.dumps([value, pk]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(raw):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ListQueryError('Cursor inválido')
+    if not isinstance(pk, int):
+        raise ListQueryError('Cursor inválido')
+    return value, pk
+
+
+def after_cursor(field, descending, value, pk):
+    """
+    Filas posteriores a ``(value, pk)`` en el orden ``field, id``. SQLite
+    ordena los NULL primero en orden ascendente y al final en descendente.
+    """
+    if field == 'id':
+        return Q(id__lt=pk) if descending else Q(id__gt=pk)
+    if not descending:
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'id__gt': pk}) | Q(**{f'{field}__isnull': False})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})
+    if value is None:
+        return Q(**{f'{field}__isnull': True, 'id__lt': pk})
+    return (
+        Q(**{f'{field}__lt': value})
+        | Q(**{field: value, 'id__lt': pk})
+        | Q(**{f'{field}__isnull': True})
+    )
+
+
+def list_response(request, queryset, allowed_fields, default_fields):
+    """Respuesta ``{'success', 'data', 'count', 'next'}`` para un listado con parámetros"""
+    try:
+        fields = parse_fields(request, allowed_fields, default_fields)
+        field, descending = parse_ordering(request)
+        updated_since = parse_updated_since(request)
+        limit = parse_limit(request)
+        cursor = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ListQueryError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+    if cursor is not None:
+        queryset = queryset.filter(after_cursor(field, descending, *cursor))
+
+    # Las columnas del cursor se leen aunque no se pidan, y se quitan al final
+    hidden = [column for column in (field, 'id') if column not in fields]
+    rows = queryset.values(*fields, *hidden)
+    if limit is not None:
+        rows = list(rows[:limit + 1])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        rows = list(rows)
+        has_next = False
+
+    next_url = None
+    if has_next:
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(rows[-1][field], rows[-1]['id'])
+        next_url = f'{request.path}?{params.urlencode()}'
+    for row in rows:
+        for column in hidden:
+            del row[column]
+
+    return JsonResponse({
+        'success': True,
+        'data': rows,
+        'count': len(rows),
+        'next': next_url
+    })
@@ -12,10 +12,10 @@ class Command(BaseCommand):
         
         # Limpiar datos existentes
         self.stdout.write('Limpiando datos existentes.....')
-        District.objects.all().delete()
-        Province.objects.all().delete()
-        Region.objects.all().delete()
-        Country.objects.all().delete()
+        District.all_objects.all().delete()
+        Province.all_objects.all().delete()
+        Region.all_objects.all().delete()
+        Country.all_objects.all().delete()
         
         # Rutas de los archivos CSV
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -35,7 +35,7 @@ class Command(BaseCommand):
                 for row in reader:
                     iso2_code = row.get('ISO2', '')
                     # Si el código ya existe, agregar un sufijo
-                    if Country.objects.filter(ubigeo_code=iso2_code).exists():
+                    if Country.all_objects.filter(ubigeo_code=iso2_code).exists():
                         iso2_code = f"{iso2_code}_{row['name'][:3].upper()}"
                     
                     Country.objects.create(
@@ -1,155 +1,163 @@
-import csv
 import os
-from django.core.management.base import BaseCommand
+import time
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from Reflexo.models import Region, Province, District
+from Reflexo import ubigeo_index
+from Reflexo.ubigeo_csv import CSV_DIR, LEVELS, read_level
 
 class Command(BaseCommand):
-    help = 'Carga datos de ubigeo desde archivos CSV y asigna códigos de ubigeo'
+    help = (
+        'Carga datos de ubigeo desde archivos CSV y asigna códigos de ubigeo. '
+        'Inserta o actualiza en lote (upsert por ID) solo las filas que cambiaron'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Forzar la recarga de datos existentes',
+            help='Reescribir todas las filas del CSV aunque no hayan cambiado',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de filas por INSERT ... ON CONFLICT',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar el resumen de cambios sin guardarlos',
+        )
+        parser.add_argument(
+            '--csv-dir',
+            default=CSV_DIR,
+            help='Carpeta con regions.csv, provinces.csv y districts.csv',
         )
 
     def handle(self, *args, **options):
-        self.stdout.write('Cargando datos de ubigeo...')
-        
-        # Obtener la ruta de los archivos CSV
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        csv_dir = os.path.join(base_dir, 'bd')
-        
-        with transaction.atomic():
-            if options['force']:
-                self.stdout.write('Eliminando datos existentes...')
-                District.objects.all().delete()
-                Province.objects.all().delete()
-                Region.objects.all().delete()
-            
-            # Cargar regiones
-            self.load_regions(csv_dir)
-            
-            # Cargar provincias
-            self.load_provinces(csv_dir)
-            
-            # Cargar distritos
-            self.load_districts(csv_dir)
-            
-            self.stdout.write(self.style.SUCCESS('Datos de ubigeo cargados exitosamente'))
-
-    def load_regions(self, csv_dir):
-        """Carga regiones desde el archivo CSV"""
-        regions_file = os.path.join(csv_dir, 'regions.csv')
-        
-        if not os.path.exists(regions_file):
-            self.stdout.write(self.style.WARNING(f'Archivo no encontrado: {regions_file}'))
+        self.verbosity = options['verbosity']
+        self.timings = []
+        started = time.perf_counter()
+
+        for level in LEVELS:
+            if not os.path.exists(level.path(options['csv_dir'])):
+                raise CommandError(f'Archivo no encontrado: {level.path(options["csv_dir"])}')
+
+        # Fase 1: leer cada CSV una sola vez
+        with self.phase('lectura de CSV'):
+            csv_rows = {level.name: list(read_level(level, options['csv_dir'])) for level in LEVELS}
+
+        # Fase 2: comparar contra la base (una consulta por nivel)
+        plans = []
+        with self.phase('comparación'):
+            known_parents = None
+            for level in LEVELS:
+                plan = self.plan_level(level, csv_rows[level.name], known_parents, options['force'])
+                plans.append(plan)
+                known_parents = plan['ids']
+
+        # Fase 3: escribir en lote
+        if not options['dry_run']:
+            with self.phase('escritura'):
+                with transaction.atomic():
+                    for plan in plans:
+                        self.write_level(plan, options['batch_size'])
+                    if any(plan['pending'] for plan in plans):
+                        # bulk_create no emite post_save
+                        ubigeo_index.invalidate()
+
+        self.report(plans, options['dry_run'], time.perf_counter() - started)
+
+    def plan_level(self, level, rows, known_parents, force):
+        """Clasifica las filas del CSV en nuevas, modificadas, sin cambios y huérfanas"""
+        model = level.model
+        columns = ['id', 'name', 'ubigeo_code'] + ([level.parent_column] if level.parent_field else [])
+        existing = {row[0]: row[1:] for row in model.all_objects.values_list(*columns)}
+
+        # IDs válidos como padre del siguiente nivel: los de la base y los del CSV
+        plan = {
+            'level': level, 'pending': [], 'ids': set(existing),
+            'created': 0, 'updated': 0, 'unchanged': 0, 'orphans': [],
+        }
+        for pk, name, parent_id in rows:
+            if level.parent_field and parent_id not in known_parents:
+                plan['orphans'].append((pk, parent_id))
+                continue
+            plan['ids'].add(pk)
+
+            values = (name, level.code(pk)) + ((parent_id,) if level.parent_field else ())
+            current = existing.get(pk)
+            if current is None:
+                plan['created'] += 1
+            elif current != values:
+                plan['updated'] += 1
+            else:
+                plan['unchanged'] += 1
+                if not force:
+                    continue
+
+            fields = {'id': pk, 'name': name, 'ubigeo_code': level.code(pk)}
+            if level.parent_field:
+                fields[level.parent_column] = parent_id
+            plan['pending'].append(model(**fields))
+        return plan
+
+    def write_level(self, plan, batch_size):
+        level = plan['level']
+        if not plan['pending']:
             return
-        
-        with open(regions_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            for row in reader:
-                region_id = int(row['id'])
-                name = row['name']
-                
-                # Crear o actualizar región
-                region, created = Region.objects.get_or_create(
-                    id=region_id,
-                    defaults={
-                        'name': name,
-                        'ubigeo_code': f"{region_id:02d}"
-                    }
+        update_fields = ['name', 'ubigeo_code', 'updated_at']
+        if level.parent_field:
+            update_fields.append(level.parent_field)
+        level.model.all_objects.bulk_create(
+            plan['pending'],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=update_fields,
+        )
+
+    def phase(self, name):
+        return _Phase(self.timings, name)
+
+    def report(self, plans, dry_run, elapsed):
+        prefix = '[dry-run] ' if dry_run else ''
+        show_details = dry_run or self.verbosity >= 2
+
+        for plan in plans:
+            level = plan['level']
+            for pk, parent_id in plan['orphans']:
+                self.stderr.write(self.style.WARNING(
+                    f'{level.name} {pk}: padre {parent_id} no encontrado, fila omitida'
+                ))
+            if show_details:
+                self.stdout.write(
+                    f"{prefix}{level.model._meta.verbose_name_plural}: "
+                    f"{plan['created']} nuevas, {plan['updated']} modificadas, "
+                    f"{plan['unchanged']} sin cambios, {len(plan['orphans'])} omitidas"
                 )
-                
-                if created:
-                    self.stdout.write(f"Creada región: {region_id} - {name}")
-                else:
-                    # Actualizar código de ubigeo si no existe
-                    if not region.ubigeo_code:
-                        region.ubigeo_code = f"{region_id:02d}"
-                        region.save()
-                        self.stdout.write(f"Actualizado código de ubigeo para región: {region_id}")
-
-    def load_provinces(self, csv_dir):
-        """Carga provincias desde el archivo CSV"""
-        provinces_file = os.path.join(csv_dir, 'provinces.csv')
-        
-        if not os.path.exists(provinces_file):
-            self.stdout.write(self.style.WARNING(f'Archivo no encontrado: {provinces_file}'))
-            return
-        
-        with open(provinces_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            for row in reader:
-                province_id = int(row['id'])
-                name = row['name']
-                region_id = int(row['region_id'])
-                
-                try:
-                    region = Region.objects.get(id=region_id)
-                    
-                    # Crear o actualizar provincia
-                    province, created = Province.objects.get_or_create(
-                        id=province_id,
-                        defaults={
-                            'name': name,
-                            'region': region,
-                            'ubigeo_code': f"{province_id:04d}"
-                        }
-                    )
-                    
-                    if created:
-                        self.stdout.write(f"Creada provincia: {province_id} - {name}")
-                    else:
-                        # Actualizar código de ubigeo si no existe
-                        if not province.ubigeo_code:
-                            province.ubigeo_code = f"{province_id:04d}"
-                            province.save()
-                            self.stdout.write(f"Actualizado código de ubigeo para provincia: {province_id}")
-                
-                except Region.DoesNotExist:
-                    self.stdout.write(self.style.ERROR(f'Región {region_id} no encontrada para provincia {province_id}'))
-
-    def load_districts(self, csv_dir):
-        """Carga distritos desde el archivo CSV"""
-        districts_file = os.path.join(csv_dir, 'districts.csv')
-        
-        if not os.path.exists(districts_file):
-            self.stdout.write(self.style.WARNING(f'Archivo no encontrado: {districts_file}'))
-            return
-        
-        with open(districts_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            for row in reader:
-                district_id = int(row['id'])
-                name = row['name']
-                province_id = int(row['province_id'])
-                
-                try:
-                    province = Province.objects.get(id=province_id)
-                    
-                    # Crear o actualizar distrito
-                    district, created = District.objects.get_or_create(
-                        id=district_id,
-                        defaults={
-                            'name': name,
-                            'province': province,
-                            'ubigeo_code': f"{district_id:06d}"
-                        }
-                    )
-                    
-                    if created:
-                        self.stdout.write(f"Creado distrito: {district_id} - {name}")
-                    else:
-                        # Actualizar código de ubigeo si no existe
-                        if not district.ubigeo_code:
-                            district.ubigeo_code = f"{district_id:06d}"
-                            district.save()
-                            self.stdout.write(f"Actualizado código de ubigeo para distrito: {district_id}")
-                
-                except Province.DoesNotExist:
-                    self.stdout.write(self.style.ERROR(f'Provincia {province_id} no encontrada para distrito {district_id}'))
+
+        if self.verbosity >= 2:
+            for name, seconds in self.timings:
+                self.stdout.write(f'  {name}: {seconds * 1000:.1f} ms')
+
+        created = sum(plan['created'] for plan in plans)
+        updated = sum(plan['updated'] for plan in plans)
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Datos de ubigeo cargados: {created} nuevos, {updated} modificados '
+            f'en {elapsed:.2f} s'
+        ))
+
+
+class _Phase:
+    """Context manager que acumula la duración de una fase del comando"""
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timings.append((self.name, time.perf_counter() - self.started))
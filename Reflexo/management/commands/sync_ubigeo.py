@@ -0,0 +1,146 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from Reflexo import ubigeo_index
+from Reflexo.ubigeo_csv import CSV_DIR, LEVELS, fingerprint, read_level
+
+class Command(BaseCommand):
+    help = (
+        'Sincroniza regiones, provincias y distritos con los CSV de bd/ aplicando '
+        'solo las diferencias: inserta, actualiza, restaura y elimina (soft delete)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='No modificar nada; terminar con código distinto de 0 si la base difiere de los CSV',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de filas por operación en lote',
+        )
+        parser.add_argument(
+            '--csv-dir',
+            default=CSV_DIR,
+            help='Carpeta con regions.csv, provinces.csv y districts.csv',
+        )
+
+    def handle(self, *args, **options):
+        for level in LEVELS:
+            if not os.path.exists(level.path(options['csv_dir'])):
+                raise CommandError(f'Archivo no encontrado: {level.path(options["csv_dir"])}')
+
+        diffs = []
+        known_parents = None
+        for level in LEVELS:
+            diff = self.diff_level(level, options['csv_dir'], known_parents)
+            diffs.append(diff)
+            known_parents = diff['ids']
+
+        changes = sum(self.change_count(diff) for diff in diffs)
+
+        if options['check']:
+            self.report(diffs, '[check] ', verbose=True)
+            if changes:
+                raise CommandError(
+                    f'La base de ubigeo difiere de los CSV en {changes} registros', returncode=1
+                )
+            self.stdout.write(self.style.SUCCESS('La base de ubigeo está sincronizada con los CSV'))
+            return
+
+        if changes:
+            with transaction.atomic():
+                now = timezone.now()
+                for diff in diffs:
+                    self.apply_level(diff, now, options['batch_size'])
+                # Las operaciones en lote no emiten post_save
+                ubigeo_index.invalidate()
+
+        self.report(diffs, '', verbose=options['verbosity'] >= 2)
+        self.stdout.write(self.style.SUCCESS(f'Sincronización de ubigeo completa: {changes} cambios'))
+
+    def diff_level(self, level, csv_dir, known_parents):
+        """Compara las huellas del CSV con las de la base (una consulta por nivel)"""
+        model = level.model
+        columns = ['id', 'name', 'ubigeo_code', level.parent_column or 'id', 'deleted_at']
+        existing = {}
+        for pk, name, code, parent_id, deleted_at in model.all_objects.values_list(*columns):
+            if not level.parent_field:
+                parent_id = None
+            existing[pk] = (fingerprint(name, code, parent_id), deleted_at is not None)
+
+        diff = {
+            'level': level, 'ids': set(existing), 'orphans': [],
+            'inserts': [], 'updates': [], 'restores': [], 'deletes': [],
+        }
+        seen = set()
+        for pk, name, parent_id in read_level(level, csv_dir):
+            if level.parent_field and parent_id not in known_parents:
+                diff['orphans'].append((pk, parent_id))
+                continue
+            seen.add(pk)
+            diff['ids'].add(pk)
+
+            fields = {'id': pk, 'name': name, 'ubigeo_code': level.code(pk)}
+            if level.parent_field:
+                fields[level.parent_column] = parent_id
+            current = existing.get(pk)
+            if current is None:
+                diff['inserts'].append(model(**fields))
+                continue
+            current_fingerprint, is_deleted = current
+            if is_deleted:
+                diff['restores'].append(model(**fields))
+            elif current_fingerprint != fingerprint(name, level.code(pk), parent_id):
+                diff['updates'].append(model(**fields))
+
+        diff['deletes'] = [pk for pk, (_, is_deleted) in existing.items() if pk not in seen and not is_deleted]
+        return diff
+
+    @staticmethod
+    def change_count(diff):
+        return sum(len(diff[key]) for key in ('inserts', 'updates', 'restores', 'deletes'))
+
+    def apply_level(self, diff, now, batch_size):
+        level = diff['level']
+        model = level.model
+        update_fields = ['name', 'ubigeo_code', 'updated_at']
+        if level.parent_field:
+            update_fields.append(level.parent_field)
+
+        if diff['inserts']:
+            model.all_objects.bulk_create(diff['inserts'], batch_size=batch_size)
+
+        for obj in diff['updates']:
+            obj.updated_at = now
+        for obj in diff['restores']:
+            obj.updated_at = now
+            obj.deleted_at = None
+        if diff['updates']:
+            model.all_objects.bulk_update(diff['updates'], update_fields, batch_size=batch_size)
+        if diff['restores']:
+            model.all_objects.bulk_update(diff['restores'], update_fields + ['deleted_at'], batch_size=batch_size)
+
+        deletes = diff['deletes']
+        for start in range(0, len(deletes), batch_size):
+            model.all_objects.filter(id__in=deletes[start:start + batch_size]).update(
+                deleted_at=now, updated_at=now
+            )
+
+    def report(self, diffs, prefix, verbose):
+        for diff in diffs:
+            level = diff['level']
+            for pk, parent_id in diff['orphans']:
+                self.stderr.write(self.style.WARNING(
+                    f'{level.name} {pk}: padre {parent_id} no encontrado, fila omitida'
+                ))
+            if verbose:
+                self.stdout.write(
+                    f"{prefix}{level.model._meta.verbose_name_plural}: "
+                    f"{len(diff['inserts'])} nuevas, {len(diff['updates'])} modificadas, "
+                    f"{len(diff['restores'])} restauradas, {len(diff['deletes'])} eliminadas"
+                )
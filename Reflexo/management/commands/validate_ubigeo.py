@@ -1,6 +1,20 @@
-from django.core.management.base import BaseCommand
+import csv
+import json
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from Reflexo.models import Region, Province, District
+from django.utils import timezone
+from Reflexo import ubigeo_index
+from Reflexo.ubigeo_csv import LEVELS
+
+# Clase de error -> mensaje
+ERROR_MESSAGES = {
+    'missing_code': 'Falta código de ubigeo',
+    'invalid_format': 'Código de ubigeo debe tener {length} dígitos',
+    'orphan': 'El registro padre {parent_id} no existe',
+    'deleted_parent': 'El registro padre {parent_id} está eliminado',
+    'parent_mismatch': 'Código no coincide con el padre ({parent_code})',
+}
 
 class Command(BaseCommand):
     help = 'Valida la integridad de los códigos de ubigeo'
@@ -11,79 +25,164 @@ class Command(BaseCommand):
             action='store_true',
             help='Corregir automáticamente los códigos de ubigeo basándose en los IDs',
         )
+        parser.add_argument(
+            '--format',
+            choices=['text', 'json', 'csv'],
+            default='text',
+            help='Formato del reporte',
+        )
+        parser.add_argument(
+            '--output',
+            help='Archivo donde escribir el reporte (por defecto, la salida estándar)',
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Terminar con código 1 si quedan errores (para usar como verificación previa al deploy)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de filas por bulk_update al corregir',
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write('Validando códigos de ubigeo...')
-        
+        rows = self.load_levels()
+        errors = self.validate_ubigeo_codes(rows)
+
+        fixed = 0
         if options['fix']:
-            self.fix_ubigeo_codes()
-        else:
-            self.validate_ubigeo_codes()
+            fixed = self.fix_ubigeo_codes(rows, errors, options['batch_size'])
+            if fixed:
+                rows = self.load_levels()
+                errors = self.validate_ubigeo_codes(rows)
 
-    def validate_ubigeo_codes(self):
-        """Valida que los códigos de ubigeo sean únicos y consistentes"""
+        report = {
+            'checked': {level.name: len(rows[level.name]) for level in LEVELS},
+            'total_errors': len(errors),
+            'counts': dict(sorted(Counter(error['error'] for error in errors).items())),
+            'fixed': fixed,
+            'errors': errors,
+        }
+        self.write_report(report, options['format'], options['output'])
+
+        if options['strict'] and errors:
+            raise CommandError(f'Se encontraron {len(errors)} errores de ubigeo', returncode=1)
+
+    def load_levels(self):
+        """Una consulta por nivel: ``{nivel: {id: (name, code, parent_id, deleted)}}``"""
+        rows = {}
+        for level in LEVELS:
+            columns = ['id', 'name', 'ubigeo_code', level.parent_column or 'id', 'deleted_at']
+            rows[level.name] = {
+                pk: (name, code, parent_id if level.parent_field else None, deleted_at is not None)
+                for pk, name, code, parent_id, deleted_at in level.model.all_objects.values_list(*columns)
+            }
+        return rows
+
+    def validate_ubigeo_codes(self, rows):
+        """Valida en memoria formato, huérfanos y consistencia de prefijos con el padre"""
         errors = []
-        
-        # Validar regiones
-        regions = Region.objects.all()
-        for region in regions:
-            if not region.ubigeo_code:
-                errors.append(f"Región {region.id} ({region.name}): Falta código de ubigeo")
-            elif len(region.ubigeo_code) != 2:
-                errors.append(f"Región {region.id} ({region.name}): Código de ubigeo debe tener 2 dígitos")
-        
-        # Validar provincias
-        provinces = Province.objects.all()
-        for province in provinces:
-            if not province.ubigeo_code:
-                errors.append(f"Provincia {province.id} ({province.name}): Falta código de ubigeo")
-            elif len(province.ubigeo_code) != 4:
-                errors.append(f"Provincia {province.id} ({province.name}): Código de ubigeo debe tener 4 dígitos")
-            elif not province.ubigeo_code.startswith(province.region.ubigeo_code):
-                errors.append(f"Provincia {province.id} ({province.name}): Código no coincide con región padre")
-        
-        # Validar distritos
-        districts = District.objects.all()
-        for district in districts:
-            if not district.ubigeo_code:
-                errors.append(f"Distrito {district.id} ({district.name}): Falta código de ubigeo")
-            elif len(district.ubigeo_code) != 6:
-                errors.append(f"Distrito {district.id} ({district.name}): Código de ubigeo debe tener 6 dígitos")
-            elif not district.ubigeo_code.startswith(district.province.ubigeo_code):
-                errors.append(f"Distrito {district.id} ({district.name}): Código no coincide con provincia padre")
-        
-        if errors:
-            self.stdout.write(self.style.ERROR('Errores encontrados:'))
-            for error in errors:
-                self.stdout.write(f"  - {error}")
-        else:
-            self.stdout.write(self.style.SUCCESS('Todos los códigos de ubigeo son válidos'))
+        parents = None
+        for level in LEVELS:
+            for pk, (name, code, parent_id, deleted) in sorted(rows[level.name].items()):
+                def add(error, **params):
+                    errors.append(self.error_entry(level, pk, name, code, error, **params))
+
+                if not code:
+                    add('missing_code')
+                elif len(code) != level.code_length or not code.isdigit():
+                    add('invalid_format', length=level.code_length)
+
+                if not level.parent_field:
+                    continue
+                parent = parents.get(parent_id)
+                if parent is None:
+                    add('orphan', parent_id=parent_id)
+                    continue
+                _, parent_code, _, parent_deleted = parent
+                if parent_deleted and not deleted:
+                    add('deleted_parent', parent_id=parent_id)
+                if code and parent_code and not code.startswith(parent_code):
+                    add('parent_mismatch', parent_code=parent_code)
+            parents = rows[level.name]
+        return errors
 
-    def fix_ubigeo_codes(self):
-        """Corrige automáticamente los códigos de ubigeo basándose en los IDs"""
+    @staticmethod
+    def error_entry(level, pk, name, code, error, **params):
+        return {
+            'level': level.name,
+            'id': pk,
+            'name': name,
+            'ubigeo_code': code,
+            'error': error,
+            'message': ERROR_MESSAGES[error].format(**params),
+        }
+
+    def fix_ubigeo_codes(self, rows, errors, batch_size):
+        """
+        Asigna el código derivado del ID a los registros sin código o con
+        formato inválido, con un ``bulk_update`` por nivel. Se omite si ese
+        código ya lo usa otro registro.
+        """
+        to_fix = {}
+        for error in errors:
+            if error['error'] in ('missing_code', 'invalid_format'):
+                to_fix.setdefault(error['level'], set()).add(error['id'])
+
+        fixed = 0
+        now = timezone.now()
         with transaction.atomic():
-            # Corregir regiones
-            regions = Region.objects.all()
-            for region in regions:
-                if not region.ubigeo_code:
-                    region.ubigeo_code = f"{region.id:02d}"
-                    region.save()
-                    self.stdout.write(f"Corregido: Región {region.id} -> {region.ubigeo_code}")
-            
-            # Corregir provincias
-            provinces = Province.objects.all()
-            for province in provinces:
-                if not province.ubigeo_code:
-                    province.ubigeo_code = f"{province.id:04d}"
-                    province.save()
-                    self.stdout.write(f"Corregido: Provincia {province.id} -> {province.ubigeo_code}")
-            
-            # Corregir distritos
-            districts = District.objects.all()
-            for district in districts:
-                if not district.ubigeo_code:
-                    district.ubigeo_code = f"{district.id:06d}"
-                    district.save()
-                    self.stdout.write(f"Corregido: Distrito {district.id} -> {district.ubigeo_code}")
-            
-            self.stdout.write(self.style.SUCCESS('Códigos de ubigeo corregidos exitosamente'))
+            for level in LEVELS:
+                ids = to_fix.get(level.name)
+                if not ids:
+                    continue
+                used = {code for _, code, _, _ in rows[level.name].values() if code}
+                pending = []
+                for pk in sorted(ids):
+                    code = level.code(pk)
+                    if code in used:
+                        continue
+                    used.add(code)
+                    pending.append(level.model(id=pk, ubigeo_code=code, updated_at=now))
+                level.model.all_objects.bulk_update(pending, ['ubigeo_code', 'updated_at'], batch_size=batch_size)
+                fixed += len(pending)
+            if fixed:
+                # bulk_update no emite post_save
+                ubigeo_index.invalidate()
+        return fixed
+
+    def write_report(self, report, output_format, output):
+        stream = open(output, 'w', encoding='utf-8', newline='') if output else self.stdout
+        try:
+            if output_format == 'json':
+                stream.write(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+            elif output_format == 'csv':
+                writer = csv.writer(stream, lineterminator='\n')
+                writer.writerow(['level', 'id', 'name', 'ubigeo_code', 'error', 'message'])
+                for error in report['errors']:
+                    writer.writerow([error[key] for key in ('level', 'id', 'name', 'ubigeo_code', 'error', 'message')])
+                # Sección final, separada por una línea vacía: conteo por clase de error
+                writer.writerow([])
+                writer.writerow(['error', 'count'])
+                writer.writerows(report['counts'].items())
+            else:
+                self.write_text(report, stream, styled=not output)
+        finally:
+            if output:
+                stream.close()
+
+    def write_text(self, report, stream, styled):
+        error_style = self.style.ERROR if styled else str
+        success_style = self.style.SUCCESS if styled else str
+        if report['fixed']:
+            stream.write(f"Códigos de ubigeo corregidos: {report['fixed']}\n")
+        if report['errors']:
+            stream.write(error_style('Errores encontrados:') + '\n')
+            for error in report['errors']:
+                stream.write(f"  - {error['level']} {error['id']} ({error['name']}): {error['message']}\n")
+            for error_class, count in report['counts'].items():
+                stream.write(f'{error_class}: {count}\n')
+        else:
+            stream.write(success_style('Todos los códigos de ubigeo son válidos') + '\n')
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils import timezone
+from .managers import AllObjectsManager, LiveManager, live_index
 
 class Country(models.Model):
     name = models.CharField(max_length=100)
@@ -8,6 +9,9 @@ class Country(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LiveManager()
+    all_objects = AllObjectsManager()
+
     def delete(self, using=None, keep_parents=False):
         """Soft delete."""
         self.deleted_at = timezone.now()
@@ -25,6 +29,12 @@ class Country(models.Model):
         app_label = 'Reflexo'
         verbose_name = "País"
         verbose_name_plural = "Países"
+        # Django (unicidad, admin, dumpdata) debe ver también los eliminados
+        default_manager_name = 'all_objects'
+        indexes = [
+            live_index(['name'], name='country_live_name_idx'),
+            live_index(['ubigeo_code'], name='country_live_code_idx'),
+        ]
 
 
 class CountryUser(models.Model):
@@ -1,5 +1,5 @@
 from django.db import models
-from django.utils import timezone
+from .managers import AllObjectsManager, LiveManager, live_index
 from .province import Province  # <-- este import es clave
 
 
@@ -17,10 +17,17 @@ class District(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
-    def delete(self, using=None, keep_parents=False):
-        """Soft delete."""
-        self.deleted_at = timezone.now()
-        self.save()
+    objects = LiveManager()
+    all_objects = AllObjectsManager()
+
+    def delete(self, using=None, keep_parents=False, cascade=False):
+        """
+        Soft delete con las mismas reglas que la eliminación en lote (ver
+        ``UbigeoHierarchyService.soft_delete``).
+        """
+        from ..services.hierarchy_service import UbigeoHierarchyService
+        UbigeoHierarchyService.soft_delete('district', [self.pk], cascade=cascade)
+        self.refresh_from_db(fields=['deleted_at', 'updated_at'])
 
     def restore(self):
         """Restaura un registro eliminado."""
@@ -35,6 +42,13 @@ class District(models.Model):
     class Meta:
         verbose_name = "Distrito"
         verbose_name_plural = "Distritos"
+        # Django (unicidad, admin, dumpdata) debe ver también los eliminados
+        default_manager_name = 'all_objects'
+        indexes = [
+            live_index(['name'], name='district_live_name_idx'),
+            live_index(['ubigeo_code'], name='district_live_code_idx'),
+            live_index(['province'], name='district_live_province_idx'),
+        ]
 
 
 class DistrictUser(models.Model):
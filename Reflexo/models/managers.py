@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """QuerySet con filtros por estado de eliminación lógica"""
+
+    def alive(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def dead(self):
+        return self.filter(deleted_at__isnull=False)
+
+
+class LiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Manager ``objects`` de la aplicación: solo registros no eliminados (``deleted_at IS NULL``)"""
+
+    def get_queryset(self):
+        return super().get_queryset().alive()
+
+
+# Incluye registros eliminados; es el manager por defecto de Django
+# (``Meta.default_manager_name``) y el que se usa para restaurar
+AllObjectsManager = models.Manager.from_queryset(SoftDeleteQuerySet)
+
+
+def live_index(fields, name):
+    """Índice parcial ``WHERE deleted_at IS NULL`` para las búsquedas de registros vivos"""
+    return models.Index(fields=fields, name=name, condition=models.Q(deleted_at__isnull=True))
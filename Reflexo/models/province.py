@@ -1,5 +1,5 @@
 from django.db import models
-from django.utils import timezone
+from .managers import AllObjectsManager, LiveManager, live_index
 from .region import Region
 
 class Province(models.Model):
@@ -12,10 +12,17 @@ class Province(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
-    def delete(self, using=None, keep_parents=False):
-        """Soft delete."""
-        self.deleted_at = timezone.now()
-        self.save()
+    objects = LiveManager()
+    all_objects = AllObjectsManager()
+
+    def delete(self, using=None, keep_parents=False, cascade=False):
+        """
+        Soft delete con las mismas reglas que la eliminación en lote (ver
+        ``UbigeoHierarchyService.soft_delete``).
+        """
+        from ..services.hierarchy_service import UbigeoHierarchyService
+        UbigeoHierarchyService.soft_delete('province', [self.pk], cascade=cascade)
+        self.refresh_from_db(fields=['deleted_at', 'updated_at'])
 
     def restore(self):
         """Restaura un registro eliminado."""
@@ -30,6 +37,13 @@ class Province(models.Model):
     class Meta:
         verbose_name = "Provincia"
         verbose_name_plural = "Provincias"
+        # Django (unicidad, admin, dumpdata) debe ver también los eliminados
+        default_manager_name = 'all_objects'
+        indexes = [
+            live_index(['name'], name='province_live_name_idx'),
+            live_index(['ubigeo_code'], name='province_live_code_idx'),
+            live_index(['region'], name='province_live_region_idx'),
+        ]
 
 
 class ProvinceUser(models.Model):
@@ -1,6 +1,6 @@
 ###
 from django.db import models
-from django.utils import timezone
+from .managers import AllObjectsManager, LiveManager, live_index
 
 class Region(models.Model):
     name = models.CharField(max_length=255)
@@ -11,10 +11,17 @@ class Region(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
-    def delete(self, using=None, keep_parents=False):
-        """Soft delete."""
-        self.deleted_at = timezone.now()
-        self.save()
+    objects = LiveManager()
+    all_objects = AllObjectsManager()
+
+    def delete(self, using=None, keep_parents=False, cascade=False):
+        """
+        Soft delete con las mismas reglas que la eliminación en lote (ver
+        ``UbigeoHierarchyService.soft_delete``).
+        """
+        from ..services.hierarchy_service import UbigeoHierarchyService
+        UbigeoHierarchyService.soft_delete('region', [self.pk], cascade=cascade)
+        self.refresh_from_db(fields=['deleted_at', 'updated_at'])
 
     def restore(self):
         """Restaura un registro eliminado."""
@@ -30,6 +37,12 @@ class Region(models.Model):
         db_table = "region"
         verbose_name = "Región"
         verbose_name_plural = "Regiones"
+        # Django (unicidad, admin, dumpdata) debe ver también los eliminados
+        default_manager_name = 'all_objects'
+        indexes = [
+            live_index(['name'], name='region_live_name_idx'),
+            live_index(['ubigeo_code'], name='region_live_code_idx'),
+        ]
 
 
 class RegionUser(models.Model):
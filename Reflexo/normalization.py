@@ -0,0 +1,19 @@
+"""
+Normalización de nombres geográficos.
+
+``fold`` quita tildes y diéresis, pasa a minúsculas y colapsa espacios, de
+modo que "Áncash", "ANCASH" y "ancash " se comparen como iguales.
+"""
+import re
+import unicodedata
+
+_SPACES = re.compile(r'\s+')
+
+
+def fold(value):
+    """Forma normalizada de un nombre para comparaciones"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    without_marks = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACES.sub(' ', without_marks).strip().lower()
@@ -5,10 +5,12 @@ from .country_service import CountryService
 from .region_service import RegionService
 from .province_service import ProvinceService
 from .district_service import DistrictService
+from .hierarchy_service import UbigeoHierarchyService
 
 __all__ = [
     'CountryService',
     'RegionService',
     'ProvinceService',
     'DistrictService',
+    'UbigeoHierarchyService',
 ]
@@ -4,6 +4,7 @@ from django.views.decorators.http import require_http_methods
 import json
 from ..models.district import District
 from ..models.province import Province
+from ..ubigeo_index import code_prefix_lookup
 
 
 class DistrictService:
@@ -104,9 +105,9 @@ class DistrictService:
     
     @staticmethod
     def get_districts_by_ubigeo_code(ubigeo_code):
-        """Obtiene distritos por código ubigeo"""
+        """Obtiene distritos cuyo código ubigeo empieza con ``ubigeo_code``"""
         try:
-            districts = District.objects.filter(ubigeo_code__icontains=ubigeo_code)
+            districts = District.objects.filter(**code_prefix_lookup(ubigeo_code)).order_by('ubigeo_code')
             return districts
         except Exception as e:
             raise Exception(f"Error al buscar distritos por ubigeo: {str(e)}")
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models.district import District
+from ..models.province import Province
+from ..models.region import Region
+from .. import ubigeo_index
+
+# nivel -> (modelo, clave en las respuestas)
+LEVEL_MODELS = {
+    'region': (Region, 'regions'),
+    'province': (Province, 'provinces'),
+    'district': (District, 'districts'),
+}
+
+# Ruta desde cada descendiente hasta el nivel eliminado/restaurado
+DESCENDANTS = {
+    'region': ((Province, 'region'), (District, 'province__region')),
+    'province': ((District, 'province'),),
+    'district': (),
+}
+
+
+class HasChildrenError(Exception):
+    """Eliminación sin cascada de registros que todavía tienen hijos vivos"""
+
+    def __init__(self, ids):
+        super().__init__('Hay registros con hijos asociados')
+        self.ids = ids
+
+
+class UbigeoHierarchyService:
+    """Eliminación lógica y restauración en cascada de la jerarquía de ubigeo"""
+
+    @staticmethod
+    def empty_counts():
+        return {key: 0 for _, key in LEVEL_MODELS.values()}
+
+    @staticmethod
+    def ids_with_children(level, ids):
+        """IDs del nivel que todavía tienen hijos vivos"""
+        descendants = DESCENDANTS[level]
+        if not descendants:
+            return []
+        child_model, path = descendants[0]
+        return sorted(set(
+            child_model.objects.filter(**{f'{path}_id__in': ids}).values_list(f'{path}_id', flat=True)
+        ))
+
+    @staticmethod
+    def soft_delete(level, ids, cascade=False):
+        """
+        Marca ``deleted_at`` en los registros vivos de ``ids`` y, con
+        ``cascade``, en todos sus descendientes vivos: un ``UPDATE`` por
+        nivel, todos con la misma marca de tiempo para poder restaurarlos
+        juntos. La cascada parte solo de los registros que esta llamada
+        eliminó; los que ya estaban eliminados conservan su marca y no
+        arrastran a sus hijos con otra distinta. Sin ``cascade``, lanza
+        ``HasChildrenError`` si alguno tiene hijos vivos; la verificación se
+        hace dentro de la transacción, con los padres bloqueados, para que
+        no quede un hijo nuevo bajo un padre eliminado. Retorna la cantidad
+        de filas afectadas por nivel.
+        """
+        try:
+            model, key = LEVEL_MODELS[level]
+            counts = UbigeoHierarchyService.empty_counts()
+            now = timezone.now()
+            with transaction.atomic():
+                live_ids = list(
+                    model.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True)
+                )
+                if not live_ids:
+                    return counts
+                if not cascade:
+                    with_children = UbigeoHierarchyService.ids_with_children(level, live_ids)
+                    if with_children:
+                        raise HasChildrenError(with_children)
+                counts[key] = model.objects.filter(id__in=live_ids).update(deleted_at=now, updated_at=now)
+                if cascade:
+                    for child_model, path in DESCENDANTS[level]:
+                        counts[LEVEL_MODELS[child_model._meta.model_name][1]] = child_model.objects.filter(
+                            **{f'{path}_id__in': live_ids}
+                        ).update(deleted_at=now, updated_at=now)
+                if any(counts.values()):
+                    # update() no emite post_save
+                    ubigeo_index.invalidate()
+            return counts
+        except HasChildrenError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error al eliminar {level}: {str(e)}")
+
+    @staticmethod
+    def restore(level, ids, cascade=False):
+        """
+        Restaura los registros eliminados de ``ids``. Con ``cascade`` también
+        restaura los descendientes eliminados en la misma operación (misma
+        marca ``deleted_at`` que su ancestro), no los que ya estaban
+        eliminados antes. Se restaura de abajo hacia arriba para comparar
+        contra la marca del ancestro antes de limpiarla.
+        """
+        try:
+            model, key = LEVEL_MODELS[level]
+            counts = UbigeoHierarchyService.empty_counts()
+            now = timezone.now()
+            with transaction.atomic():
+                if cascade:
+                    for child_model, path in reversed(DESCENDANTS[level]):
+                        counts[LEVEL_MODELS[child_model._meta.model_name][1]] = child_model.all_objects.filter(
+                            **{f'{path}_id__in': ids, 'deleted_at': F(f'{path}__deleted_at')}
+                        ).update(deleted_at=None, updated_at=now)
+                counts[key] = model.all_objects.dead().filter(id__in=ids).update(deleted_at=None, updated_at=now)
+                if any(counts.values()):
+                    ubigeo_index.invalidate()
+            return counts
+        except Exception as e:
+            raise Exception(f"Error al restaurar {level}: {str(e)}")
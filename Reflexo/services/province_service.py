@@ -4,6 +4,7 @@ from django.views.decorators.http import require_http_methods
 import json
 from ..models.province import Province
 from ..models.region import Region
+from ..ubigeo_index import code_prefix_lookup
 
 
 class ProvinceService:
@@ -82,11 +83,11 @@ class ProvinceService:
             raise Exception(f"Error al actualizar provincia: {str(e)}")
     
     @staticmethod
-    def delete_province(province_id):
-        """Elimina una provincia"""
+    def delete_province(province_id, cascade=False):
+        """Elimina una provincia; con ``cascade`` también sus descendientes"""
         try:
             province = Province.objects.get(id=province_id)
-            province.delete()
+            province.delete(cascade=cascade)
             return True
         except Province.DoesNotExist:
             raise Exception(f"Provincia con ID {province_id} no encontrada")
@@ -104,9 +105,9 @@ class ProvinceService:
     
     @staticmethod
     def get_provinces_by_ubigeo_code(ubigeo_code):
-        """Obtiene provincias por código ubigeo"""
+        """Obtiene provincias cuyo código ubigeo empieza con ``ubigeo_code``"""
         try:
-            provinces = Province.objects.filter(ubigeo_code__icontains=ubigeo_code)
+            provinces = Province.objects.filter(**code_prefix_lookup(ubigeo_code)).order_by('ubigeo_code')
             return provinces
         except Exception as e:
             raise Exception(f"Error al buscar provincias por ubigeo: {str(e)}")
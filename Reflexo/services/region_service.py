@@ -3,6 +3,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 from ..models.region import Region
+from ..ubigeo_index import code_prefix_lookup
 
 
 class RegionService:
@@ -12,7 +13,7 @@ class RegionService:
     def get_all_regions():
         """Obtiene todas las regiones"""
         try:
-            regions = Region.objects.filter(deleted_at__isnull=True)
+            regions = Region.objects.all()
             return regions
         except Exception as e:
             raise Exception(f"Error al obtener regiones: {str(e)}")
@@ -21,7 +22,7 @@ class RegionService:
     def get_region_by_id(region_id):
         """Obtiene una región por ID"""
         try:
-            region = Region.objects.get(id=region_id, deleted_at__isnull=True)
+            region = Region.objects.get(id=region_id)
             return region
         except Region.DoesNotExist:
             raise Exception(f"Región con ID {region_id} no encontrada")
@@ -44,7 +45,7 @@ class RegionService:
     def update_region(region_id, data):
         """Actualiza una región existente"""
         try:
-            region = Region.objects.get(id=region_id, deleted_at__isnull=True)
+            region = Region.objects.get(id=region_id)
             if 'name' in data:
                 region.name = data['name']
             if 'ubigeo_code' in data:
@@ -57,11 +58,11 @@ class RegionService:
             raise Exception(f"Error al actualizar región: {str(e)}")
     
     @staticmethod
-    def delete_region(region_id):
-        """Elimina una región (soft delete)"""
+    def delete_region(region_id, cascade=False):
+        """Elimina una región (soft delete); con ``cascade`` también sus descendientes"""
         try:
-            region = Region.objects.get(id=region_id, deleted_at__isnull=True)
-            region.delete()  # Esto ejecuta el soft delete
+            region = Region.objects.get(id=region_id)
+            region.delete(cascade=cascade)
             return True
         except Region.DoesNotExist:
             raise Exception(f"Región con ID {region_id} no encontrada")
@@ -72,7 +73,7 @@ class RegionService:
     def restore_region(region_id):
         """Restaura una región eliminada"""
         try:
-            region = Region.objects.get(id=region_id, deleted_at__isnull=False)
+            region = Region.all_objects.dead().get(id=region_id)
             region.restore()
             return region
         except Region.DoesNotExist:
@@ -84,22 +85,16 @@ class RegionService:
     def search_regions(query):
         """Busca regiones por nombre"""
         try:
-            regions = Region.objects.filter(
-                name__icontains=query,
-                deleted_at__isnull=True
-            )
+            regions = Region.objects.filter(name__icontains=query)
             return regions
         except Exception as e:
             raise Exception(f"Error al buscar regiones: {str(e)}")
     
     @staticmethod
     def get_regions_by_ubigeo_code(ubigeo_code):
-        """Obtiene regiones por código ubigeo"""
+        """Obtiene regiones cuyo código ubigeo empieza con ``ubigeo_code``"""
         try:
-            regions = Region.objects.filter(
-                ubigeo_code__icontains=ubigeo_code,
-                deleted_at__isnull=True
-            )
+            regions = Region.objects.filter(**code_prefix_lookup(ubigeo_code)).order_by('ubigeo_code')
             return regions
         except Exception as e:
             raise Exception(f"Error al buscar regiones por ubigeo: {str(e)}")
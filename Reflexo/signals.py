@@ -0,0 +1,21 @@
+"""
+Señales del módulo de ubigeo.
+Invalidan el índice en memoria cuando cambia una región, provincia o distrito
+(incluido el soft delete, que se guarda con ``save()``).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import ubigeo_index
+from .models import District, Province, Region
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=Province)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=Province)
+@receiver(post_delete, sender=District)
+def invalidate_ubigeo_index(sender, **kwargs):
+    """Cualquier escritura de ubigeo invalida el índice en memoria"""
+    ubigeo_index.invalidate()
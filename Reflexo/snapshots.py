@@ -0,0 +1,153 @@
+"""
+Snapshots precomprimidos de los listados completos de ubigeo.
+
+Cada listado registrado se serializa una sola vez por versión del índice
+de ubigeo y se guarda como bytes en claro, gzip y (si ``brotli`` está
+instalado) brotli, junto con un ETag derivado del hash del contenido. Las
+respuestas eligen la codificación según ``Accept-Encoding`` y contestan
+304 a ``If-None-Match`` sin volver a serializar nada.
+
+Además cada snapshot tiene una URL versionada por hash que se puede
+cachear de forma indefinida (``Cache-Control: immutable``).
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+from .ubigeo_index import get_index
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Preferencia del servidor cuando el cliente acepta varias codificaciones
+ENCODINGS = ('br', 'gzip')
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_builders = {}
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def register(name, builder):
+    """Registra un listado: ``builder(index)`` retorna los datos a serializar"""
+    _builders[name] = builder
+
+
+def registered():
+    return sorted(_builders)
+
+
+def envelope(level, fields):
+    """Formato ``{'success', 'data', 'count'}`` de los endpoints CRUD"""
+    def build(index):
+        rows = index.rows(level, fields)
+        return {'success': True, 'data': rows, 'count': len(rows)}
+    return build
+
+
+def plain(level, fields):
+    """Lista simple, como los endpoints ``api/v2``"""
+    def build(index):
+        return index.rows(level, fields)
+    return build
+
+
+class Snapshot:
+    """Un listado ya serializado y comprimido para una versión del índice"""
+    __slots__ = ('name', 'version', 'digest', 'bodies')
+
+    def __init__(self, name, version, data):
+        self.name = name
+        self.version = version
+        body = json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding):
+        # Cada codificación es una representación distinta: ETag distinto
+        if encoding == 'identity':
+            return quote_etag(self.digest)
+        return quote_etag(f'{self.digest}-{encoding}')
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        if '*' in etags:
+            return True
+        return any(self.etag(encoding) in etags for encoding in self.bodies)
+
+
+def get_snapshot(name, builder=None):
+    """
+    Snapshot vigente de un listado; ``KeyError`` si no está registrado.
+    Con ``builder`` se puede cachear un documento no registrado (p. ej. un
+    subárbol), que no aparece en el manifiesto.
+    """
+    builder = builder or _builders[name]
+    index = get_index()
+    snapshot = _snapshots.get(name)
+    if snapshot is not None and snapshot.version == index.version:
+        return snapshot
+    with _lock:
+        snapshot = _snapshots.get(name)
+        if snapshot is None or snapshot.version != index.version:
+            snapshot = Snapshot(name, index.version, builder(index))
+            _snapshots[name] = snapshot
+        return snapshot
+
+
+def choose_encoding(accept_encoding, available):
+    """Codificación a usar según ``Accept-Encoding`` (respeta ``q=0``)"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def snapshot_response(request, name, immutable=False, builder=None):
+    """Respuesta HTTP de un snapshot, con 304 si el cliente ya lo tiene"""
+    snapshot = get_snapshot(name, builder)
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), snapshot.bodies)
+
+    if snapshot.matches(request.META.get('HTTP_IF_NONE_MATCH')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(snapshot.bodies[encoding], content_type='application/json')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = snapshot.etag(encoding)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if immutable:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -61,6 +61,13 @@ class RegionModelTest(TestCase):
         self.region.delete()
         self.region.restore()
         self.assertIsNone(self.region.deleted_at)
+    
+    def test_region_managers(self):
+        """Test de managers: objects oculta eliminados, all_objects los incluye"""
+        self.region.delete()
+        self.assertFalse(Region.objects.filter(id=self.region.id).exists())
+        self.assertTrue(Region.all_objects.filter(id=self.region.id).exists())
+        self.assertEqual(list(Region.all_objects.dead()), [self.region])
 
 
 class ProvinceModelTest(TestCase):
@@ -126,3 +133,26 @@ class DistrictModelTest(TestCase):
         """Test de relación con provincia"""
         self.assertEqual(self.district.province.name, "Lima")
         self.assertIn(self.district, self.province.districts.all())
+
+
+class SoftDeleteIndexTest(TestCase):
+    """Tests para los índices parciales de registros vivos"""
+    
+    def test_unique_validation_sees_deleted_rows(self):
+        """El manager por defecto incluye eliminados: reusar su código es un error de validación"""
+        from django.core.exceptions import ValidationError
+        Region.objects.create(name="Lima", ubigeo_code="15").delete()
+        self.assertEqual(Region._default_manager.count(), 1)
+        with self.assertRaises(ValidationError):
+            Region(name="Lima Metropolitana", ubigeo_code="15").validate_unique()
+
+    def test_live_children_use_partial_index(self):
+        """Las provincias vivas de una región se leen desde el índice parcial"""
+        region = Region.objects.create(name="Lima", ubigeo_code="15")
+        Province.objects.create(name="Lima", region=region, ubigeo_code="1501")
+        deleted = Province.objects.create(name="Barranca", region=region, ubigeo_code="1502")
+        deleted.delete()
+        
+        self.assertEqual([p.name for p in region.provinces(manager='objects').all()], ["Lima"])
+        plan = Province.objects.filter(region_id=region.id).explain()
+        self.assertIn("province_live_region_idx", plan)
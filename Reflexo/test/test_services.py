@@ -1,9 +1,20 @@
+import csv
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
-from django.core.exceptions import ObjectDoesNotExist
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.test import override_settings
+from Reflexo.apps import check_shared_cache
 from Reflexo.services.country_service import CountryService
 from Reflexo.services.region_service import RegionService
 from Reflexo.services.province_service import ProvinceService
 from Reflexo.services.district_service import DistrictService
+from Reflexo.services.hierarchy_service import HasChildrenError, UbigeoHierarchyService
 from Reflexo.models.country import Country
 from Reflexo.models.region import Region
 from Reflexo.models.province import Province
@@ -54,7 +65,7 @@ class CountryServiceTest(TestCase):
         result = CountryService.delete_country(self.country.id)
         self.assertTrue(result)
         # El país debe seguir existiendo pero con deleted_at
-        country = Country.objects.get(id=self.country.id)
+        country = Country.all_objects.get(id=self.country.id)
         self.assertIsNotNone(country.deleted_at)
     
     def test_search_countries(self):
@@ -96,9 +107,24 @@ class RegionServiceTest(TestCase):
         result = RegionService.delete_region(self.region.id)
         self.assertTrue(result)
         # La región debe seguir existiendo pero con deleted_at
-        region = Region.objects.get(id=self.region.id)
+        region = Region.all_objects.get(id=self.region.id)
         self.assertIsNotNone(region.deleted_at)
     
+    def test_delete_region_follows_hierarchy_rules(self):
+        """Test: la eliminación individual aplica las reglas de la eliminación en lote"""
+        province = Province.objects.create(name='Lima', region=self.region, ubigeo_code='1501')
+        District.objects.create(name='Lima', province=province, ubigeo_code='150101')
+        with self.assertRaises(Exception):
+            RegionService.delete_region(self.region.id)
+        self.assertTrue(Region.objects.filter(id=self.region.id).exists())
+        
+        RegionService.delete_region(self.region.id, cascade=True)
+        self.assertEqual(Province.objects.count(), 0)
+        self.assertEqual(District.objects.count(), 0)
+        self.assertEqual(
+            Province.all_objects.get(id=province.id).deleted_at, Region.all_objects.get(id=self.region.id).deleted_at
+        )
+    
     def test_restore_region(self):
         """Test de restaurar región"""
         self.region.delete()
@@ -193,3 +219,188 @@ class DistrictServiceTest(TestCase):
         district = DistrictService.create_district(data)
         self.assertEqual(district.name, 'Miraflores')
         self.assertEqual(district.province, self.province)
+    
+    def test_get_districts_by_ubigeo_code_prefix(self):
+        """Test de búsqueda por prefijo de código ubigeo"""
+        District.objects.create(name='Ancón', province=self.province, ubigeo_code='150102')
+        other = Province.objects.create(name='Barranca', region=self.region, ubigeo_code='1502')
+        District.objects.create(name='Barranca', province=other, ubigeo_code='150201')
+        
+        districts = DistrictService.get_districts_by_ubigeo_code('1501')
+        self.assertEqual([d.ubigeo_code for d in districts], ['150101', '150102'])
+        # El código se interpreta como prefijo, no como subcadena
+        self.assertEqual(len(DistrictService.get_districts_by_ubigeo_code('0102')), 0)
+
+
+class LoadUbigeoDataCommandTest(TestCase):
+    """Tests para el comando load_ubigeo_data"""
+    
+    def test_full_load_and_rerun(self):
+        """Test de carga completa desde bd/ con pocas consultas y sin cambios al repetir"""
+        with CaptureQueriesContext(connection) as queries:
+            call_command('load_ubigeo_data', stdout=StringIO())
+        # Una lectura por nivel y los INSERT en lote, no una consulta por fila
+        self.assertLess(len(queries), 40)
+        self.assertEqual(Region.objects.count(), 25)
+        district = District.objects.select_related('province__region').get(ubigeo_code='150122')
+        self.assertEqual(district.name, 'Miraflores')
+        self.assertEqual(district.province.ubigeo_code, '1501')
+        self.assertEqual(district.province.region.name, 'Lima')
+        
+        Region.objects.filter(id=15).update(name='Lima Metropolitana')
+        out = StringIO()
+        call_command('load_ubigeo_data', '--dry-run', stdout=out)
+        self.assertIn('0 nuevas, 1 modificadas', out.getvalue())
+        self.assertEqual(Region.objects.get(id=15).name, 'Lima Metropolitana')
+        
+        call_command('load_ubigeo_data', stdout=StringIO())
+        self.assertEqual(Region.objects.get(id=15).name, 'Lima')
+
+
+class SyncUbigeoCommandTest(TestCase):
+    """Tests para el comando sync_ubigeo"""
+    
+    def setUp(self):
+        call_command('load_ubigeo_data', stdout=StringIO())
+    
+    def test_check_detects_drift(self):
+        """Test de --check: 0 si está sincronizado, error si la base difiere"""
+        call_command('sync_ubigeo', '--check', stdout=StringIO())
+        
+        Region.objects.filter(id=15).update(name='Lima Metropolitana')
+        with self.assertRaises(CommandError) as error:
+            call_command('sync_ubigeo', '--check', stdout=StringIO())
+        self.assertEqual(error.exception.returncode, 1)
+        self.assertEqual(Region.objects.get(id=15).name, 'Lima Metropolitana')
+    
+    def test_sync_applies_only_the_delta(self):
+        """Test de sincronización: actualiza, restaura, inserta y elimina solo lo necesario"""
+        Region.objects.filter(id=15).update(name='Lima Metropolitana')
+        District.all_objects.filter(id=150122).update(deleted_at=timezone.now())
+        District.all_objects.filter(id=150101).delete()
+        extra = District.objects.create(name='Inventado', province_id=1501, ubigeo_code='150199')
+        untouched = District.objects.get(id=150102).updated_at
+        
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('sync_ubigeo', '-v', '2', stdout=out)
+        self.assertLess(len(queries), 20)
+        self.assertIn('1 nuevas, 0 modificadas, 1 restauradas, 1 eliminadas', out.getvalue())
+        
+        self.assertEqual(Region.objects.get(id=15).name, 'Lima')
+        self.assertIsNone(District.objects.get(id=150122).deleted_at)
+        self.assertTrue(District.objects.filter(id=150101, deleted_at__isnull=True).exists())
+        self.assertIsNotNone(District.all_objects.get(id=extra.id).deleted_at)
+        self.assertEqual(District.objects.get(id=150102).updated_at, untouched)
+        call_command('sync_ubigeo', '--check', stdout=StringIO())
+
+
+class ValidateUbigeoCommandTest(TestCase):
+    """Tests para el comando validate_ubigeo"""
+    
+    def setUp(self):
+        self.region = Region.objects.create(id=15, name='Lima', ubigeo_code='15')
+        self.province = Province.objects.create(id=1501, name='Lima', region=self.region, ubigeo_code='1501')
+        District.objects.create(id=150101, name='Lima', province=self.province, ubigeo_code='150101')
+        District.objects.create(id=150102, name='Ancón', province=self.province, ubigeo_code=None)
+        District.objects.create(id=150103, name='Ate', province=self.province, ubigeo_code='1601')
+        District.objects.create(id=150104, name='Barranco', province=self.province, ubigeo_code='160104')
+    
+    def test_json_report_counts_by_error_class(self):
+        """Test de reporte JSON con conteos por clase de error y pocas consultas"""
+        out = StringIO()
+        with self.assertNumQueries(3):
+            call_command('validate_ubigeo', '--format', 'json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['checked'], {'region': 1, 'province': 1, 'district': 4})
+        self.assertEqual(report['counts'], {'invalid_format': 1, 'missing_code': 1, 'parent_mismatch': 2})
+    
+    def test_fix_and_strict(self):
+        """Test de --fix en lote y --strict con los errores que quedan"""
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('validate_ubigeo', '--fix', '--strict', '--format', 'csv', stdout=out)
+        self.assertEqual(District.objects.get(id=150102).ubigeo_code, '150102')
+        self.assertEqual(District.objects.get(id=150103).ubigeo_code, '150103')
+        errors, counts = out.getvalue().split('\n\n')
+        rows = list(csv.DictReader(StringIO(errors)))
+        self.assertEqual([(row['id'], row['error']) for row in rows], [('150104', 'parent_mismatch')])
+        self.assertEqual(list(csv.reader(StringIO(counts))), [['error', 'count'], ['parent_mismatch', '1']])
+    
+    def test_csv_report_counts_by_error_class(self):
+        """Test de reporte CSV: filas de error y conteo por clase al final"""
+        out = StringIO()
+        call_command('validate_ubigeo', '--format', 'csv', stdout=out)
+        errors, counts = out.getvalue().split('\n\n')
+        rows = list(csv.DictReader(StringIO(errors)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['message'], 'Falta código de ubigeo')
+        self.assertEqual(
+            list(csv.DictReader(StringIO(counts))),
+            [
+                {'error': 'invalid_format', 'count': '1'},
+                {'error': 'missing_code', 'count': '1'},
+                {'error': 'parent_mismatch', 'count': '2'},
+            ]
+        )
+
+
+class UbigeoHierarchyServiceTest(TestCase):
+    """Tests para UbigeoHierarchyService"""
+    
+    def setUp(self):
+        self.region = Region.objects.create(name='Lima', ubigeo_code='15')
+        self.province = Province.objects.create(name='Lima', region=self.region, ubigeo_code='1501')
+        self.other = Province.objects.create(name='Barranca', region=self.region, ubigeo_code='1502')
+        for i in range(1, 4):
+            District.objects.create(name=f'Distrito {i}', province=self.province, ubigeo_code=f'15010{i}')
+        self.previously_deleted = District.objects.create(name='Antiguo', province=self.other, ubigeo_code='150201')
+        self.previously_deleted.delete()
+    
+    def test_cascade_soft_delete(self):
+        """Test de eliminación en cascada: un UPDATE por nivel"""
+        # SAVEPOINT, SELECT de los vivos, tres UPDATE y RELEASE
+        with self.assertNumQueries(6):
+            counts = UbigeoHierarchyService.soft_delete('region', [self.region.id], cascade=True)
+        self.assertEqual(counts, {'regions': 1, 'provinces': 2, 'districts': 3})
+        self.assertEqual(District.objects.count(), 0)
+    
+    def test_cascade_restore_only_same_operation(self):
+        """Test de restauración en cascada: no revive lo eliminado antes"""
+        UbigeoHierarchyService.soft_delete('region', [self.region.id], cascade=True)
+        counts = UbigeoHierarchyService.restore('region', [self.region.id], cascade=True)
+        self.assertEqual(counts, {'regions': 1, 'provinces': 2, 'districts': 3})
+        self.assertEqual(District.objects.count(), 3)
+        self.assertFalse(District.objects.filter(id=self.previously_deleted.id).exists())
+    
+    def test_cascade_skips_already_deleted_parents(self):
+        """Test de cascada desde un padre ya eliminado: no cambia la marca de sus hijos"""
+        UbigeoHierarchyService.soft_delete('province', [self.other.id])
+        District.objects.create(name='Nuevo', province=self.other, ubigeo_code='150202')
+        counts = UbigeoHierarchyService.soft_delete('province', [self.province.id, self.other.id], cascade=True)
+        self.assertEqual(counts, {'regions': 0, 'provinces': 1, 'districts': 3})
+        self.assertTrue(District.objects.filter(ubigeo_code='150202').exists())
+    
+    def test_soft_delete_without_cascade_rejects_parents(self):
+        """Test sin cascada: la verificación de hijos ocurre dentro de la transacción"""
+        with self.assertRaises(HasChildrenError) as raised:
+            UbigeoHierarchyService.soft_delete('province', [self.province.id, self.other.id])
+        self.assertEqual(raised.exception.ids, [self.province.id])
+        self.assertEqual(Province.objects.count(), 2)
+
+
+class SharedCacheCheckTest(TestCase):
+    """Tests para la verificación de caché compartida al arrancar"""
+    
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    DATABASE = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}}
+    
+    def test_process_local_cache_is_rejected_outside_debug(self):
+        """Test: sin DEBUG, una caché local al proceso impide arrancar"""
+        with override_settings(CACHES=self.LOCMEM, DEBUG=False):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_cache()
+        with override_settings(CACHES=self.LOCMEM, DEBUG=True):
+            check_shared_cache()
+        with override_settings(CACHES=self.DATABASE, DEBUG=False):
+            check_shared_cache()
@@ -1,6 +1,7 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.core.exceptions import ObjectDoesNotExist
+import gzip
 import json
 from Reflexo.models.country import Country
 from Reflexo.models.region import Region
@@ -70,7 +71,7 @@ class CountryViewsTest(TestCase):
         response_data = json.loads(response.content)
         self.assertTrue(response_data['success'])
         # El país debe seguir existiendo pero con deleted_at
-        country = Country.objects.get(id=self.country.id)
+        country = Country.all_objects.get(id=self.country.id)
         self.assertIsNotNone(country.deleted_at)
 
 
@@ -116,6 +117,58 @@ class RegionViewsTest(TestCase):
         self.assertTrue(response_data['success'])
         self.assertEqual(response_data['data']['name'], 'Arequipa')
     
+    def test_region_cascade_delete_view(self):
+        """Test de eliminación en cascada y restauración en lote de regiones"""
+        province = Province.objects.create(name='Lima', region=self.region, ubigeo_code='1501')
+        District.objects.create(name='Lima', province=province, ubigeo_code='150101')
+        
+        response = self.client.delete(f'/api/v3/regions/{self.region.id}/delete/')
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.delete(f'/api/v3/regions/{self.region.id}/delete/?cascade=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content)['data'],
+            {'regions': 1, 'provinces': 1, 'districts': 1}
+        )
+        
+        response = self.client.post(
+            '/api/v3/regions/bulk-restore/',
+            data=json.dumps({'ids': [self.region.id, 999], 'cascade': True}),
+            content_type='application/json'
+        )
+        data = json.loads(response.content)['data']
+        self.assertEqual(data['updated'], {'regions': 1, 'provinces': 1, 'districts': 1})
+        self.assertEqual(data['not_found'], [999])
+        self.assertTrue(District.objects.filter(province=province).exists())
+    
+    def test_bulk_delete_requires_cascade_for_parents(self):
+        """Test de eliminación en lote: sin cascade se rechazan regiones con provincias"""
+        Province.objects.create(name='Lima', region=self.region, ubigeo_code='1501')
+        empty = Region.objects.create(name='Callao', ubigeo_code='07')
+        
+        response = self.client.post(
+            '/api/v3/regions/bulk-delete/',
+            data=json.dumps({'ids': [self.region.id, empty.id]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['ids'], [self.region.id])
+        
+        response = self.client.post(
+            '/api/v3/regions/bulk-delete/',
+            data=json.dumps({'ids': [empty.id]}),
+            content_type='application/json'
+        )
+        self.assertEqual(json.loads(response.content)['data']['updated']['regions'], 1)
+        
+        response = self.client.post('/api/v3/regions/bulk-delete/', data='{"ids": "x"}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post('/api/v3/regions/bulk-delete/', data='[1, 2]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.content)['success'])
+    
     def test_region_delete_view(self):
         """Test de vista de eliminación de región (soft delete)"""
         response = self.client.delete(f'/api/v3/regions/{self.region.id}/delete/')
@@ -123,7 +176,7 @@ class RegionViewsTest(TestCase):
         response_data = json.loads(response.content)
         self.assertTrue(response_data['success'])
         # La región debe seguir existiendo pero con deleted_at
-        region = Region.objects.get(id=self.region.id)
+        region = Region.all_objects.get(id=self.region.id)
         self.assertIsNotNone(region.deleted_at)
 
 
@@ -249,6 +302,163 @@ class DistrictViewsTest(TestCase):
 
 
 
+    def test_districts_served_from_index(self):
+        """Las lecturas repetidas se responden desde el índice sin consultas"""
+        self.client.get('/api/districts/')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/v3/provinces/{self.province.id}/districts/')
+        data = json.loads(response.content)
+        self.assertEqual(data['data'][0]['province__name'], 'Lima')
+        self.assertEqual(data['data'][0]['ubigeo_code'], '150101')
+
+    def test_index_reflects_writes(self):
+        """Crear o eliminar un distrito reconstruye el índice"""
+        self.client.get('/api/districts/')
+        District.objects.create(name='Miraflores', province=self.province, ubigeo_code='150122')
+        self.client.delete(f'/api/v3/districts/{self.district.id}/delete/')
+
+        response = self.client.get('/api/districts/')
+        data = json.loads(response.content)
+        self.assertEqual([d['name'] for d in data['data']], ['Miraflores'])
+        response = self.client.get(f'/api/v3/districts/{self.district.id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+    def test_districts_snapshot_encoding_and_etag(self):
+        """El listado completo se sirve comprimido y responde 304 con su ETag"""
+        response = self.client.get('/api/districts/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['data'][0]['province__name'], 'Lima')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v3/districts/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        plain = self.client.get('/api/v2/districts/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(plain.content)[0]['ubigeo_code'], '150101')
+
+    def test_districts_snapshot_versioned_url(self):
+        """La URL versionada es inmutable y un hash antiguo redirige al vigente"""
+        manifest = json.loads(self.client.get('/api/v3/snapshots/').content)
+        url = manifest['data']['districts']['url']
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        District.objects.create(name='Miraflores', province=self.province, ubigeo_code='150122')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(response['Location'])
+        self.assertEqual(json.loads(response.content)['count'], 2)
+
+    def test_ubigeo_tree(self):
+        """El árbol anidado se arma desde el índice y acepta un subárbol por código"""
+        response = self.client.get('/api/v3/ubigeo/tree/')
+        self.assertEqual(response.status_code, 200)
+        tree = json.loads(response.content)['data']
+        self.assertEqual(tree[0]['code'], '15')
+        self.assertEqual(tree[0]['provinces'][0]['districts'][0]['name'], 'Lima')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v3/ubigeo/tree/', {'code': '1501'})
+        node = json.loads(response.content)['data']
+        self.assertEqual(node['id'], self.province.id)
+        self.assertEqual([d['code'] for d in node['districts']], ['150101'])
+        self.assertIn('ETag', response)
+
+        response = self.client.get('/api/v3/ubigeo/tree/', {'code': '99'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_ubigeo_lookup_batch(self):
+        """Varios códigos completos o parciales se resuelven en una sola llamada"""
+        response = self.client.post(
+            '/api/v3/ubigeo/lookup/',
+            data=json.dumps({'codes': ['150101', '15', '99']}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        full, partial, missing = json.loads(response.content)['data']
+        self.assertTrue(full['exact'])
+        self.assertEqual(full['results'][0]['path'], ['Lima', 'Lima', 'Lima'])
+        self.assertEqual(full['results'][0]['parent_id'], self.province.id)
+        self.assertEqual([r['code'] for r in partial['results']], ['15', '1501', '150101'])
+        self.assertEqual(missing['total'], 0)
+
+        response = self.client.get('/api/v3/ubigeo/lookup/', {'codes': '1501', 'limit': 1})
+        result = json.loads(response.content)['data'][0]
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(len(result['results']), 1)
+
+        response = self.client.get('/api/v3/ubigeo/lookup/')
+        self.assertEqual(response.status_code, 400)
+
+        for body in ('["15"]', '{"codes": [15]}', '{"codes": "15"}'):
+            response = self.client.post('/api/v3/ubigeo/lookup/', data=body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_ubigeo_autocomplete(self):
+        """El autocompletado ignora tildes y mayúsculas y ordena por nivel"""
+        ancash = Region.objects.create(name='Áncash', ubigeo_code='02')
+        huaraz = Province.objects.create(name='Huaraz', region=ancash, ubigeo_code='0201')
+        District.objects.create(name='La Unión', province=huaraz, ubigeo_code='020199')
+        District.objects.create(name='Miraflores', province=self.province, ubigeo_code='150122')
+
+        response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'ANCASH'})
+        data = json.loads(response.content)['data']
+        self.assertEqual(data[0]['name'], 'Áncash')
+        self.assertEqual(data[0]['level'], 'region')
+
+        response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'la union'})
+        data = json.loads(response.content)['data']
+        self.assertEqual(data[0]['path'], 'Áncash › Huaraz › La Unión')
+
+        response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'mira'})
+        self.assertEqual(json.loads(response.content)['data'][0]['path'], 'Lima › Lima › Miraflores')
+
+        # "Lima" existe en los tres niveles: primero la región
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'lim', 'limit': 2})
+        data = json.loads(response.content)['data']
+        self.assertEqual([d['level'] for d in data], ['region', 'province'])
+
+        response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'lima', 'level': 'district'})
+        self.assertEqual([d['level'] for d in json.loads(response.content)['data']], ['district'])
+        response = self.client.get('/api/v3/ubigeo/autocomplete/', {'q': 'lima', 'level': 'country'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_districts_query_params(self):
+        """Paginación por cursor, proyección de campos y filtro por fecha de actualización"""
+        for i in range(2, 6):
+            District.objects.create(name=f'Distrito {i}', province=self.province, ubigeo_code=f'15010{i}')
+        url = f'/api/v3/provinces/{self.province.id}/districts/'
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'fields': 'id,name', 'limit': 2, 'ordering': '-ubigeo_code'})
+        data = json.loads(response.content)
+        self.assertEqual(data['data'], [
+            {'id': data['data'][0]['id'], 'name': 'Distrito 5'},
+            {'id': data['data'][1]['id'], 'name': 'Distrito 4'},
+        ])
+        names = [row['name'] for row in data['data']]
+        while data['next']:
+            data = json.loads(self.client.get(data['next']).content)
+            names.extend(row['name'] for row in data['data'])
+        self.assertEqual(names, ['Distrito 5', 'Distrito 4', 'Distrito 3', 'Distrito 2', 'Lima'])
+
+        response = self.client.get('/api/v3/districts/', {'updated_since': '2999-01-01'})
+        self.assertEqual(json.loads(response.content)['count'], 0)
+        response = self.client.get('/api/v3/districts/', {'fields': 'id,province__region'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v3/districts/', {'ordering': 'created_at'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v3/districts/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 400)
+
 class WebViewsTest(TestCase):
     """Tests para las vistas web"""
     
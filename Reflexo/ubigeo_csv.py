@@ -0,0 +1,62 @@
+"""
+Lectura de los CSV de ubigeo de ``bd/`` compartida por los comandos de carga,
+sincronización y validación.
+
+Los archivos usan ``;`` como separador y el ID numérico de INEI; el código
+de ubigeo se deriva del ID rellenado con ceros (2, 4 o 6 dígitos).
+"""
+import csv
+import hashlib
+import os
+
+from django.conf import settings
+
+from .models import District, Province, Region
+
+CSV_DIR = os.path.join(settings.BASE_DIR, 'bd')
+DELIMITER = ';'
+
+
+class UbigeoLevel:
+    """Un nivel de la jerarquía: modelo, archivo, campo padre y largo del código"""
+
+    def __init__(self, name, model, filename, parent_field, code_length):
+        self.name = name
+        self.model = model
+        self.filename = filename
+        self.parent_field = parent_field
+        self.code_length = code_length
+
+    @property
+    def parent_column(self):
+        return f'{self.parent_field}_id' if self.parent_field else None
+
+    def code(self, pk):
+        return f'{pk:0{self.code_length}d}'
+
+    def path(self, csv_dir=None):
+        return os.path.join(csv_dir or CSV_DIR, self.filename)
+
+
+LEVELS = (
+    UbigeoLevel('region', Region, 'regions.csv', None, 2),
+    UbigeoLevel('province', Province, 'provinces.csv', 'region', 4),
+    UbigeoLevel('district', District, 'districts.csv', 'province', 6),
+)
+
+
+def read_level(level, csv_dir=None):
+    """
+    Genera ``(id, name, parent_id)`` por cada fila del CSV del nivel, sin
+    cargar el archivo completo. ``parent_id`` es ``None`` para regiones.
+    """
+    with open(level.path(csv_dir), 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file, delimiter=DELIMITER):
+            parent_id = int(row[level.parent_column]) if level.parent_field else None
+            yield int(row['id']), row['name'].strip(), parent_id
+
+
+def fingerprint(name, code, parent_id):
+    """Huella corta de los campos sincronizados de un registro"""
+    raw = '\x1f'.join(('' if value is None else str(value)) for value in (name, code, parent_id))
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).digest()
@@ -0,0 +1,228 @@
+"""
+Índice de ubigeo en memoria, compartido por todo el proceso.
+
+Regiones, provincias y distritos casi nunca cambian pero se leen en cada
+formulario de dirección. ``get_index()`` construye una sola vez (tres
+consultas) una estructura inmutable con arreglos planos por nivel, tablas
+de padre/hijos por posición y un diccionario ``ubigeo_code -> nodo``, y
+las vistas de lectura responden desde ahí sin tocar la base de datos.
+
+La caché de Django guarda un contador de versión que las señales de
+``Region``, ``Province`` y ``District`` incrementan en cada escritura; si
+la versión cambió, el índice se reconstruye y se reemplaza de forma atómica.
+"""
+import threading
+from bisect import bisect_left
+
+from Reflexo.versions import VersionCounter
+
+VERSION_KEY = 'reflexo:ubigeo-version'
+
+_version = VersionCounter(VERSION_KEY)
+
+REGION, PROVINCE, DISTRICT = 'region', 'province', 'district'
+LEVELS = (REGION, PROVINCE, DISTRICT)
+
+# Nombre del padre en los campos ``<padre>__name`` / ``<padre>__id``
+PARENT_LEVEL = {REGION: None, PROVINCE: REGION, DISTRICT: PROVINCE}
+CHILD_LEVEL = {REGION: PROVINCE, PROVINCE: DISTRICT, DISTRICT: None}
+
+
+class Level:
+    """
+    Un nivel de la jerarquía como arreglos paralelos (tuplas), ordenados
+    por ``id``. ``parents[i]`` es la posición del padre en el nivel
+    superior (-1 si no está vivo) y ``children[i]`` las posiciones de los
+    hijos en el nivel inferior.
+    """
+    __slots__ = ('name', 'ids', 'names', 'codes', 'created', 'updated', 'parents', 'children', 'positions')
+
+    def __init__(self, name, rows, parent_positions=None, parent_column=None):
+        self.name = name
+        self.ids = tuple(row[0] for row in rows)
+        self.names = tuple(row[1] for row in rows)
+        self.codes = tuple(row[2] for row in rows)
+        self.created = tuple(row[3] for row in rows)
+        self.updated = tuple(row[4] for row in rows)
+        if parent_positions is not None:
+            self.parents = tuple(parent_positions.get(row[parent_column], -1) for row in rows)
+        else:
+            self.parents = (-1,) * len(rows)
+        self.children = ()
+        self.positions = {pk: i for i, pk in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class UbigeoIndex:
+    """Índice inmutable de la jerarquía Región → Provincia → Distrito"""
+
+    def __init__(self, version, region_rows, province_rows, district_rows):
+        self.version = version
+        regions = Level(REGION, region_rows)
+        provinces = Level(PROVINCE, province_rows, regions.positions, 5)
+        districts = Level(DISTRICT, district_rows, provinces.positions, 5)
+        regions.children = _children_table(len(regions), provinces.parents)
+        provinces.children = _children_table(len(provinces), districts.parents)
+        self.levels = {REGION: regions, PROVINCE: provinces, DISTRICT: districts}
+
+        self.by_code = {}
+        for level in (regions, provinces, districts):
+            for i, code in enumerate(level.codes):
+                if code:
+                    self.by_code[code] = (level.name, i)
+        # Los códigos son jerárquicos: un prefijo es un rango contiguo
+        self.sorted_codes = tuple(sorted(self.by_code))
+
+    @classmethod
+    def build(cls, version):
+        from .models import District, Province, Region
+
+        columns = ('id', 'name', 'ubigeo_code', 'created_at', 'updated_at')
+        region_rows = list(
+            Region.objects.order_by('id').values_list(*columns)
+        )
+        province_rows = list(
+            Province.objects.order_by('id').values_list(*columns, 'region_id')
+        )
+        district_rows = list(
+            District.objects.order_by('id').values_list(*columns, 'province_id')
+        )
+        return cls(version, region_rows, province_rows, district_rows)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def position(self, level, pk):
+        """Posición de un registro por ID, o ``None`` si no existe (o está eliminado)"""
+        return self.levels[level].positions.get(pk)
+
+    def children_of(self, level, pk):
+        """Posiciones de los hijos de un registro; vacío si el padre no existe"""
+        i = self.position(level, pk)
+        if i is None:
+            return ()
+        return self.levels[level].children[i]
+
+    def lookup(self, code):
+        """``(nivel, posición)`` de un código de ubigeo exacto"""
+        return self.by_code.get(code)
+
+    def with_prefix(self, prefix):
+        """``(nivel, posición)`` de todos los nodos cuyo código empieza con ``prefix``, ordenados por código"""
+        codes = self.sorted_codes
+        start = bisect_left(codes, prefix)
+        end = bisect_left(codes, prefix_upper_bound(prefix)) if prefix else len(codes)
+        return [self.by_code[code] for code in codes[start:end]]
+
+    def getter(self, level, field):
+        """Función ``posición -> valor`` para un campo del nivel"""
+        data = self.levels[level]
+        columns = {
+            'id': data.ids,
+            'name': data.names,
+            'ubigeo_code': data.codes,
+            'created_at': data.created,
+            'updated_at': data.updated,
+        }
+        if field in columns:
+            return columns[field].__getitem__
+
+        parent_level = PARENT_LEVEL[level]
+        if parent_level and field in (f'{parent_level}__name', f'{parent_level}__id'):
+            parent_data = self.levels[parent_level]
+            values = parent_data.names if field.endswith('__name') else parent_data.ids
+            parents = data.parents
+            return lambda i: values[parents[i]] if parents[i] >= 0 else None
+        raise KeyError(field)
+
+    def row(self, level, i, fields):
+        """Un registro como diccionario con los campos pedidos"""
+        return {field: self.getter(level, field)(i) for field in fields}
+
+    def rows(self, level, fields, positions=None):
+        """Lista de registros del nivel (todos o solo ``positions``)"""
+        if positions is None:
+            positions = range(len(self.levels[level]))
+        getters = [(field, self.getter(level, field)) for field in fields]
+        return [{field: get(i) for field, get in getters} for i in positions]
+
+    def node(self, level, i):
+        """Nodo anidado ``{id, name, code, <hijos>}`` con todo su subárbol"""
+        data = self.levels[level]
+        node = {'id': data.ids[i], 'name': data.names[i], 'code': data.codes[i]}
+        child_level = CHILD_LEVEL[level]
+        if child_level is not None:
+            node[f'{child_level}s'] = [self.node(child_level, child) for child in data.children[i]]
+        return node
+
+    def tree(self):
+        """Árbol completo Región → Provincia → Distrito"""
+        return [self.node(REGION, i) for i in range(len(self.levels[REGION]))]
+
+    def path(self, level, i):
+        """Nombres desde la región hasta el nodo, p. ej. ``['Lima', 'Lima', 'Miraflores']``"""
+        names = []
+        while level is not None and i >= 0:
+            data = self.levels[level]
+            names.append(data.names[i])
+            i = data.parents[i]
+            level = PARENT_LEVEL[level]
+        return names[::-1]
+
+
+def prefix_upper_bound(prefix):
+    """Menor cadena mayor que todas las que empiezan con ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def code_prefix_lookup(prefix, field='ubigeo_code'):
+    """
+    Filtro de prefijo como rango (``>=`` / ``<``), que sí usa el índice
+    único de ``ubigeo_code``; ``startswith`` se traduce a ``LIKE`` y en
+    SQLite no aprovecha el índice.
+    """
+    if not prefix:
+        return {f'{field}__isnull': False}
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix_upper_bound(prefix)}
+
+
+def _children_table(parent_count, child_parents):
+    children = [[] for _ in range(parent_count)]
+    for position, parent in enumerate(child_parents):
+        if parent >= 0:
+            children[parent].append(position)
+    return tuple(tuple(items) for items in children)
+
+
+# ----------------------------------------------------------------------
+# Instancia del proceso
+# ----------------------------------------------------------------------
+
+_index = None
+_lock = threading.Lock()
+
+
+def current_version():
+    """Versión actual de los datos de ubigeo según la caché compartida"""
+    return _version.current()
+
+
+def get_index():
+    """Índice vigente; se construye al primer uso o si cambió la versión"""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = UbigeoIndex.build(version)
+        return _index
+
+
+def invalidate():
+    """Marca el índice como obsoleto en todos los procesos (ver ``VersionCounter.invalidate``)"""
+    _version.invalidate()
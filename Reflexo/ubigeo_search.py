@@ -0,0 +1,106 @@
+"""
+Autocompletado de ubigeo sobre regiones, provincias y distritos a la vez.
+
+Por cada versión del índice de ubigeo se arma una sola vez un índice de
+nombres normalizados (``fold``: sin tildes, en minúsculas) partidos en
+palabras. Las palabras se guardan ordenadas, así que los candidatos para
+un prefijo salen con ``bisect`` y solo esos se verifican y ordenan.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+
+from .normalization import fold
+from .ubigeo_index import LEVELS, get_index, prefix_upper_bound
+
+PATH_SEPARATOR = ' › '
+
+LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+
+# Calidad de la coincidencia, de mejor a peor
+EXACT, NAME_PREFIX, WORD_PREFIX = 0, 1, 2
+
+
+class NameIndex:
+    """Nombres normalizados de todos los niveles, con sus palabras ordenadas"""
+
+    def __init__(self, index):
+        self.version = index.version
+        self.entries = []
+        for level in LEVELS:
+            data = index.levels[level]
+            for i, name in enumerate(data.names):
+                folded = fold(name)
+                self.entries.append((folded, tuple(folded.split()), level, i))
+
+        words = sorted(
+            (word, entry)
+            for entry, (_, tokens, _, _) in enumerate(self.entries)
+            for word in set(tokens)
+        )
+        self.words = tuple(word for word, _ in words)
+        self.word_entries = tuple(entry for _, entry in words)
+
+    def candidates(self, token):
+        """Entradas con alguna palabra que empieza con ``token``"""
+        start = bisect_left(self.words, token)
+        end = bisect_left(self.words, prefix_upper_bound(token))
+        return set(self.word_entries[start:end])
+
+    def search(self, query, limit, levels=None):
+        """Las ``limit`` mejores entradas ``(nivel, posición)`` para la consulta"""
+        folded = fold(query)
+        tokens = folded.split()
+        if not tokens:
+            return []
+
+        # La palabra más larga es la más selectiva
+        candidates = self.candidates(max(tokens, key=len))
+        ranked = []
+        for entry in candidates:
+            name, words, level, i = self.entries[entry]
+            if levels and level not in levels:
+                continue
+            if not all(any(word.startswith(token) for word in words) for token in tokens):
+                continue
+            if name == folded:
+                quality = EXACT
+            elif name.startswith(folded):
+                quality = NAME_PREFIX
+            else:
+                quality = WORD_PREFIX
+            ranked.append((quality, LEVEL_RANK[level], len(name), name, level, i))
+        return [(level, i) for *_, level, i in heapq.nsmallest(limit, ranked)]
+
+
+_names = None
+_lock = threading.Lock()
+
+
+def get_name_index(index=None):
+    """Índice de nombres de la versión vigente del índice de ubigeo"""
+    global _names
+    index = index or get_index()
+    names = _names
+    if names is not None and names.version == index.version:
+        return names
+    with _lock:
+        if _names is None or _names.version != index.version:
+            _names = NameIndex(index)
+        return _names
+
+
+def autocomplete(query, limit=10, levels=None):
+    """Resultados listos para serializar, con la ruta completa de cada nodo"""
+    index = get_index()
+    results = []
+    for level, i in get_name_index(index).search(query, limit, levels):
+        data = index.levels[level]
+        results.append({
+            'level': level,
+            'id': data.ids[i],
+            'name': data.names[i],
+            'code': data.codes[i],
+            'path': PATH_SEPARATOR.join(index.path(level, i)),
+        })
+    return results
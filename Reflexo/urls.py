@@ -41,6 +41,17 @@ from .views import (
     country_update,
     country_delete,
     country_detail,
+
+    # Snapshots versionados
+    snapshot_manifest,
+    snapshot_detail,
+
+    # Jerarquía de ubigeo
+    ubigeo_tree,
+    ubigeo_lookup,
+    ubigeo_autocomplete,
+    ubigeo_bulk_delete,
+    ubigeo_bulk_restore,
 )
 
 app_name = 'reflexo'
@@ -73,6 +84,8 @@ urlpatterns = [
     path('api/v3/regions/<int:region_id>/', region_detail, name='ubigeo_region_detail'),
     path('api/v3/regions/<int:region_id>/update/', region_update, name='ubigeo_region_update'),
     path('api/v3/regions/<int:region_id>/delete/', region_delete, name='ubigeo_region_delete'),
+    path('api/v3/regions/bulk-delete/', ubigeo_bulk_delete, {'level': 'region'}, name='ubigeo_regions_bulk_delete'),
+    path('api/v3/regions/bulk-restore/', ubigeo_bulk_restore, {'level': 'region'}, name='ubigeo_regions_bulk_restore'),
 
     # Provincias
     path('api/v3/provinces/', provinces, name='ubigeo_provinces'),
@@ -81,6 +94,8 @@ urlpatterns = [
     path('api/v3/provinces/<int:province_id>/update/', province_update, name='ubigeo_province_update'),
     path('api/v3/provinces/<int:province_id>/delete/', province_delete, name='ubigeo_province_delete'),
     path('api/v3/regions/<int:region_id>/provinces/', provinces, name='ubigeo_provinces_by_region'),
+    path('api/v3/provinces/bulk-delete/', ubigeo_bulk_delete, {'level': 'province'}, name='ubigeo_provinces_bulk_delete'),
+    path('api/v3/provinces/bulk-restore/', ubigeo_bulk_restore, {'level': 'province'}, name='ubigeo_provinces_bulk_restore'),
 
     # Distritos
     path('api/v3/districts/', districts, name='ubigeo_districts'),
@@ -89,6 +104,8 @@ urlpatterns = [
     path('api/v3/districts/<int:district_id>/update/', district_update, name='ubigeo_district_update'),
     path('api/v3/districts/<int:district_id>/delete/', district_delete, name='ubigeo_district_delete'),
     path('api/v3/provinces/<int:province_id>/districts/', districts, name='ubigeo_districts_by_province'),
+    path('api/v3/districts/bulk-delete/', ubigeo_bulk_delete, {'level': 'district'}, name='ubigeo_districts_bulk_delete'),
+    path('api/v3/districts/bulk-restore/', ubigeo_bulk_restore, {'level': 'district'}, name='ubigeo_districts_bulk_restore'),
 
     # Países
     path('api/v3/countries/', countries, name='ubigeo_countries'),
@@ -97,6 +114,15 @@ urlpatterns = [
     path('api/v3/countries/<int:country_id>/update/', country_update, name='ubigeo_country_update'),
     path('api/v3/countries/<int:country_id>/delete/', country_delete, name='ubigeo_country_delete'),
 
+    # Snapshots versionados de los listados completos
+    path('api/v3/snapshots/', snapshot_manifest, name='ubigeo_snapshots'),
+    path('api/v3/snapshots/<slug:name>/<str:digest>/', snapshot_detail, name='ubigeo_snapshot'),
+
+    # Jerarquía completa (o subárbol por código) para selects en cascada
+    path('api/v3/ubigeo/tree/', ubigeo_tree, name='ubigeo_tree'),
+    path('api/v3/ubigeo/lookup/', ubigeo_lookup, name='ubigeo_lookup'),
+    path('api/v3/ubigeo/autocomplete/', ubigeo_autocomplete, name='ubigeo_autocomplete'),
+
     # Direcciones
     # path('api/v3/addresses/', addresses, name='ubigeo_addresses'), # This line was removed as per the new_code
     # path('api/v3/addresses/create/', address_create, name='ubigeo_address_create'), # This line was removed as per the new_code
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Contadores de versión en la caché compartida.
+
+Los índices en memoria (ubigeo, disponibilidad de horarios) y las cachés
+derivadas se invalidan comparando su versión con un contador guardado en la
+caché ``default``, que debe ser común a todos los procesos (ver
+``Reflexo.apps.check_shared_cache``).
+"""
+
+from time import time_ns
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+class VersionCounter:
+    """Contador de versión guardado en la clave ``key`` de la caché"""
+
+    def __init__(self, key):
+        self.key = key
+
+    def current(self):
+        """Versión actual; si la clave no existe se inicializa"""
+        version = cache.get(self.key)
+        if version is None:
+            version = time_ns()
+            cache.add(self.key, version, timeout=None)
+            version = cache.get(self.key, version)
+        return version
+
+    def bump(self):
+        """Incrementa la versión y retorna el nuevo valor"""
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            # La clave se perdió (expulsión o reinicio de la caché): un valor
+            # nuevo, que no coincida con ninguna versión ya usada
+            version = time_ns()
+            cache.set(self.key, version, timeout=None)
+            return version
+
+    def invalidate(self):
+        """
+        Incrementa de inmediato y otra vez al confirmar la transacción, para
+        que ningún proceso guarde en la nueva versión datos leídos antes del
+        commit.
+        """
+        self.bump()
+        transaction.on_commit(self.bump)
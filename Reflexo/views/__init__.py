@@ -20,6 +20,14 @@ from .views_distrito import (
     districts, district_detail, district_create, district_update, district_delete
 )
 
+# Snapshots versionados
+from .views_snapshot import snapshot_manifest, snapshot_detail
+
+# Jerarquía de ubigeo
+from .views_ubigeo import (
+    ubigeo_tree, ubigeo_lookup, ubigeo_autocomplete, ubigeo_bulk_delete, ubigeo_bulk_restore
+)
+
 # Vistas web
 from .views_web import (
     home_view,
@@ -44,6 +52,10 @@ __all__ = [
     'regions', 'region_detail', 'region_create', 'region_update', 'region_delete',
     # Distritos
     'districts', 'district_detail', 'district_create', 'district_update', 'district_delete',
+    # Snapshots versionados
+    'snapshot_manifest', 'snapshot_detail',
+    # Jerarquía de ubigeo
+    'ubigeo_tree', 'ubigeo_lookup', 'ubigeo_autocomplete', 'ubigeo_bulk_delete', 'ubigeo_bulk_restore',
     # Vistas web
     'home_view', 'debug_view', 'countries_view', 'regions_view', 'provinces_view', 'districts_view',
     # API endpoints
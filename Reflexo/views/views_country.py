@@ -67,7 +67,7 @@ def country_create(request):
             }, status=400)
         
         # Validar que el código de ubigeo sea único
-        if ubigeo_code and Country.objects.filter(ubigeo_code=ubigeo_code).exists():
+        if ubigeo_code and Country.all_objects.filter(ubigeo_code=ubigeo_code).exists():
             return JsonResponse({
                 'success': False,
                 'error': 'El código de ubigeo ya existe'
@@ -113,7 +113,7 @@ def country_update(request, country_id):
             country.name = data['name']
         if 'ubigeo_code' in data:
             # Validar que el código sea único si se proporciona
-            if data['ubigeo_code'] and Country.objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=country_id).exists():
+            if data['ubigeo_code'] and Country.all_objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=country_id).exists():
                 return JsonResponse({
                     'success': False,
                     'error': 'El código de ubigeo ya existe'
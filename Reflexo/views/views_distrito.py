@@ -2,8 +2,15 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from Reflexo.models import District, Province
+from Reflexo import listing, snapshots
+from Reflexo.ubigeo_index import DISTRICT, PROVINCE, get_index
 import json
 
+DISTRICT_FIELDS = ('id', 'name', 'ubigeo_code', 'province__name', 'created_at', 'updated_at')
+DISTRICT_DETAIL_FIELDS = ('id', 'name', 'ubigeo_code', 'province__name', 'province__id', 'created_at', 'updated_at')
+
+snapshots.register('districts', snapshots.envelope(DISTRICT, DISTRICT_FIELDS))
+
 # ============================================================================
 # ENDPOINTS PARA DISTRITOS
 # ============================================================================
@@ -12,20 +19,19 @@ import json
 def districts(request, province_id=None):
     """Listar distritos (opcionalmente filtrados por provincia)"""
     try:
-        if province_id:
-            districts = District.objects.filter(
-                province_id=province_id
-            ).values(
-                'id', 'name', 'ubigeo_code', 'province__name', 'created_at', 'updated_at'
-            )
-        else:
-            districts = District.objects.all().values(
-                'id', 'name', 'ubigeo_code', 'province__name', 'created_at', 'updated_at'
-            )
+        if listing.wants_query(request):
+            queryset = District.objects.filter(province_id=province_id) if province_id else District.objects.all()
+            return listing.list_response(request, queryset, DISTRICT_DETAIL_FIELDS, DISTRICT_FIELDS)
+        
+        if not province_id:
+            return snapshots.snapshot_response(request, 'districts')
+        
+        index = get_index()
+        districts = index.rows(DISTRICT, DISTRICT_FIELDS, index.children_of(PROVINCE, province_id))
         
         return JsonResponse({
             'success': True,
-            'data': list(districts),
+            'data': districts,
             'count': len(districts)
         })
     except Exception as e:
@@ -38,11 +44,10 @@ def districts(request, province_id=None):
 def district_detail(request, district_id):
     """Obtener un distrito específico"""
     try:
-        district = District.objects.filter(id=district_id).values(
-            'id', 'name', 'ubigeo_code', 'province__name', 'province__id', 'created_at', 'updated_at'
-        ).first()
+        index = get_index()
+        position = index.position(DISTRICT, district_id)
         
-        if not district:
+        if position is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Distrito no encontrado'
@@ -50,7 +55,7 @@ def district_detail(request, district_id):
         
         return JsonResponse({
             'success': True,
-            'data': district
+            'data': index.row(DISTRICT, position, DISTRICT_DETAIL_FIELDS)
         })
     except Exception as e:
         return JsonResponse({
@@ -84,7 +89,7 @@ def district_create(request):
             }, status=400)
         
         # Validar que el código de ubigeo sea único
-        if ubigeo_code and District.objects.filter(ubigeo_code=ubigeo_code).exists():
+        if ubigeo_code and District.all_objects.filter(ubigeo_code=ubigeo_code).exists():
             return JsonResponse({
                 'success': False,
                 'error': 'El código de ubigeo ya existe'
@@ -147,7 +152,7 @@ def district_update(request, district_id):
                 }, status=400)
         if 'ubigeo_code' in data:
             # Validar que el código sea único
-            if District.objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=district_id).exists():
+            if District.all_objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=district_id).exists():
                 return JsonResponse({
                     'success': False,
                     'error': 'El código de ubigeo ya existe'
@@ -2,8 +2,16 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from Reflexo.models import Province, Region
+from Reflexo import listing, snapshots
+from Reflexo.services.hierarchy_service import HasChildrenError, UbigeoHierarchyService
+from Reflexo.ubigeo_index import PROVINCE, REGION, get_index
 import json
 
+PROVINCE_FIELDS = ('id', 'name', 'ubigeo_code', 'region__name', 'created_at', 'updated_at')
+PROVINCE_DETAIL_FIELDS = ('id', 'name', 'ubigeo_code', 'region__name', 'region__id', 'created_at', 'updated_at')
+
+snapshots.register('provinces', snapshots.envelope(PROVINCE, PROVINCE_FIELDS))
+
 # ============================================================================
 # ENDPOINTS PARA PROVINCIAS
 # ============================================================================
@@ -12,20 +20,19 @@ import json
 def provinces(request, region_id=None):
     """Listar provincias (opcionalmente filtradas por región)"""
     try:
-        if region_id:
-            provinces = Province.objects.filter(
-                region_id=region_id
-            ).values(
-                'id', 'name', 'ubigeo_code', 'region__name', 'created_at', 'updated_at'
-            )
-        else:
-            provinces = Province.objects.all().values(
-                'id', 'name', 'ubigeo_code', 'region__name', 'created_at', 'updated_at'
-            )
+        if listing.wants_query(request):
+            queryset = Province.objects.filter(region_id=region_id) if region_id else Province.objects.all()
+            return listing.list_response(request, queryset, PROVINCE_DETAIL_FIELDS, PROVINCE_FIELDS)
+        
+        if not region_id:
+            return snapshots.snapshot_response(request, 'provinces')
+        
+        index = get_index()
+        provinces = index.rows(PROVINCE, PROVINCE_FIELDS, index.children_of(REGION, region_id))
         
         return JsonResponse({
             'success': True,
-            'data': list(provinces),
+            'data': provinces,
             'count': len(provinces)
         })
     except Exception as e:
@@ -38,11 +45,10 @@ def provinces(request, region_id=None):
 def province_detail(request, province_id):
     """Obtener una provincia específica"""
     try:
-        province = Province.objects.filter(id=province_id).values(
-            'id', 'name', 'ubigeo_code', 'region__name', 'region__id', 'created_at', 'updated_at'
-        ).first()
+        index = get_index()
+        position = index.position(PROVINCE, province_id)
         
-        if not province:
+        if position is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Provincia no encontrada'
@@ -50,7 +56,7 @@ def province_detail(request, province_id):
         
         return JsonResponse({
             'success': True,
-            'data': province
+            'data': index.row(PROVINCE, position, PROVINCE_DETAIL_FIELDS)
         })
     except Exception as e:
         return JsonResponse({
@@ -76,7 +82,7 @@ def province_create(request):
         
         # Verificar que la región existe
         try:
-            region = Region.objects.get(id=region_id, deleted_at__isnull=True)
+            region = Region.objects.get(id=region_id)
         except Region.DoesNotExist:
             return JsonResponse({
                 'success': False,
@@ -84,7 +90,7 @@ def province_create(request):
             }, status=400)
         
         # Validar que el código de ubigeo sea único
-        if ubigeo_code and Province.objects.filter(ubigeo_code=ubigeo_code).exists():
+        if ubigeo_code and Province.all_objects.filter(ubigeo_code=ubigeo_code).exists():
             return JsonResponse({
                 'success': False,
                 'error': 'El código de ubigeo ya existe'
@@ -138,7 +144,7 @@ def province_update(request, province_id):
             province.name = data['name']
         if 'region_id' in data:
             try:
-                region = Region.objects.get(id=data['region_id'], deleted_at__isnull=True)
+                region = Region.objects.get(id=data['region_id'])
                 province.region = region
             except Region.DoesNotExist:
                 return JsonResponse({
@@ -147,7 +153,7 @@ def province_update(request, province_id):
                 }, status=400)
         if 'ubigeo_code' in data:
             # Validar que el código sea único
-            if Province.objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=province_id).exists():
+            if Province.all_objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=province_id).exists():
                 return JsonResponse({
                     'success': False,
                     'error': 'El código de ubigeo ya existe'
@@ -182,8 +188,9 @@ def province_update(request, province_id):
 @csrf_exempt
 @require_http_methods(["DELETE"])
 def province_delete(request, province_id):
-    """Eliminar una provincia"""
+    """Eliminar una provincia; con ``?cascade=true`` también sus distritos"""
     try:
+        cascade = request.GET.get('cascade', '').lower() in ('1', 'true')
         province = Province.objects.filter(id=province_id).first()
         
         if not province:
@@ -192,18 +199,19 @@ def province_delete(request, province_id):
                 'error': 'Provincia no encontrada'
             }, status=404)
         
-        # Verificar que no tenga distritos asociados
-        if province.districts.exists():
+        # Sin cascada, el servicio rechaza el borrado si tiene hijos vivos
+        try:
+            counts = UbigeoHierarchyService.soft_delete('province', [province.id], cascade=cascade)
+        except HasChildrenError:
             return JsonResponse({
                 'success': False,
                 'error': 'No se puede eliminar una provincia que tiene distritos asociados'
             }, status=400)
         
-        province.delete()
-        
         return JsonResponse({
             'success': True,
-            'message': 'Provincia eliminada exitosamente'
+            'message': 'Provincia eliminada exitosamente',
+            'data': counts
         })
     except Exception as e:
         return JsonResponse({
@@ -2,8 +2,15 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from Reflexo.models import Region
+from Reflexo import listing, snapshots
+from Reflexo.services.hierarchy_service import HasChildrenError, UbigeoHierarchyService
+from Reflexo.ubigeo_index import REGION, get_index
 import json
 
+REGION_FIELDS = ('id', 'name', 'ubigeo_code', 'created_at', 'updated_at')
+
+snapshots.register('regions', snapshots.envelope(REGION, REGION_FIELDS))
+
 # ============================================================================
 # ENDPOINTS PARA REGIONES
 # ============================================================================
@@ -12,14 +19,10 @@ import json
 def regions(request):
     """Listar todas las regiones"""
     try:
-        regions = Region.objects.filter(deleted_at__isnull=True).values(
-            'id', 'name', 'ubigeo_code', 'created_at', 'updated_at'
-        )
-        return JsonResponse({
-            'success': True,
-            'data': list(regions),
-            'count': len(regions)
-        })
+        if listing.wants_query(request):
+            return listing.list_response(request, Region.objects.all(), REGION_FIELDS, REGION_FIELDS)
+        
+        return snapshots.snapshot_response(request, 'regions')
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -30,11 +33,10 @@ def regions(request):
 def region_detail(request, region_id):
     """Obtener una región específica"""
     try:
-        region = Region.objects.filter(id=region_id, deleted_at__isnull=True).values(
-            'id', 'name', 'ubigeo_code', 'created_at', 'updated_at'
-        ).first()
+        index = get_index()
+        position = index.position(REGION, region_id)
         
-        if not region:
+        if position is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Región no encontrada'
@@ -42,7 +44,7 @@ def region_detail(request, region_id):
         
         return JsonResponse({
             'success': True,
-            'data': region
+            'data': index.row(REGION, position, REGION_FIELDS)
         })
     except Exception as e:
         return JsonResponse({
@@ -66,7 +68,7 @@ def region_create(request):
             }, status=400)
         
         # Validar que el código de ubigeo sea único
-        if ubigeo_code and Region.objects.filter(ubigeo_code=ubigeo_code).exists():
+        if ubigeo_code and Region.all_objects.filter(ubigeo_code=ubigeo_code).exists():
             return JsonResponse({
                 'success': False,
                 'error': 'El código de ubigeo ya existe'
@@ -105,7 +107,7 @@ def region_update(request, region_id):
     """Actualizar una región"""
     try:
         data = json.loads(request.body)
-        region = Region.objects.filter(id=region_id, deleted_at__isnull=True).first()
+        region = Region.objects.filter(id=region_id).first()
         
         if not region:
             return JsonResponse({
@@ -118,7 +120,7 @@ def region_update(request, region_id):
             region.name = data['name']
         if 'ubigeo_code' in data:
             # Validar que el código sea único
-            if Region.objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=region_id).exists():
+            if Region.all_objects.filter(ubigeo_code=data['ubigeo_code']).exclude(id=region_id).exists():
                 return JsonResponse({
                     'success': False,
                     'error': 'El código de ubigeo ya existe'
@@ -152,9 +154,10 @@ def region_update(request, region_id):
 @csrf_exempt
 @require_http_methods(["DELETE"])
 def region_delete(request, region_id):
-    """Eliminar una región (soft delete)"""
+    """Eliminar una región (soft delete); con ``?cascade=true`` también sus provincias y distritos"""
     try:
-        region = Region.objects.filter(id=region_id, deleted_at__isnull=True).first()
+        cascade = request.GET.get('cascade', '').lower() in ('1', 'true')
+        region = Region.objects.filter(id=region_id).first()
         
         if not region:
             return JsonResponse({
@@ -162,18 +165,19 @@ def region_delete(request, region_id):
                 'error': 'Región no encontrada'
             }, status=404)
         
-        # Verificar que no tenga provincias asociadas
-        if region.provinces.exists():
+        # Sin cascada, el servicio rechaza el borrado si tiene hijos vivos
+        try:
+            counts = UbigeoHierarchyService.soft_delete('region', [region.id], cascade=cascade)
+        except HasChildrenError:
             return JsonResponse({
                 'success': False,
                 'error': 'No se puede eliminar una región que tiene provincias asociadas'
             }, status=400)
         
-        region.delete()  # Soft delete
-        
         return JsonResponse({
             'success': True,
-            'message': 'Región eliminada exitosamente'
+            'message': 'Región eliminada exitosamente',
+            'data': counts
         })
     except Exception as e:
         return JsonResponse({
@@ -0,0 +1,54 @@
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+from Reflexo import snapshots
+
+# ============================================================================
+# SNAPSHOTS VERSIONADOS DE LOS LISTADOS DE UBIGEO
+# ============================================================================
+
+@require_http_methods(["GET"])
+def snapshot_manifest(request):
+    """Listados disponibles con su ETag y su URL versionada (cacheable para siempre)"""
+    try:
+        data = {}
+        for name in snapshots.registered():
+            snapshot = snapshots.get_snapshot(name)
+            data[name] = {
+                'version': snapshot.version,
+                'etag': snapshot.digest,
+                'url': reverse('reflexo:ubigeo_snapshot', args=[name, snapshot.digest]),
+            }
+        response = JsonResponse({
+            'success': True,
+            'data': data
+        })
+        response['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+@require_http_methods(["GET"])
+def snapshot_detail(request, name, digest):
+    """Contenido inmutable de un listado; un hash antiguo redirige al vigente"""
+    try:
+        if name not in snapshots.registered():
+            return JsonResponse({
+                'success': False,
+                'error': 'Listado no encontrado'
+            }, status=404)
+        
+        snapshot = snapshots.get_snapshot(name)
+        if digest != snapshot.digest:
+            return redirect('reflexo:ubigeo_snapshot', name=name, digest=snapshot.digest)
+        
+        return snapshots.snapshot_response(request, name, immutable=True)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
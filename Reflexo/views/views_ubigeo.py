@@ -0,0 +1,283 @@
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from Reflexo import snapshots
+from Reflexo.services.hierarchy_service import LEVEL_MODELS, HasChildrenError, UbigeoHierarchyService
+from Reflexo.ubigeo_index import LEVELS, PARENT_LEVEL, get_index
+from Reflexo.ubigeo_search import autocomplete
+import json
+
+MAX_LOOKUP_CODES = 500
+DEFAULT_LOOKUP_LIMIT = 100
+MAX_LOOKUP_LIMIT = 2000
+DEFAULT_AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+MAX_BULK_IDS = 1000
+
+snapshots.register('tree', lambda index: {'success': True, 'data': index.tree()})
+
+
+def _subtree(code):
+    def build(index):
+        node = index.lookup(code)
+        return {'success': True, 'data': index.node(*node) if node else None}
+    return build
+
+# ============================================================================
+# JERARQUÍA COMPLETA DE UBIGEO
+# ============================================================================
+
+@require_http_methods(["GET"])
+def ubigeo_tree(request):
+    """
+    Árbol Región → Provincia → Distrito en una sola respuesta.
+    Con ``?code=`` retorna solo el subárbol de ese código de ubigeo. El
+    árbol completo también se publica en ``api/v3/snapshots/`` con URL
+    versionada.
+    """
+    try:
+        code = request.GET.get('code', '').strip()
+        if not code:
+            return snapshots.snapshot_response(request, 'tree')
+        
+        if get_index().lookup(code) is None:
+            return JsonResponse({
+                'success': False,
+                'error': 'Código de ubigeo no encontrado'
+            }, status=404)
+        
+        return snapshots.snapshot_response(request, f'tree:{code}', builder=_subtree(code))
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+# ============================================================================
+# BÚSQUEDA DE CÓDIGOS DE UBIGEO (COMPLETOS O PREFIJOS)
+# ============================================================================
+
+def _lookup_node(index, level, position):
+    data = index.levels[level]
+    parent = data.parents[position]
+    parent_level = PARENT_LEVEL[level]
+    return {
+        'level': level,
+        'id': data.ids[position],
+        'name': data.names[position],
+        'code': data.codes[position],
+        'parent_id': index.levels[parent_level].ids[parent] if parent_level and parent >= 0 else None,
+        'path': index.path(level, position),
+    }
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def ubigeo_lookup(request):
+    """
+    Resuelve varios códigos de ubigeo en una sola llamada.
+    GET ``?codes=15,1501,150101`` o POST ``{"codes": [...]}``. Cada código
+    se trata como prefijo: un código completo retorna su nodo primero y
+    luego sus descendientes (``?limit=`` por código).
+    """
+    try:
+        if request.method == 'POST':
+            data = json.loads(request.body)
+            codes = data.get('codes') if isinstance(data, dict) else None
+        else:
+            codes = [code for code in request.GET.get('codes', '').split(',') if code.strip()]
+        
+        if not isinstance(codes, list) or not codes or not all(isinstance(code, str) for code in codes):
+            return JsonResponse({
+                'success': False,
+                'error': 'Se requiere una lista de códigos (texto) en "codes"'
+            }, status=400)
+        
+        if len(codes) > MAX_LOOKUP_CODES:
+            return JsonResponse({
+                'success': False,
+                'error': f'Máximo {MAX_LOOKUP_CODES} códigos por consulta'
+            }, status=400)
+        
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_LOOKUP_LIMIT))
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'El parámetro limit debe ser un número'
+            }, status=400)
+        limit = max(1, min(limit, MAX_LOOKUP_LIMIT))
+        
+        index = get_index()
+        results = []
+        for code in codes:
+            code = code.strip()
+            matches = index.with_prefix(code) if code else []
+            results.append({
+                'query': code,
+                'exact': code in index.by_code,
+                'total': len(matches),
+                'results': [_lookup_node(index, level, i) for level, i in matches[:limit]],
+            })
+        
+        return JsonResponse({
+            'success': True,
+            'data': results,
+            'count': len(results)
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'JSON inválido'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+# ============================================================================
+# AUTOCOMPLETADO DE UBIGEO
+# ============================================================================
+
+@require_http_methods(["GET"])
+def ubigeo_autocomplete(request):
+    """
+    Autocompletado de regiones, provincias y distritos sin distinguir
+    tildes ni mayúsculas. ``?q=`` texto, ``?limit=`` (máx. 50) y
+    ``?level=region,province,district`` para restringir niveles.
+    """
+    try:
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'El parámetro limit debe ser un número'
+            }, status=400)
+        limit = max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+        
+        levels = None
+        if request.GET.get('level'):
+            levels = {level.strip() for level in request.GET['level'].split(',') if level.strip()}
+            invalid = levels - set(LEVELS)
+            if invalid:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Nivel inválido: {", ".join(sorted(invalid))}'
+                }, status=400)
+        
+        results = autocomplete(request.GET.get('q', ''), limit, levels)
+        return JsonResponse({
+            'success': True,
+            'data': results,
+            'count': len(results)
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+# ============================================================================
+# ELIMINACIÓN Y RESTAURACIÓN EN LOTE
+# ============================================================================
+
+def _bulk_ids(request):
+    """Lee ``{"ids": [...], "cascade": bool}``; retorna (ids, cascade, respuesta de error)"""
+    data = json.loads(request.body)
+    if not isinstance(data, dict):
+        return None, None, JsonResponse({
+            'success': False,
+            'error': 'El cuerpo debe ser un objeto JSON'
+        }, status=400)
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        return None, None, JsonResponse({
+            'success': False,
+            'error': 'Se requiere una lista de IDs enteros en "ids"'
+        }, status=400)
+    if len(ids) > MAX_BULK_IDS:
+        return None, None, JsonResponse({
+            'success': False,
+            'error': f'Máximo {MAX_BULK_IDS} IDs por consulta'
+        }, status=400)
+    return sorted(set(ids)), bool(data.get('cascade', False)), None
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def ubigeo_bulk_delete(request, level):
+    """
+    Soft delete de varios registros de un nivel: ``{"ids": [...], "cascade": true}``.
+    Sin ``cascade`` se rechazan los que todavía tienen hijos vivos.
+    """
+    try:
+        ids, cascade, error = _bulk_ids(request)
+        if error:
+            return error
+        
+        model, _ = LEVEL_MODELS[level]
+        found = set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+        try:
+            counts = UbigeoHierarchyService.soft_delete(level, ids, cascade=cascade)
+        except HasChildrenError as e:
+            return JsonResponse({
+                'success': False,
+                'error': 'Hay registros con hijos asociados; use "cascade": true',
+                'ids': e.ids
+            }, status=400)
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'updated': counts,
+                'not_found': [pk for pk in ids if pk not in found]
+            }
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'JSON inválido'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def ubigeo_bulk_restore(request, level):
+    """
+    Restaura varios registros eliminados de un nivel: ``{"ids": [...], "cascade": true}``.
+    Con ``cascade`` también vuelven los hijos eliminados junto con ellos.
+    """
+    try:
+        ids, cascade, error = _bulk_ids(request)
+        if error:
+            return error
+        
+        model, _ = LEVEL_MODELS[level]
+        found = set(model.all_objects.dead().filter(id__in=ids).values_list('id', flat=True))
+        counts = UbigeoHierarchyService.restore(level, ids, cascade=cascade)
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'updated': counts,
+                'not_found': [pk for pk in ids if pk not in found]
+            }
+        })
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'JSON inválido'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
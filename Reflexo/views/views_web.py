@@ -1,6 +1,12 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 from Reflexo.models import Country, Region, Province, District
+from Reflexo import snapshots
+from Reflexo.ubigeo_index import DISTRICT, PROVINCE, REGION
+
+snapshots.register('v2-regions', snapshots.plain(REGION, ('id', 'name', 'ubigeo_code')))
+snapshots.register('v2-provinces', snapshots.plain(PROVINCE, ('id', 'name', 'ubigeo_code', 'region__name')))
+snapshots.register('v2-districts', snapshots.plain(DISTRICT, ('id', 'name', 'ubigeo_code', 'province__name')))
 
 def home_view(request):
     """Vista para la página principal"""
@@ -29,13 +35,13 @@ def countries_view(request):
 
 def regions_view(request):
     """Vista para mostrar regiones"""
-    regions = Region.objects.filter(deleted_at__isnull=True)
+    regions = Region.objects.all()
     return render(request, 'regions.html', {'regions': regions})
 
 def provinces_view(request):
     """Vista para mostrar provincias"""
     provinces = Province.objects.all()
-    regions = Region.objects.filter(deleted_at__isnull=True)
+    regions = Region.objects.all()
     return render(request, 'provinces.html', {
         'provinces': provinces,
         'regions': regions
@@ -62,23 +68,20 @@ def api_countries(request):
 def api_regions(request):
     """API endpoint para regiones"""
     try:
-        regions = Region.objects.filter(deleted_at__isnull=True).values('id', 'name', 'ubigeo_code')
-        return JsonResponse(list(regions), safe=False)
+        return snapshots.snapshot_response(request, 'v2-regions')
     except Exception as e:
         return JsonResponse([], safe=False)
 
 def api_provinces(request):
     """API endpoint para provincias"""
     try:
-        provinces = Province.objects.values('id', 'name', 'ubigeo_code', 'region__name')
-        return JsonResponse(list(provinces), safe=False)
+        return snapshots.snapshot_response(request, 'v2-provinces')
     except Exception as e:
         return JsonResponse([], safe=False)
 
 def api_districts(request):
     """API endpoint para distritos"""
     try:
-        districts = District.objects.values('id', 'name', 'ubigeo_code', 'province__name')
-        return JsonResponse(list(districts), safe=False)
+        return snapshots.snapshot_response(request, 'v2-districts')
     except Exception as e:
         return JsonResponse([], safe=False)
\ No newline at end of file
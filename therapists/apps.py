@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TherapistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'therapists'
+
+    def ready(self):
+        """Registra las señales de la aplicación"""
+        import therapists.signals  # noqa
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de disponibilidad de horarios en memoria, compartido por el proceso.
+
+Para cada día de la semana se arma un árbol de segmentos sobre los
+intervalos disponibles (``is_available=True``) ordenados por inicio, con
+cada nodo ordenado por fin (ver ``MergeSortTree``). "Quién cubre
+``[start, end)`` el día D" cuesta O(log² n + k), en vez de una consulta por
+terapeuta. Las ventanas libres de un terapeuta salen de un diccionario
+``therapist_id -> día -> intervalos``.
+
+Una caché de Django guarda un contador de versión. Las señales de
+``Schedule`` lo incrementan y, al confirmar la transacción, publican una
+copia del índice local con el cambio sin releer la tabla: el día afectado
+suma el cambio a sus pendientes y comparte el árbol (ver ``DayIntervals``),
+y el resto del índice se comparte tal cual. El índice publicado no se
+modifica nunca, así que los lectores no necesitan el lock. Si el contador
+avanzó por escrituras de otro proceso, el índice se reconstruye con una
+sola consulta en el siguiente uso.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import time
+from math import isqrt
+
+from django.db import transaction
+from django.utils.dateparse import parse_time
+from Reflexo.versions import VersionCounter
+
+from .models import Schedule
+from .models.schedule import parse_weekday
+
+VERSION_KEY = 'therapists:schedule-version'
+
+_version = VersionCounter(VERSION_KEY)
+
+DAYS = tuple(day for day, _ in Schedule.DAYS_OF_WEEK)
+
+# Columnas leídas para construir el índice
+COLUMNS = ('id', 'therapist_id', 'day_of_week', 'start_time', 'end_time', 'is_available')
+
+_INF = float('inf')
+
+
+class MergeSortTree:
+    """
+    Intervalos ``(start, end, therapist_id, schedule_id)`` ordenados por
+    inicio (``by_start``) y, sobre esas posiciones, un árbol de segmentos en
+    el que cada nodo tiene sus intervalos ordenados por fin. Inmutable.
+
+    Los que cubren ``[start, end)`` son, dentro del prefijo de ``by_start``
+    que empieza a más tardar en ``start``, los que terminan no antes de
+    ``end``. El prefijo se parte en O(log n) nodos y en cada nodo esos
+    intervalos son un sufijo que se ubica con ``bisect``: O(log² n + k) para
+    k resultados, sin recorrer los que no cubren.
+    """
+    __slots__ = ('by_start', 'size', 'nodes', 'ends')
+
+    def __init__(self, items=()):
+        self.by_start = tuple(sorted(items))
+        size = 1
+        while size < len(self.by_start):
+            size *= 2
+        nodes = [()] * (2 * size)
+        for position, item in enumerate(self.by_start):
+            nodes[size + position] = (item,)
+        for node in range(size - 1, 0, -1):
+            nodes[node] = tuple(sorted(nodes[2 * node] + nodes[2 * node + 1], key=_end))
+        self.size = size
+        self.nodes = nodes
+        self.ends = [tuple(item[1] for item in items) for items in nodes]
+
+    def covering(self, start, end):
+        """Intervalos con ``inicio <= start`` y ``fin >= end``, sin orden"""
+        started = bisect_right(self.by_start, (start, time.max, _INF, _INF))
+        matches = []
+        left, right = self.size, self.size + started
+        while left < right:
+            if left & 1:
+                self._collect(left, end, matches)
+                left += 1
+            if right & 1:
+                right -= 1
+                self._collect(right, end, matches)
+            left //= 2
+            right //= 2
+        return matches
+
+    def _collect(self, node, end, matches):
+        matches.extend(self.nodes[node][bisect_left(self.ends[node], end):])
+
+
+class DayIntervals:
+    """
+    Intervalos disponibles de un día, inmutable: un ``MergeSortTree`` más
+    los cambios posteriores a su construcción (``added`` y ``removed``).
+    Agregar o quitar un intervalo copia solo esos cambios pendientes; el
+    árbol se comparte y se rearma recién cuando los pendientes superan
+    ``max(MIN_PENDING, √n)``. Así una escritura cuesta O(√n log n)
+    amortizado en vez de rearmar el árbol, y ``covering`` suma a lo sumo
+    O(√n) por recorrer los pendientes.
+    """
+    __slots__ = ('tree', 'added', 'removed')
+
+    MIN_PENDING = 16
+
+    def __init__(self, items=()):
+        self.tree = MergeSortTree(items)
+        self.added = ()
+        self.removed = frozenset()
+
+    def with_item(self, schedule_id, therapist_id, start, end):
+        """Copia con el intervalo agregado"""
+        item = (start, end, therapist_id, schedule_id)
+        if item in self.removed:
+            return self._pending(self.added, self.removed - {item})
+        return self._pending(self.added + (item,), self.removed)
+
+    def without_item(self, schedule_id, therapist_id, start, end):
+        """Copia sin el intervalo"""
+        item = (start, end, therapist_id, schedule_id)
+        if item in self.added:
+            return self._pending(tuple(value for value in self.added if value != item), self.removed)
+        return self._pending(self.added, self.removed | {item})
+
+    def _pending(self, added, removed):
+        if len(added) + len(removed) > max(self.MIN_PENDING, isqrt(len(self.tree.by_start))):
+            return DayIntervals([item for item in self.tree.by_start if item not in removed] + list(added))
+        day = DayIntervals.__new__(DayIntervals)
+        day.tree, day.added, day.removed = self.tree, added, removed
+        return day
+
+    def covering(self, start, end):
+        """
+        Intervalos con ``inicio <= start`` y ``fin >= end`` como
+        ``(therapist_id, schedule_id, inicio, fin)``, ordenados por terapeuta
+        """
+        matches = [
+            (therapist_id, schedule_id, s, e)
+            for s, e, therapist_id, schedule_id in self.tree.covering(start, end)
+            if (s, e, therapist_id, schedule_id) not in self.removed
+        ]
+        matches.extend(
+            (therapist_id, schedule_id, s, e)
+            for s, e, therapist_id, schedule_id in self.added
+            if s <= start and e >= end
+        )
+        matches.sort()
+        return matches
+
+
+def _end(item):
+    return item[1]
+
+
+class AvailabilityIndex:
+    """
+    Intervalos por día y por terapeuta. No se modifica una vez publicado:
+    cada escritura arma una copia con ``replaced`` y se reemplaza ``_index``.
+    """
+
+    def __init__(self, version, rows=()):
+        self.version = version
+        self.schedules = {}
+        self.by_therapist = {}
+        items = {day: [] for day in DAYS}
+        for schedule_id, therapist_id, day, start, end, is_available in rows:
+            self.schedules[schedule_id] = (therapist_id, day, start, end, is_available)
+            self.by_therapist.setdefault(therapist_id, {}).setdefault(day, []).append(
+                (schedule_id, start, end, is_available)
+            )
+            if is_available and start < end and day in items:
+                items[day].append((start, end, therapist_id, schedule_id))
+        self.days = {day: DayIntervals(day_items) for day, day_items in items.items()}
+
+    @classmethod
+    def build(cls, version):
+        """Construye el índice con una sola consulta"""
+        return cls(version, Schedule.objects.values_list(*COLUMNS))
+
+    def replaced(self, version, schedule_id, entry=None):
+        """
+        Copia del índice con el horario ``schedule_id`` reemplazado por
+        ``entry = (therapist_id, día, inicio, fin, is_available)``, o quitado
+        si ``entry`` es ``None``. Comparte con el original todo lo que no
+        cambia (los árboles de los otros días y los demás terapeutas); el
+        original no se modifica, así que los lectores nunca ven un estado
+        intermedio.
+        """
+        index = AvailabilityIndex.__new__(AvailabilityIndex)
+        index.version = version
+        index.schedules = dict(self.schedules)
+        index.by_therapist = dict(self.by_therapist)
+        index.days = dict(self.days)
+        previous = index.schedules.pop(schedule_id, None)
+        if previous is not None:
+            index._remove(schedule_id, *previous)
+        if entry is not None:
+            index._add(schedule_id, *entry)
+        return index
+
+    def _add(self, schedule_id, therapist_id, day, start, end, is_available):
+        self.schedules[schedule_id] = (therapist_id, day, start, end, is_available)
+        therapist_days = dict(self.by_therapist.get(therapist_id, {}))
+        therapist_days[day] = [*therapist_days.get(day, ()), (schedule_id, start, end, is_available)]
+        self.by_therapist[therapist_id] = therapist_days
+        if is_available and start < end and day in self.days:
+            self.days[day] = self.days[day].with_item(schedule_id, therapist_id, start, end)
+
+    def _remove(self, schedule_id, therapist_id, day, start, end, is_available):
+        therapist_days = dict(self.by_therapist[therapist_id])
+        remaining = [item for item in therapist_days[day] if item[0] != schedule_id]
+        if remaining:
+            therapist_days[day] = remaining
+        else:
+            del therapist_days[day]
+        if therapist_days:
+            self.by_therapist[therapist_id] = therapist_days
+        else:
+            del self.by_therapist[therapist_id]
+        if is_available and start < end and day in self.days:
+            self.days[day] = self.days[day].without_item(schedule_id, therapist_id, start, end)
+
+    def covering(self, day, start, end):
+        """Horarios disponibles que cubren por completo ``[start, end)`` el día ``day``"""
+        return self.days[day].covering(start, end)
+
+    def free_windows(self, therapist_id, day=None):
+        """
+        Ventanas libres del terapeuta por día, en orden de la semana: la
+        unión de sus intervalos disponibles menos los no disponibles
+        """
+        days = self.by_therapist.get(therapist_id, {})
+        selected = (day,) if day else DAYS
+        windows = {}
+        for name in selected:
+            items = days.get(name)
+            if not items:
+                continue
+            free = free_intervals((start, end, is_available) for _, start, end, is_available in items)
+            if free:
+                windows[name] = free
+        return windows
+
+
+def free_intervals(items):
+    """
+    Ventanas libres a partir de ``(inicio, fin, is_available)``: la unión de
+    los intervalos disponibles menos la de los no disponibles
+    """
+    items = list(items)
+    available = _merge((start, end) for start, end, is_available in items if is_available)
+    blocked = _merge((start, end) for start, end, is_available in items if not is_available)
+    return _subtract(available, blocked)
+
+
+def _merge(intervals):
+    """Une intervalos solapados o contiguos"""
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(intervals, blocked):
+    """Resta ``blocked`` de ``intervals`` (ambos unidos y ordenados)"""
+    result = []
+    for start, end in intervals:
+        for block_start, block_end in blocked:
+            if block_end <= start or block_start >= end:
+                continue
+            if block_start > start:
+                result.append((start, block_start))
+            start = max(start, block_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def current_version():
+    """Versión actual de los horarios según la caché compartida"""
+    return _version.current()
+
+
+def get_index():
+    """Índice vigente; se construye al primer uso o si cambió la versión"""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = AvailabilityIndex.build(version)
+        return _index
+
+
+def schedule_saved(schedule):
+    """Registra el alta o modificación de un horario"""
+    row = [getattr(schedule, column) for column in COLUMNS]
+    # El modelo acepta día y horas como texto al crear; en la base quedan como número y time
+    row[2] = parse_weekday(row[2])
+    row[3:5] = [parse_time(value) if isinstance(value, str) else value for value in row[3:5]]
+    _changed(lambda index, version: index.replaced(version, row[0], tuple(row[1:])))
+
+
+def schedule_deleted(schedule_id):
+    """Registra la eliminación de un horario"""
+    _changed(lambda index, version: index.replaced(version, schedule_id))
+
+
+def invalidate():
+    """Marca el índice como obsoleto (p. ej. tras escrituras masivas)"""
+    _version.invalidate()
+
+
+def _changed(apply):
+    """
+    Incrementa la versión de inmediato, para que nadie use datos viejos, y
+    al confirmar la transacción la incrementa otra vez y publica una copia
+    del índice local con el cambio aplicado. Si entre ambos incrementos
+    escribió otro proceso (o hubo varias escrituras en la misma
+    transacción), los números no son consecutivos y el índice se reconstruye
+    al próximo uso.
+    """
+    first = _version.bump()
+
+    def on_commit():
+        global _index
+        second = _version.bump()
+        with _lock:
+            index = _index
+            if index is not None and second == first + 1 and index.version in (first - 1, first):
+                _index = apply(index, second)
+
+    transaction.on_commit(on_commit)
+
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Versión de los datos de terapeutas para invalidar cachés derivadas.
+
+Cada escritura sobre ``Therapist`` incrementa un contador en la caché de
+Django; las claves que dependen de los datos incluyen esa versión, así que
+quedan obsoletas sin tener que borrarlas una por una.
+"""
+
+import hashlib
+import json
+
+from Reflexo.versions import VersionCounter
+
+DATA_VERSION_KEY = 'therapists:data-version'
+
+_version = VersionCounter(DATA_VERSION_KEY)
+
+
+def data_version():
+    """Versión actual de los datos de terapeutas"""
+    return _version.current()
+
+
+def bump_data_version():
+    """Invalida las cachés derivadas (ver ``VersionCounter.invalidate``)"""
+    _version.invalidate()
+
+
+def versioned_key(prefix, params):
+    """Clave de caché para ``params`` (dict) en la versión actual de los datos"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'{prefix}:v{data_version()}:{digest}'
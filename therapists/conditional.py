@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Validadores para GET condicional (ETag / Last-Modified).
+
+Los listados se validan con las filas de la página que se va a responder
+(las mismas que trae la paginación por cursor, con sus relaciones
+precargadas), sin agregados sobre todo el filtro: el costo sigue siendo el
+de una página. Un listado sin cambios se responde con 304 sin serializar
+ninguna fila. Si la respuesta incluye relaciones anidadas (``?expand=``),
+sus cambios también forman parte del validador.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def page_validators(request, rows, related=(), extra=()):
+    """
+    ETag de un listado a partir de sus filas. Cambia si una fila se edita,
+    entra o sale de la página (``pk@updated_at`` de cada una, en orden).
+    Sin Last-Modified: la fecha más reciente no cambia cuando una fila deja
+    de cumplir el filtro, y un ``If-Modified-Since`` respondería 304 con un
+    listado que ya no es el actual. ``extra``: otras partes de la respuesta
+    (p. ej. el enlace a la página siguiente).
+    """
+    parts = [request.get_full_path(), *extra]
+    for row in rows:
+        parts.extend(_row_parts(row, related))
+    return _etag(*parts)
+
+
+def instance_validators(request, instance, related=()):
+    """ETag y Last-Modified de un registro (con sus relaciones ya precargadas)"""
+    last_modified = instance.updated_at
+    for name in related:
+        last_modified = _latest(last_modified, *(row.updated_at for row in getattr(instance, name).all()))
+    return _etag(request.get_full_path(), *_row_parts(instance, related)), last_modified
+
+
+def _row_parts(instance, related):
+    yield f'{instance.pk}@{instance.updated_at.isoformat()}'
+    for name in related:
+        yield name
+        yield from (f'{row.pk}@{row.updated_at.isoformat()}' for row in getattr(instance, name).all())
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def not_modified_response(request, etag, last_modified):
+    """Retorna un 304 si el cliente ya tiene la versión actual, si no ``None``"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Siempre revalidar: el contenido cambia con cualquier escritura
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación masiva de terapeutas en CSV y NDJSON.
+
+Las filas se leen con ``values_list().iterator()`` en bloques fijos y se
+codifican una por una, sin pasar por los serializers de DRF, de modo que la
+memoria usada no depende del número de terapeutas exportados.
+"""
+
+import csv
+import json
+from datetime import date, datetime
+
+EXPORT_FIELDS = (
+    'id', 'document_type', 'document_number', 'last_name_paternal',
+    'last_name_maternal', 'first_name', 'birth_date', 'gender',
+    'personal_reference', 'is_active', 'phone', 'email', 'country',
+    'department', 'province', 'district', 'address', 'profile_picture',
+    'ubigeo_country', 'ubigeo_region', 'ubigeo_province', 'ubigeo_district',
+)
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """Buffer mínimo que devuelve lo escrito, para usar ``csv.writer`` en streaming"""
+
+    def write(self, value):
+        return value
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _rows(queryset):
+    if not queryset.ordered:
+        queryset = queryset.order_by('id')
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        yield [_encode_value(value) for value in row]
+
+
+def iter_csv(queryset):
+    """Genera el CSV línea por línea, empezando por la cabecera"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(queryset):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def iter_ndjson(queryset):
+    """Genera un objeto JSON por línea"""
+    for row in _rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+# tipo -> (content type, extensión, generador)
+EXPORTERS = {
+    'csv': ('text/csv; charset=utf-8', 'csv', iter_csv),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson', iter_ndjson),
+}
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Filtros personalizados para los ViewSets de terapeutas.
+"""
+
+from rest_framework import filters
+
+from . import search
+
+
+class TherapistSearchFilter(filters.SearchFilter):
+    """
+    Búsqueda sobre el índice de texto completo de terapeutas.
+    Si el índice no está disponible, usa el ``SearchFilter`` de DRF.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        ranked = search.search_queryset(queryset, terms)
+        if ranked is None:
+            return super().filter_queryset(request, queryset, view)
+        return ranked
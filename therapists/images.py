@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Variantes precalculadas de la foto de perfil de los terapeutas.
+
+Por cada imagen subida se generan versiones de tamaño fijo (``thumb`` y
+``medium``) en WebP (o JPEG si Pillow no soporta WebP), rotadas según EXIF
+y sin metadatos. La generación corre en un pool de hilos para no bloquear
+la petición que sube la imagen; al terminar se marca
+``Therapist.profile_variants_at`` y recién entonces el serializer publica
+las URLs de las variantes.
+"""
+
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from . import cache
+from .models import Therapist
+
+logger = logging.getLogger(__name__)
+
+# nombre -> (ancho, alto) máximo
+VARIANTS = {
+    'thumb': (160, 160),
+    'medium': (640, 640),
+}
+VARIANTS_DIR = 'profile_pictures/variants'
+
+if features.check('webp'):
+    VARIANT_FORMAT, VARIANT_EXTENSION = 'WEBP', 'webp'
+else:
+    VARIANT_FORMAT, VARIANT_EXTENSION = 'JPEG', 'jpg'
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'THERAPIST_IMAGE_WORKERS', 2),
+    thread_name_prefix='therapist-images',
+)
+
+
+def variant_name(name, variant):
+    """
+    Ruta en el storage de una variante a partir de la imagen original. Lleva
+    la ruta completa del original (carpeta y extensión incluidas), así que
+    ``a.jpg`` y ``a.png``, o el mismo nombre en otra carpeta, no comparten
+    variantes.
+    """
+    return f'{VARIANTS_DIR}/{name}.{variant}.{VARIANT_EXTENSION}'
+
+
+def variant_url(name, variant, storage=default_storage):
+    """URL de una variante (o ``None`` si no hay imagen)"""
+    if not name:
+        return None
+    return storage.url(variant_name(name, variant))
+
+
+def has_variants(name, storage=default_storage):
+    return all(storage.exists(variant_name(name, variant)) for variant in VARIANTS)
+
+
+def generate_variants(name, storage=default_storage, force=False):
+    """
+    Genera las variantes de ``name``. Retorna la lista de variantes escritas.
+    """
+    if not force and has_variants(name, storage):
+        return []
+
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        if VARIANT_FORMAT == 'JPEG' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+
+        written = []
+        for variant, size in VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            buffer = BytesIO()
+            # Se guarda sin ``exif`` ni ``icc_profile``: los metadatos no se copian
+            resized.save(buffer, VARIANT_FORMAT, quality=82)
+            _replace(storage, variant_name(name, variant), buffer.getvalue())
+            written.append(variant)
+    return written
+
+
+def _replace(storage, target, content):
+    """
+    Escribe ``target`` reemplazando la versión anterior. En un storage local
+    se escribe a un nombre temporal y se renombra (``os.replace`` es
+    atómico), así los lectores ven siempre un archivo completo. Los storages
+    sin ruta local no permiten renombrar: se borra y se vuelve a escribir.
+    """
+    try:
+        storage.path(target)
+    except NotImplementedError:
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(content))
+        return
+    temporary = storage.save(f'{target}.{uuid.uuid4().hex}.tmp', ContentFile(content))
+    try:
+        os.replace(storage.path(temporary), storage.path(target))
+    except OSError:
+        storage.delete(temporary)
+        raise
+
+
+def mark_ready(therapist_id, name):
+    """
+    Marca las variantes del terapeuta como listas, si ``name`` sigue siendo
+    su foto. Retorna si se marcó.
+    """
+    now = timezone.now()
+    updated = Therapist.objects.filter(pk=therapist_id, profile_picture=name).update(
+        profile_variants_at=now, updated_at=now
+    )
+    if updated:
+        # ``update`` no emite post_save
+        cache.bump_data_version()
+    return bool(updated)
+
+
+def _generate_safely(therapist_id, name):
+    try:
+        generate_variants(name)
+        mark_ready(therapist_id, name)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception('No se pudieron generar las variantes de %s', name)
+
+
+def _generate_in_worker(therapist_id, name):
+    # Los hilos del pool no pasan por el ciclo de una petición: cierran su
+    # conexión al terminar cada tarea
+    try:
+        _generate_safely(therapist_id, name)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(therapist_id, name):
+    """Encola la generación de variantes cuando la transacción se confirme"""
+    if name:
+        transaction.on_commit(lambda: _executor.submit(_generate_in_worker, therapist_id, name))
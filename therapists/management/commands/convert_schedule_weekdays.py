@@ -0,0 +1,46 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from therapists import availability
+from therapists.models import Schedule
+from therapists.models.schedule import WEEKDAY_NUMBERS
+
+
+class Command(BaseCommand):
+    help = (
+        'Convierte day_of_week de los horarios del nombre en inglés (monday ... sunday) '
+        'al número ISO (1 ... 7) con un solo UPDATE y recalcula las máscaras de franjas'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(*self.update_sql(Schedule))
+                converted = max(cursor.rowcount, 0)
+            if converted:
+                # El UPDATE directo no emite señales
+                availability.invalidate()
+                call_command('rebuild_slot_masks', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Conversión de días completa: {converted} horarios'))
+
+    @staticmethod
+    def update_sql(model):
+        """
+        ``UPDATE ... SET day_of_week = CASE LOWER(day_of_week) WHEN 'monday'
+        THEN 1 ... END`` limitado a las filas que todavía tienen el nombre,
+        así que se puede ejecutar más de una vez. En SQLite se corre después
+        de cambiar el tipo de la columna (los textos se conservan); en otros
+        motores, antes, mientras la columna todavía es de texto.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(model._meta.get_field('day_of_week').column)
+        names = list(WEEKDAY_NUMBERS)
+        cases = ' '.join('WHEN %s THEN %s' for _ in names)
+        placeholders = ', '.join('%s' for _ in names)
+        sql = (
+            f'UPDATE {table} SET {column} = CASE LOWER({column}) {cases} END '
+            f'WHERE LOWER({column}) IN ({placeholders})'
+        )
+        params = [value for name in names for value in (name, WEEKDAY_NUMBERS[name])] + names
+        return sql, params
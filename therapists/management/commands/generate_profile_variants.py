@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from therapists import images
+from therapists.models import Therapist
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes (thumb, medium) de las fotos de perfil existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Cantidad de hilos para procesar imágenes en paralelo',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerar las variantes aunque ya existan',
+        )
+
+    def handle(self, *args, **options):
+        therapists = Therapist.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['force']:
+            therapists = therapists.filter(profile_variants_at__isnull=True)
+        pictures = therapists.values_list('id', 'profile_picture').iterator()
+        generated = skipped = failed = 0
+
+        def process(picture):
+            therapist_id, name = picture
+            try:
+                written = images.generate_variants(name, force=options['force'])
+                images.mark_ready(therapist_id, name)
+                return bool(written)
+            except Exception as e:  # pylint: disable=broad-except
+                self.stderr.write(f'Error en {name}: {e}')
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for result in executor.map(process, pictures):
+                if result is None:
+                    failed += 1
+                elif result:
+                    generated += 1
+                else:
+                    skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Variantes generadas: {generated}, ya existentes: {skipped}, con error: {failed}'
+        ))
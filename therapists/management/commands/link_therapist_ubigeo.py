@@ -0,0 +1,139 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from Reflexo.models import Country, District, Province, Region
+from Reflexo.normalization import fold
+from therapists.models import Therapist
+from therapists.signals import therapists_bulk_changed
+
+LOCATION_FIELDS = ['ubigeo_country', 'ubigeo_region', 'ubigeo_province', 'ubigeo_district']
+
+
+class Command(BaseCommand):
+    help = (
+        'Vincula los campos de texto country/department/province/district de los '
+        'terapeutas con las tablas de ubigeo de Reflexo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Volver a resolver también los terapeutas ya vinculados',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de terapeutas por bulk_update',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar el resultado sin guardar cambios',
+        )
+
+    def handle(self, *args, **options):
+        resolver = LocationResolver()
+
+        therapists = Therapist.objects.all()
+        if not options['all']:
+            therapists = therapists.filter(
+                ubigeo_country__isnull=True,
+                ubigeo_region__isnull=True,
+                ubigeo_province__isnull=True,
+                ubigeo_district__isnull=True,
+            )
+
+        now = timezone.now()
+        pending = []
+        linked = unresolved = 0
+        rows = therapists.values_list('id', 'country', 'department', 'province', 'district')
+        for therapist_id, country, department, province, district in rows.iterator():
+            country_id, region_id, province_id, district_id = resolver.resolve(
+                country, department, province, district
+            )
+            if not any((country_id, region_id, province_id, district_id)):
+                unresolved += 1
+                continue
+            linked += 1
+            pending.append(Therapist(
+                id=therapist_id,
+                ubigeo_country_id=country_id,
+                ubigeo_region_id=region_id,
+                ubigeo_province_id=province_id,
+                ubigeo_district_id=district_id,
+                updated_at=now,
+            ))
+
+        if not options['dry_run'] and pending:
+            with transaction.atomic():
+                Therapist.objects.bulk_update(
+                    pending, LOCATION_FIELDS + ['updated_at'], batch_size=options['batch_size']
+                )
+                therapists_bulk_changed.send(
+                    sender=Therapist, ids=[t.id for t in pending], using=DEFAULT_DB_ALIAS
+                )
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Terapeutas vinculados: {linked}, sin coincidencias: {unresolved}'
+        ))
+
+
+class LocationResolver:
+    """
+    Resuelve nombres libres a IDs de ubigeo usando mapas en memoria
+    (una consulta por nivel), comparando nombres normalizados.
+    """
+
+    def __init__(self):
+        self.countries = {
+            fold(name): pk for pk, name in Country.objects.values_list('id', 'name')
+        }
+        self.regions = {
+            fold(name): pk for pk, name in Region.objects.values_list('id', 'name')
+        }
+        self.provinces, self.provinces_by_name = {}, {}
+        for pk, name, region_id in Province.objects.values_list('id', 'name', 'region_id'):
+            self.provinces[(region_id, fold(name))] = (pk, region_id)
+            self.provinces_by_name.setdefault(fold(name), []).append((pk, region_id))
+        self.districts, self.districts_by_name = {}, {}
+        for pk, name, province_id in District.objects.values_list('id', 'name', 'province_id'):
+            self.districts[(province_id, fold(name))] = (pk, province_id)
+            self.districts_by_name.setdefault(fold(name), []).append((pk, province_id))
+        self.province_regions = {pk: region_id for pk, region_id in self.provinces.values()}
+
+    def resolve(self, country, department, province, district):
+        """Retorna (country_id, region_id, province_id, district_id), con ``None`` si no hay coincidencia"""
+        country_id = self.countries.get(fold(country))
+        region_id = self.regions.get(fold(department))
+
+        province_id = None
+        if region_id is not None:
+            match = self.provinces.get((region_id, fold(province)))
+        else:
+            match = self._unique(self.provinces_by_name.get(fold(province)))
+        if match:
+            province_id, region_id = match
+
+        district_id = None
+        if province_id is not None:
+            match = self.districts.get((province_id, fold(district)))
+        elif region_id is None:
+            match = self._unique(self.districts_by_name.get(fold(district)))
+        else:
+            match = None
+        if match:
+            district_id, province_id = match
+            region_id = self.province_regions.get(province_id, region_id)
+
+        return country_id, region_id, province_id, district_id
+
+    @staticmethod
+    def _unique(candidates):
+        """Solo se acepta un nombre sin padre conocido si es inequívoco"""
+        if candidates and len(candidates) == 1:
+            return candidates[0]
+        return None
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from therapists import slots
+from therapists.models import Therapist
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las máscaras de franjas (ScheduleSlotMask) a partir de los horarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de terapeutas por lote',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        therapist_ids = list(Therapist.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(therapist_ids), batch_size):
+            slots.refresh(therapist_ids[start:start + batch_size], batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Máscaras de franjas recalculadas para {len(therapist_ids)} terapeutas'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from therapists import search
+
+
+class Command(BaseCommand):
+    help = 'Crea o regenera el índice de búsqueda de terapeutas (SQLite FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Base de datos sobre la que se construye el índice',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_supported(using):
+            raise CommandError('El índice de búsqueda solo está disponible en SQLite')
+
+        search.create_index(using)
+        self.stdout.write(self.style.SUCCESS('Índice de búsqueda de terapeutas regenerado'))
@@ -2,11 +2,14 @@
 from .therapist import Therapist
 from .specialization import Specialization
 from .certification import Certification
-from .schedule import Schedule
+from .schedule import Schedule, Weekday
+from .slot_mask import ScheduleSlotMask
 
 __all__ = [
     'Therapist',
     'Specialization', 
     'Certification',
-    'Schedule'
+    'Schedule',
+    'Weekday',
+    'ScheduleSlotMask'
 ]
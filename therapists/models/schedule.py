@@ -1,21 +1,57 @@
 from django.db import models
 
+
+class Weekday(models.IntegerChoices):
+    """Día de la semana según ISO 8601 (1 = lunes ... 7 = domingo)"""
+    MONDAY = 1, 'Lunes'
+    TUESDAY = 2, 'Martes'
+    WEDNESDAY = 3, 'Miércoles'
+    THURSDAY = 4, 'Jueves'
+    FRIDAY = 5, 'Viernes'
+    SATURDAY = 6, 'Sábado'
+    SUNDAY = 7, 'Domingo'
+
+
+# Nombres con los que la API identificaba los días cuando se guardaban como texto
+WEEKDAY_NAMES = {
+    Weekday.MONDAY: 'monday',
+    Weekday.TUESDAY: 'tuesday',
+    Weekday.WEDNESDAY: 'wednesday',
+    Weekday.THURSDAY: 'thursday',
+    Weekday.FRIDAY: 'friday',
+    Weekday.SATURDAY: 'saturday',
+    Weekday.SUNDAY: 'sunday',
+}
+WEEKDAY_NUMBERS = {name: int(day) for day, name in WEEKDAY_NAMES.items()}
+
+
+def parse_weekday(value):
+    """
+    Día ISO a partir del número (``1``, ``'1'``) o del nombre en inglés
+    (``'monday'``); ``None`` si no es un día válido.
+    """
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in WEEKDAY_NUMBERS:
+            return WEEKDAY_NUMBERS[value]
+        if not value.isdigit():
+            return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value in Weekday.values else None
+
+
 class Schedule(models.Model):
     """
     Modelo para los horarios de los terapeutas
     """
-    DAYS_OF_WEEK = [
-        ('monday', 'Lunes'),
-        ('tuesday', 'Martes'),
-        ('wednesday', 'Miércoles'),
-        ('thursday', 'Jueves'),
-        ('friday', 'Viernes'),
-        ('saturday', 'Sábado'),
-        ('sunday', 'Domingo'),
-    ]
+    Weekday = Weekday
+    DAYS_OF_WEEK = Weekday.choices
 
     therapist = models.ForeignKey('Therapist', on_delete=models.CASCADE, related_name='schedules')
-    day_of_week = models.CharField(max_length=10, choices=DAYS_OF_WEEK)
+    day_of_week = models.PositiveSmallIntegerField(choices=Weekday.choices)
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_available = models.BooleanField(default=True)
@@ -30,3 +66,6 @@ class Schedule(models.Model):
         verbose_name = "Horario"
         verbose_name_plural = "Horarios"
         unique_together = ['therapist', 'day_of_week']
+        indexes = [
+            models.Index(fields=['therapist', 'day_of_week', 'start_time'], name='schedule_therapist_day_idx'),
+        ]
@@ -0,0 +1,23 @@
+from django.db import models
+
+from .schedule import Weekday
+
+
+class ScheduleSlotMask(models.Model):
+    """
+    Disponibilidad de un terapeuta en un día como máscara de bits: un bit
+    por franja de 15 minutos (96 franjas, 12 bytes). Es un dato derivado de
+    ``Schedule`` que se recalcula en sus señales (ver ``therapists.slots``).
+    """
+    therapist = models.ForeignKey('Therapist', on_delete=models.CASCADE, related_name='slot_masks')
+    day_of_week = models.PositiveSmallIntegerField(choices=Weekday.choices)
+    mask = models.BinaryField(max_length=12)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.therapist_id} - {self.get_day_of_week_display()}"
+
+    class Meta:
+        verbose_name = "Máscara de franjas"
+        verbose_name_plural = "Máscaras de franjas"
+        unique_together = ['therapist', 'day_of_week']
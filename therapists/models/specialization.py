@@ -16,3 +16,6 @@ class Specialization(models.Model):
     class Meta:
         verbose_name = "Especialidad"
         verbose_name_plural = "Especialidades"
+        indexes = [
+            models.Index(fields=['name', 'id'], name='specialization_name_id_idx'),
+        ]
@@ -21,6 +21,50 @@ class Therapist(models.Model):
     district = models.CharField(max_length=100, blank=True, null=True) # Distrito
     address = models.TextField(blank=True, null=True)  # Dirección de Domicilio
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True) # Foto de Perfil
+    profile_variants_at = models.DateTimeField(blank=True, null=True, editable=False) # Variantes de la foto generadas
+
+    # Ubicación normalizada sobre las tablas de ubigeo (app Reflexo)
+    ubigeo_country = models.ForeignKey('Reflexo.Country', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    ubigeo_region = models.ForeignKey('Reflexo.Region', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    ubigeo_province = models.ForeignKey('Reflexo.Province', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    ubigeo_district = models.ForeignKey('Reflexo.District', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+
+    # Control de cambios
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name_paternal} {self.last_name_maternal or ''}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Foto con la que se cargó, para detectar un cambio al guardar
+        picture = instance.__dict__.get('profile_picture')
+        instance._loaded_picture = getattr(picture, 'name', picture) or None
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Una foto nueva queda sin variantes listas hasta que se generen"""
+        update_fields = kwargs.get('update_fields')
+        saves_picture = 'profile_picture' in self.__dict__ and (
+            update_fields is None or 'profile_picture' in update_fields
+        )
+        if saves_picture and (self.profile_picture.name or None) != getattr(self, '_loaded_picture', None):
+            self.profile_variants_at = None
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'profile_variants_at'}
+        super().save(*args, **kwargs)
+        if saves_picture:
+            # El storage puede renombrar el archivo al guardarlo
+            self._loaded_picture = self.profile_picture.name or None
+
+    class Meta:
+        indexes = [
+            # Orden estable para la paginación por cursor
+            models.Index(fields=['last_name_paternal', 'id'], name='therapist_lastname_id_idx'),
+            # MAX(updated_at) por estado para los validadores ETag / Last-Modified
+            models.Index(fields=['is_active', 'updated_at'], name='therapist_active_updated_idx'),
+            # Índice de cobertura para el conteo de facetas
+            models.Index(fields=['is_active', 'gender', 'department', 'document_type'], name='therapist_facets_idx'),
+        ]
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Paginación por cursor (keyset) para los ViewSets de terapeutas.
+
+A diferencia de la paginación por página/offset, cada página se obtiene con
+un ``WHERE (col, id) > (ultimo_col, ultimo_id) ORDER BY col, id LIMIT n``,
+por lo que el costo no crece con la profundidad y nunca se ejecuta un
+``COUNT(*)``. Es opcional: solo se activa si la petición incluye ``cursor``
+o ``page_size``.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación keyset sobre un ordenamiento estable y ascendente.
+
+    ``ordering`` debe terminar en una columna única (normalmente ``id``)
+    para que el cursor identifique una posición exacta.
+    """
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def is_requested(self, request):
+        """Indica si la petición pidió paginar explícitamente"""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position))
+
+        # Se pide un registro extra para saber si existe una página siguiente
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def build_filter(self, position):
+        """
+        Construye ``(c1, c2, ..., cn) > (v1, v2, ..., vn)`` como una
+        disyunción de prefijos, que SQLite resuelve con el índice compuesto.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            term = Q(**{f'{field}__gt': position[i]})
+            for prev_field, prev_value in zip(self.ordering[:i], position[:i]):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field) for field in self.ordering]
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        """
+        Posición del cursor con cada valor convertido al tipo de su columna
+        (``Field.to_python``); un cursor adulterado responde 404, no 500.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # Las columnas de ``ordering`` son NOT NULL; build_filter no admite None
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.get_position(self.page[-1])))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TherapistPagination(KeysetPagination):
+    """Ordena por apellido paterno; usa el índice (last_name_paternal, id)"""
+    ordering = ('last_name_paternal', 'id')
+
+
+class SpecializationPagination(KeysetPagination):
+    """Ordena por nombre; usa el índice (name, id)"""
+    ordering = ('name', 'id')
+
+
+class CertificationPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class SchedulePagination(KeysetPagination):
+    ordering = ('id',)
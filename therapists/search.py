@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de búsqueda de texto completo para terapeutas.
+
+En SQLite se mantiene una tabla virtual FTS5 (``therapists_therapist_search``)
+con una fila por terapeuta, cuyo ``rowid`` coincide con ``Therapist.id``.
+El tokenizador ``unicode61 remove_diacritics 2`` ignora mayúsculas y tildes,
+y las consultas se arman como prefijos (``"gar"*``), ordenadas por ``bm25``.
+
+El índice se crea en ``post_migrate`` y se sincroniza desde las señales de
+``Therapist``. Si la base de datos no es SQLite o la tabla no existe, las
+funciones de consulta devuelven ``None`` para que el llamador use la
+búsqueda ``icontains`` de siempre.
+"""
+
+import re
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from .models import Therapist
+
+SEARCH_TABLE = 'therapists_therapist_search'
+
+# Mismas columnas que TherapistViewSet.search_fields
+INDEXED_FIELDS = (
+    'first_name', 'last_name_paternal', 'last_name_maternal',
+    'document_number', 'document_type', 'email', 'phone', 'country',
+    'department', 'province', 'district', 'address',
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(using=DEFAULT_DB_ALIAS):
+    """Indica si la base de datos soporta el índice (solo SQLite)"""
+    return connections[using].vendor == 'sqlite'
+
+
+def index_exists(using=DEFAULT_DB_ALIAS):
+    """Verifica que la tabla FTS5 exista en la base de datos"""
+    if not is_supported(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [SEARCH_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def create_index(using=DEFAULT_DB_ALIAS):
+    """Crea la tabla FTS5 si no existe y la llena con los terapeutas actuales"""
+    if not is_supported(using):
+        return False
+    columns = ', '.join(INDEXED_FIELDS)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{columns}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    rebuild_index(using)
+    return True
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Vuelve a generar el índice completo desde la tabla de terapeutas"""
+    if not index_exists(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(_insert_sql())
+    return True
+
+
+def index_therapists(therapist_ids, using=DEFAULT_DB_ALIAS):
+    """Reindexa los terapeutas indicados (altas, cambios y soft delete)"""
+    therapist_ids = [int(pk) for pk in therapist_ids]
+    if not therapist_ids or not index_exists(using):
+        return
+    placeholders = ', '.join(['%s'] * len(therapist_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", therapist_ids)
+        cursor.execute(f"{_insert_sql()} WHERE id IN ({placeholders})", therapist_ids)
+
+
+def remove_therapists(therapist_ids, using=DEFAULT_DB_ALIAS):
+    """Elimina del índice los terapeutas borrados físicamente"""
+    therapist_ids = [int(pk) for pk in therapist_ids]
+    if not therapist_ids or not index_exists(using):
+        return
+    placeholders = ', '.join(['%s'] * len(therapist_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", therapist_ids)
+
+
+def build_match_expression(query):
+    """
+    Convierte el texto del usuario en una expresión FTS5 segura:
+    cada palabra se busca como prefijo y todas deben aparecer.
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_queryset(queryset, query):
+    """
+    Filtra ``queryset`` con el índice y lo ordena por relevancia.
+
+    Retorna ``None`` si el índice no está disponible, para que el llamador
+    aplique la búsqueda tradicional.
+    """
+    expression = build_match_expression(query)
+    if not expression or not index_exists(queryset.db):
+        return None
+
+    # Una sola unión con la tabla FTS5 por ``rowid``: filtra y aporta el
+    # ``rank`` (bm25) sin una subconsulta por fila
+    therapist_table = Therapist._meta.db_table
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f"{SEARCH_TABLE}.rowid = {therapist_table}.id", f"{SEARCH_TABLE} MATCH %s"],
+        params=[expression],
+        select={'search_rank': f"{SEARCH_TABLE}.rank"},
+    ).order_by('search_rank', 'id')
+
+
+def _insert_sql():
+    therapist_table = Therapist._meta.db_table
+    columns = ', '.join(INDEXED_FIELDS)
+    values = ', '.join(f"COALESCE({field}, '')" for field in INDEXED_FIELDS)
+    return f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) SELECT id, {values} FROM {therapist_table}"
@@ -1,12 +1,16 @@
 # Serializers package
-from .therapist import TherapistSerializer
+from .therapist import TherapistSerializer, TherapistBulkItemSerializer
 from .specialization import SpecializationSerializer
-from .certification import CertificationSerializer
-from .schedule import ScheduleSerializer
+from .certification import CertificationSerializer, CertificationSummarySerializer
+from .schedule import ScheduleSerializer, ScheduleSummarySerializer, AvailabilityCheckSerializer
 
 __all__ = [
     'TherapistSerializer',
+    'TherapistBulkItemSerializer',
     'SpecializationSerializer',
     'CertificationSerializer',
-    'ScheduleSerializer'
+    'CertificationSummarySerializer',
+    'ScheduleSerializer',
+    'ScheduleSummarySerializer',
+    'AvailabilityCheckSerializer'
 ]
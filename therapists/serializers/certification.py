@@ -5,3 +5,10 @@ class CertificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Certification
         fields = '__all__'
+
+
+class CertificationSummarySerializer(serializers.ModelSerializer):
+    """Versión reducida para anidar en el detalle del terapeuta"""
+    class Meta:
+        model = Certification
+        fields = ['id', 'name', 'issuing_organization', 'issue_date', 'expiry_date', 'certificate_number', 'is_active']
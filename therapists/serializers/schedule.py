@@ -1,7 +1,53 @@
 from rest_framework import serializers
 from ..models import Schedule
+from ..models.schedule import WEEKDAY_NAMES, parse_weekday
+
+
+class WeekdayField(serializers.Field):
+    """
+    Día de la semana. Se guarda como número ISO (1 = lunes) pero la API
+    sigue usando los nombres en inglés: acepta ``'monday'`` o ``1`` y
+    responde ``'monday'``.
+    """
+    default_error_messages = {
+        'invalid': 'Debe ser un día de la semana (monday ... sunday o 1 ... 7).',
+    }
+
+    def to_internal_value(self, data):
+        day = parse_weekday(data)
+        if day is None:
+            self.fail('invalid')
+        return day
+
+    def to_representation(self, value):
+        return WEEKDAY_NAMES[value]
+
 
 class ScheduleSerializer(serializers.ModelSerializer):
+    day_of_week = WeekdayField()
+
     class Meta:
         model = Schedule
         fields = '__all__'
+
+
+class ScheduleSummarySerializer(serializers.ModelSerializer):
+    """Versión reducida para anidar en el detalle del terapeuta"""
+    day_of_week = WeekdayField()
+
+    class Meta:
+        model = Schedule
+        fields = ['id', 'day_of_week', 'start_time', 'end_time', 'is_available', 'notes']
+
+
+class AvailabilityCheckSerializer(serializers.Serializer):
+    """Un elemento de la verificación de disponibilidad por lotes"""
+    therapist = serializers.IntegerField(min_value=1)
+    day_of_week = WeekdayField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError({'end_time': 'Debe ser posterior a start_time.'})
+        return attrs
@@ -1,7 +1,78 @@
 from rest_framework import serializers
+from Reflexo.models import Country, District, Province, Region
 from ..models import Therapist
+from .. import images
+from .certification import CertificationSummarySerializer
+from .schedule import ScheduleSummarySerializer
 
 class TherapistSerializer(serializers.ModelSerializer):
+    """
+    Serializer de terapeutas. Las relaciones listadas en
+    ``context['expand']`` se agregan anidadas (ver ``EXPANDABLE_FIELDS``).
+    """
+    EXPANDABLE_FIELDS = {
+        'certifications': CertificationSummarySerializer,
+        'schedules': ScheduleSummarySerializer,
+    }
+
+    # Solo ubigeos vivos: el manager por defecto de esos modelos incluye los eliminados
+    ubigeo_country = serializers.PrimaryKeyRelatedField(
+        queryset=Country.objects.all(), required=False, allow_null=True
+    )
+    ubigeo_region = serializers.PrimaryKeyRelatedField(
+        queryset=Region.objects.all(), required=False, allow_null=True
+    )
+    ubigeo_province = serializers.PrimaryKeyRelatedField(
+        queryset=Province.objects.all(), required=False, allow_null=True
+    )
+    ubigeo_district = serializers.PrimaryKeyRelatedField(
+        queryset=District.objects.all(), required=False, allow_null=True
+    )
+    profile_picture_thumb = serializers.SerializerMethodField()
+    profile_picture_medium = serializers.SerializerMethodField()
+
     class Meta:
         model = Therapist
         fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get('expand', ()):
+            self.fields[name] = self.EXPANDABLE_FIELDS[name](many=True, read_only=True)
+
+    def get_profile_picture_thumb(self, obj):
+        return self._variant_url(obj, 'thumb')
+
+    def get_profile_picture_medium(self, obj):
+        return self._variant_url(obj, 'medium')
+
+    def _variant_url(self, obj, variant):
+        """URL de una variante precalculada de la foto de perfil, una vez generada"""
+        if not obj.profile_picture or obj.profile_variants_at is None:
+            return None
+        url = images.variant_url(obj.profile_picture.name, variant)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class TherapistBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer para cada elemento de una carga masiva.
+    La unicidad de ``document_number`` y la existencia de las FKs de ubigeo
+    se validan una sola vez para todo el lote (ver ``TherapistViewSet.bulk``),
+    no elemento por elemento: acá las FKs solo se leen como IDs.
+    """
+    UBIGEO_FIELDS = ('ubigeo_country', 'ubigeo_region', 'ubigeo_province', 'ubigeo_district')
+
+    id = serializers.IntegerField(required=False)
+    ubigeo_country = serializers.IntegerField(required=False, allow_null=True)
+    ubigeo_region = serializers.IntegerField(required=False, allow_null=True)
+    ubigeo_province = serializers.IntegerField(required=False, allow_null=True)
+    ubigeo_district = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Therapist
+        exclude = ['profile_picture']
+        extra_kwargs = {
+            'document_number': {'validators': []},
+        }
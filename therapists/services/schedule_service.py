@@ -1,5 +1,9 @@
 from ..models import Schedule
+from ..models.schedule import WEEKDAY_NAMES, parse_weekday
+from .. import availability, slots
 from django.db import models
+from functools import reduce
+from operator import or_
 
 class ScheduleService:
     """
@@ -8,7 +12,10 @@ class ScheduleService:
     
     @staticmethod
     def get_therapist_schedule(therapist_id):
-        """Obtiene el horario completo de un terapeuta"""
+        """
+        Obtiene el horario completo de un terapeuta, de lunes a domingo
+        (recorrido en orden del índice ``therapist, day_of_week, start_time``)
+        """
         return Schedule.objects.filter(
             therapist_id=therapist_id,
             is_available=True
@@ -16,22 +23,160 @@ class ScheduleService:
     
     @staticmethod
     def get_available_therapists_by_day(day_of_week):
-        """Obtiene terapeutas disponibles en un día específico"""
+        """Obtiene terapeutas disponibles en un día específico (número ISO o nombre)"""
         from ..models import Therapist
         therapist_ids = Schedule.objects.filter(
-            day_of_week=day_of_week,
+            day_of_week=parse_weekday(day_of_week),
             is_available=True
         ).values_list('therapist_id', flat=True)
         return Therapist.objects.filter(id__in=therapist_ids, is_active=True)
     
     @staticmethod
     def check_therapist_availability(therapist_id, day_of_week, start_time, end_time):
-        """Verifica si un terapeuta está disponible en un horario específico"""
-        conflicting_schedules = Schedule.objects.filter(
-            therapist_id=therapist_id,
-            day_of_week=day_of_week,
-            is_available=True
-        ).filter(
-            models.Q(start_time__lt=end_time) & models.Q(end_time__gt=start_time)
+        """
+        Verifica si un terapeuta está disponible en un horario específico
+        (ver ``check_availability_batch``)
+        """
+        available, _ = ScheduleService.check_availability_batch(
+            [(therapist_id, day_of_week, start_time, end_time)]
+        )[0]
+        return available
+
+    @staticmethod
+    def check_availability_batch(checks):
+        """
+        Verifica varios ``(therapist_id, day_of_week, start_time, end_time)``.
+        El terapeuta está disponible si una de sus ventanas libres (horarios
+        con ``is_available=True`` menos los no disponibles) cubre por
+        completo el rango: el mismo criterio que ``find_covering_therapists``
+        y las máscaras de franjas. Carga con una sola consulta los horarios
+        de los pares ``(therapist_id, day_of_week)`` involucrados y resuelve
+        cada elemento en memoria. Retorna por cada elemento ``(disponible,
+        IDs de horarios no disponibles que se solapan con el rango)``.
+        """
+        if not checks:
+            return []
+        checks = [(therapist_id, parse_weekday(day), start, end) for therapist_id, day, start, end in checks]
+        keys = {(therapist_id, day) for therapist_id, day, _, _ in checks}
+        rows = Schedule.objects.filter(
+            reduce(or_, (models.Q(therapist_id=therapist_id, day_of_week=day) for therapist_id, day in keys))
+        ).values_list('therapist_id', 'day_of_week', 'id', 'start_time', 'end_time', 'is_available')
+
+        schedules = {}
+        for therapist_id, day, schedule_id, start, end, is_available in rows:
+            schedules.setdefault((therapist_id, day), []).append((schedule_id, start, end, is_available))
+        windows = {
+            key: availability.free_intervals((start, end, is_available) for _, start, end, is_available in items)
+            for key, items in schedules.items()
+        }
+
+        results = []
+        for therapist_id, day, start_time, end_time in checks:
+            key = (therapist_id, day)
+            blocking = sorted(
+                schedule_id
+                for schedule_id, start, end, is_available in schedules.get(key, ())
+                if not is_available and start < end_time and end > start_time
+            )
+            results.append((
+                any(start <= start_time and end >= end_time for start, end in windows.get(key, ())),
+                blocking,
+            ))
+        return results
+
+    @staticmethod
+    def find_covering_therapists(day_of_week, start_time, end_time):
+        """
+        Terapeutas activos con un horario disponible que cubre por completo
+        ``[start_time, end_time)`` el día indicado. Se resuelve con el índice
+        de disponibilidad y una sola consulta para los datos del terapeuta.
+        """
+        from ..models import Therapist
+        matches = availability.get_index().covering(parse_weekday(day_of_week), start_time, end_time)
+        if not matches:
+            return []
+        therapists = {
+            row['id']: row
+            for row in Therapist.objects.filter(
+                id__in={therapist_id for therapist_id, _, _, _ in matches},
+                is_active=True
+            ).values('id', 'first_name', 'last_name_paternal', 'last_name_maternal')
+        }
+        return [
+            {
+                'therapist': therapists[therapist_id],
+                'schedule_id': schedule_id,
+                'start_time': start,
+                'end_time': end,
+            }
+            for therapist_id, schedule_id, start, end in matches
+            if therapist_id in therapists
+        ]
+
+    @staticmethod
+    def get_free_windows(therapist_id, day_of_week=None):
+        """Ventanas libres del terapeuta por día: ``{día: [(inicio, fin), ...]}``"""
+        day = parse_weekday(day_of_week) if day_of_week is not None else None
+        return availability.get_index().free_windows(therapist_id, day)
+
+    @staticmethod
+    def get_slot_masks(day_of_week, therapist_ids=None):
+        """Máscaras de franjas libres de un día: ``{therapist_id: máscara}``"""
+        return slots.load_masks(parse_weekday(day_of_week), therapist_ids)
+
+    @staticmethod
+    def get_team_coverage(day_of_week, therapist_ids, require_all=False):
+        """
+        Tramos del día en que al menos un terapeuta del equipo está libre
+        (o todos, con ``require_all``), como ``[(inicio, fin), ...]``
+        """
+        masks = slots.load_masks(parse_weekday(day_of_week), therapist_ids)
+        if require_all:
+            mask = slots.intersection(masks.get(therapist_id, 0) for therapist_id in set(therapist_ids))
+        else:
+            mask = slots.union(masks.values())
+        return [(slots.slot_time(first), slots.slot_time(last)) for first, last in slots.runs(mask)]
+
+    @staticmethod
+    def get_availability_matrix(slot_minutes=60, therapist_ids=None, region_id=None, encoding='bits'):
+        """
+        Grilla terapeutas × días × franjas de los terapeutas activos, armada
+        desde las máscaras de franjas con dos consultas. Cada fila trae, por
+        día de la semana, un texto de ``'0'``/``'1'`` (``encoding='bits'``)
+        o la lista de tramos libres ``[inicio, largo]`` (``encoding='rle'``).
+        """
+        from ..models import ScheduleSlotMask, Therapist
+        factor = slots.slot_factor(slot_minutes)
+        therapists = Therapist.objects.filter(is_active=True)
+        if therapist_ids is not None:
+            therapists = therapists.filter(id__in=therapist_ids)
+        if region_id is not None:
+            therapists = therapists.filter(ubigeo_region_id=region_id)
+        ids = list(therapists.order_by('id').values_list('id', flat=True))
+
+        masks = {}
+        rows = ScheduleSlotMask.objects.filter(therapist__in=therapists).values_list(
+            'therapist_id', 'day_of_week', 'mask'
         )
-        return not conflicting_schedules.exists()
+        for therapist_id, day, mask in rows:
+            masks[therapist_id, day] = slots.from_bytes(mask)
+
+        days = Schedule.Weekday.values
+        empty = slots.bitstring(0, factor)
+        matrix = []
+        for therapist_id in ids:
+            row = [
+                slots.bitstring(masks[therapist_id, day], factor) if (therapist_id, day) in masks else empty
+                for day in days
+            ]
+            if encoding == 'rle':
+                row = [slots.run_lengths(bits) for bits in row]
+            matrix.append({'therapist': therapist_id, 'days': row})
+        return {
+            'slot_minutes': slot_minutes,
+            'slots_per_day': slots.SLOTS_PER_DAY // factor,
+            'days': [WEEKDAY_NAMES[day] for day in days],
+            'encoding': encoding,
+            'count': len(matrix),
+            'rows': matrix,
+        }
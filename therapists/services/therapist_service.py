@@ -1,5 +1,12 @@
 from ..models import Therapist
-from django.db import models
+from .. import search
+from ..signals import therapists_bulk_changed
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.utils import timezone
+
+# Campos con conteos por valor para el directorio de terapeutas
+FACET_FIELDS = ('gender', 'department', 'document_type', 'is_active')
+
 
 class TherapistService:
     """
@@ -19,6 +26,9 @@ class TherapistService:
     @staticmethod
     def search_therapists(query):
         """Busca terapeutas por diferentes criterios"""
+        ranked = search.search_queryset(Therapist.objects.all(), query)
+        if ranked is not None:
+            return ranked
         return Therapist.objects.filter(
             models.Q(first_name__icontains=query) |
             models.Q(last_name_paternal__icontains=query) |
@@ -33,7 +43,7 @@ class TherapistService:
         try:
             therapist = Therapist.objects.get(pk=therapist_id)
             therapist.is_active = False
-            therapist.save(update_fields=['is_active'])
+            therapist.save(update_fields=['is_active', 'updated_at'])
             return True
         except Therapist.DoesNotExist:
             return False
@@ -44,7 +54,64 @@ class TherapistService:
         try:
             therapist = Therapist.objects.get(pk=therapist_id)
             therapist.is_active = True
-            therapist.save(update_fields=['is_active'])
+            therapist.save(update_fields=['is_active', 'updated_at'])
             return True
         except Therapist.DoesNotExist:
             return False
+    
+    @staticmethod
+    def bulk_save_therapists(to_create, to_update, update_fields):
+        """
+        Crea y actualiza terapeutas en una sola transacción usando
+        ``bulk_create`` y ``bulk_update``. Retorna los terapeutas creados.
+        """
+        with transaction.atomic():
+            created = Therapist.objects.bulk_create(to_create)
+            if to_update and update_fields:
+                # bulk_update no aplica auto_now
+                now = timezone.now()
+                for therapist in to_update:
+                    therapist.updated_at = now
+                Therapist.objects.bulk_update(to_update, [*update_fields, 'updated_at'])
+            changed_ids = [t.pk for t in created] + [t.pk for t in to_update]
+            therapists_bulk_changed.send(sender=Therapist, ids=changed_ids, using=DEFAULT_DB_ALIAS)
+        return created
+    
+    @staticmethod
+    def bulk_set_active(therapist_ids, is_active):
+        """
+        Activa o desactiva varios terapeutas con un solo
+        ``UPDATE ... WHERE id IN (...)``. Retorna los IDs encontrados.
+        """
+        therapist_ids = set(therapist_ids)
+        with transaction.atomic():
+            existing = set(
+                Therapist.objects.filter(id__in=therapist_ids).values_list('id', flat=True)
+            )
+            Therapist.objects.filter(id__in=existing).update(is_active=is_active, updated_at=timezone.now())
+            therapists_bulk_changed.send(sender=Therapist, ids=list(existing), using=DEFAULT_DB_ALIAS)
+        return existing
+    
+    @staticmethod
+    def get_facet_counts(queryset):
+        """
+        Cuenta terapeutas por cada valor de ``FACET_FIELDS`` con una sola
+        consulta agrupada por todas las facetas a la vez.
+        """
+        rows = queryset.order_by().values(*FACET_FIELDS).annotate(total=models.Count('id'))
+        counts = {field: {} for field in FACET_FIELDS}
+        total = 0
+        for row in rows:
+            total += row['total']
+            for field in FACET_FIELDS:
+                counts[field][row[field]] = counts[field].get(row[field], 0) + row['total']
+        return {
+            'total': total,
+            'facets': {
+                field: [
+                    {'value': value, 'count': count}
+                    for value, count in sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+                ]
+                for field, values in counts.items()
+            },
+        }
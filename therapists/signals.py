@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Señales de la aplicación de terapeutas.
+Mantienen sincronizado el índice de búsqueda con la tabla de terapeutas,
+invalidan las cachés derivadas, encolan la generación de variantes de la
+foto de perfil y actualizan el índice de disponibilidad y las máscaras de
+franjas de los horarios.
+"""
+
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import Signal, receiver
+
+from . import availability, cache, images, search, slots
+from .models import Schedule, Therapist
+
+# Se envía tras escrituras masivas (bulk_create, bulk_update, update) que no
+# disparan post_save. Argumentos: ``ids`` y ``using``.
+therapists_bulk_changed = Signal()
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """Crea (o regenera) el índice FTS5 al terminar las migraciones"""
+    if sender.name != 'therapists':
+        return
+    # Sin migraciones (o con ``migrate --run-syncdb`` parcial) la tabla de
+    # terapeutas puede no existir todavía
+    if Therapist._meta.db_table in connections[using].introspection.table_names():
+        search.create_index(using)
+
+
+@receiver(post_save, sender=Therapist)
+def index_therapist(sender, instance, using, **kwargs):
+    """Reindexa el terapeuta al crearlo, editarlo o desactivarlo"""
+    search.index_therapists([instance.pk], using)
+
+
+@receiver(post_save, sender=Therapist)
+def process_profile_picture(sender, instance, update_fields, **kwargs):
+    """Genera en segundo plano las variantes de una foto que aún no las tiene"""
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    if instance.profile_picture and instance.profile_variants_at is None:
+        images.schedule_variants(instance.pk, instance.profile_picture.name)
+
+
+@receiver(post_delete, sender=Therapist)
+def unindex_therapist(sender, instance, using, **kwargs):
+    """Quita del índice un terapeuta eliminado físicamente"""
+    search.remove_therapists([instance.pk], using)
+
+
+@receiver(therapists_bulk_changed, sender=Therapist)
+def index_therapists_bulk(sender, ids, using, **kwargs):
+    """Reindexa los terapeutas modificados por una operación masiva"""
+    search.index_therapists(ids, using)
+
+
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+@receiver(therapists_bulk_changed, sender=Therapist)
+def invalidate_therapist_caches(sender, **kwargs):
+    """Cualquier escritura de terapeutas invalida las cachés (p. ej. facetas)"""
+    cache.bump_data_version()
+
+
+@receiver(post_save, sender=Schedule)
+def update_availability(sender, instance, **kwargs):
+    """Actualiza el horario en el índice de disponibilidad"""
+    availability.schedule_saved(instance)
+
+
+@receiver(post_delete, sender=Schedule)
+def remove_availability(sender, instance, **kwargs):
+    """Quita el horario eliminado del índice de disponibilidad"""
+    availability.schedule_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def refresh_slot_masks(sender, instance, **kwargs):
+    """Recalcula las máscaras de franjas del terapeuta del horario"""
+    slots.refresh([instance.therapist_id])
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Horarios semanales como máscaras de bits.
+
+Cada día se divide en 96 franjas de 15 minutos; el bit ``i`` corresponde a
+la franja que empieza en ``i * 15`` minutos. La máscara de un terapeuta en
+un día marca las franjas cubiertas por completo por sus horarios
+disponibles, menos las que toca algún horario no disponible. Se guarda en
+``ScheduleSlotMask`` (12 bytes por fila) y se recalcula desde las señales
+de ``Schedule``.
+
+Con las máscaras, solapamiento, tiempo libre y cobertura de un equipo son
+operaciones ``&`` / ``|`` sobre enteros de Python, sin comparar
+``TimeField`` fila por fila. Los rangos que no coinciden con el borde de una
+franja se redondean hacia afuera: un pedido de 9:10 a 9:50 necesita libres
+las franjas de 9:00 a 10:00.
+"""
+
+import re
+from datetime import time
+from functools import reduce
+from operator import and_, or_
+
+from django.db import transaction
+
+from .models import Schedule, ScheduleSlotMask
+
+SLOT_MINUTES = 15
+SLOT_SECONDS = SLOT_MINUTES * 60
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+MASK_BYTES = (SLOTS_PER_DAY + 7) // 8
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+DAY_SECONDS = 24 * 60 * 60
+
+# Un fin a las 23:59 o después se toma como el final del día
+LAST_MINUTE = DAY_SECONDS - 60
+
+_FREE_RUN_RE = re.compile('1+')
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def slot_range(start, end, partial=True):
+    """
+    Máscara de las franjas de ``[start, end)``. Con ``partial`` incluye las
+    franjas tocadas aunque sea en parte; si no, solo las cubiertas por
+    completo.
+    """
+    start_seconds = _seconds(start)
+    end_seconds = _seconds(end)
+    if end_seconds >= LAST_MINUTE:
+        end_seconds = DAY_SECONDS
+    if partial:
+        first, last = start_seconds // SLOT_SECONDS, -(-end_seconds // SLOT_SECONDS)
+    else:
+        first, last = -(-start_seconds // SLOT_SECONDS), end_seconds // SLOT_SECONDS
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def day_mask(intervals):
+    """Máscara de un día a partir de ``(start, end, is_available)``"""
+    available = blocked = 0
+    for start, end, is_available in intervals:
+        if is_available:
+            available |= slot_range(start, end, partial=False)
+        else:
+            blocked |= slot_range(start, end)
+    return available & ~blocked & FULL_DAY
+
+
+def covers(mask, start, end):
+    """Indica si todas las franjas de ``[start, end)`` están libres"""
+    needed = slot_range(start, end)
+    return bool(needed) and mask & needed == needed
+
+
+def overlaps(mask, start, end):
+    """Indica si alguna franja de ``[start, end)`` está marcada"""
+    return bool(mask & slot_range(start, end))
+
+
+def union(masks):
+    """Franjas en las que al menos una máscara está libre"""
+    return reduce(or_, masks, 0)
+
+
+def intersection(masks):
+    """Franjas en las que todas las máscaras están libres"""
+    masks = list(masks)
+    return reduce(and_, masks, FULL_DAY) if masks else 0
+
+
+def runs(mask):
+    """Tramos consecutivos de bits en 1 como ``(primera_franja, franja_final)``"""
+    result = []
+    slot = 0
+    while mask:
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        slot += skip
+        length = (~mask & (mask + 1)).bit_length() - 1
+        result.append((slot, slot + length))
+        mask >>= length
+        slot += length
+    return result
+
+
+def slot_label(slot):
+    """Hora de inicio de la franja como ``HH:MM`` (``24:00`` para el final del día)"""
+    minutes = slot * SLOT_MINUTES
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def slot_time(slot):
+    """Hora de inicio de la franja; el final del día se representa con ``time.max``"""
+    if slot >= SLOTS_PER_DAY:
+        return time.max
+    minutes = slot * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def slot_factor(minutes):
+    """
+    Cantidad de franjas de 15 minutos por celda para un ancho en minutos, o
+    ``None`` si el ancho no es múltiplo de 15 o no divide el día en partes
+    iguales
+    """
+    if minutes <= 0 or minutes % SLOT_MINUTES:
+        return None
+    factor = minutes // SLOT_MINUTES
+    return factor if SLOTS_PER_DAY % factor == 0 else None
+
+
+def bitstring(mask, factor=1):
+    """
+    Máscara como texto de ``'0'``/``'1'`` con la primera franja a la
+    izquierda. Con ``factor`` > 1 cada carácter agrupa ``factor`` franjas y
+    vale 1 solo si todas están libres.
+    """
+    grouped = mask
+    for shift in range(1, factor):
+        grouped &= mask >> shift
+    return format(grouped, f'0{SLOTS_PER_DAY}b')[::-1][::factor]
+
+
+def run_lengths(bits):
+    """Tramos libres de un ``bitstring`` como ``[inicio, largo]``"""
+    return [[match.start(), match.end() - match.start()] for match in _FREE_RUN_RE.finditer(bits)]
+
+
+def to_bytes(mask):
+    return mask.to_bytes(MASK_BYTES, 'big')
+
+
+def from_bytes(value):
+    return int.from_bytes(bytes(value), 'big') if value else 0
+
+
+def compute_masks(therapist_ids):
+    """``{(therapist_id, día): máscara}`` de los terapeutas, con una consulta"""
+    intervals = {}
+    rows = Schedule.objects.filter(therapist_id__in=therapist_ids).values_list(
+        'therapist_id', 'day_of_week', 'start_time', 'end_time', 'is_available'
+    )
+    for therapist_id, day, start, end, is_available in rows:
+        intervals.setdefault((therapist_id, day), []).append((start, end, is_available))
+    return {key: day_mask(items) for key, items in intervals.items()}
+
+
+def refresh(therapist_ids, batch_size=None):
+    """
+    Recalcula las máscaras de los terapeutas: una consulta de lectura, un
+    ``DELETE`` y un ``INSERT`` en lote. Los días sin franjas libres no
+    guardan fila.
+    """
+    therapist_ids = list(therapist_ids)
+    masks = compute_masks(therapist_ids)
+    with transaction.atomic():
+        ScheduleSlotMask.objects.filter(therapist_id__in=therapist_ids).delete()
+        ScheduleSlotMask.objects.bulk_create(
+            [
+                ScheduleSlotMask(therapist_id=therapist_id, day_of_week=day, mask=to_bytes(mask))
+                for (therapist_id, day), mask in sorted(masks.items())
+                if mask
+            ],
+            batch_size=batch_size,
+        )
+
+
+def load_masks(day_of_week, therapist_ids=None):
+    """``{therapist_id: máscara}`` de un día, con una consulta"""
+    rows = ScheduleSlotMask.objects.filter(day_of_week=day_of_week)
+    if therapist_ids is not None:
+        rows = rows.filter(therapist_id__in=therapist_ids)
+    return {therapist_id: from_bytes(mask) for therapist_id, mask in rows.values_list('therapist_id', 'mask')}
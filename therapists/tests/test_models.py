@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from ..models import Therapist, Specialization, Certification, Schedule
+from ..models import Therapist, Specialization, Certification, Schedule, ScheduleSlotMask, Weekday
+from .. import slots
 from datetime import date, time
 
 class TherapistModelTest(TestCase):
@@ -74,10 +75,28 @@ class ScheduleModelTest(TestCase):
     def test_create_schedule(self):
         schedule = Schedule.objects.create(
             therapist=self.therapist,
-            day_of_week='monday',
+            day_of_week=Weekday.MONDAY,
             start_time=time(9, 0),
             end_time=time(17, 0)
         )
-        self.assertEqual(schedule.day_of_week, 'monday')
+        self.assertEqual(schedule.day_of_week, Weekday.MONDAY)
+        self.assertEqual(str(schedule).split(' - ')[-1], 'Lunes 09:00:00-17:00:00')
         self.assertEqual(schedule.therapist, self.therapist)
         self.assertTrue(schedule.is_available)
+
+    def test_slot_mask_follows_schedule(self):
+        schedule = Schedule.objects.create(
+            therapist=self.therapist,
+            day_of_week=Weekday.MONDAY,
+            start_time=time(9, 0),
+            end_time=time(10, 30)
+        )
+        mask = ScheduleSlotMask.objects.get(therapist=self.therapist)
+        self.assertEqual(mask.day_of_week, Weekday.MONDAY)
+        self.assertEqual(slots.runs(slots.from_bytes(mask.mask)), [(36, 42)])
+
+        schedule.day_of_week = Weekday.FRIDAY
+        schedule.save()
+        self.assertEqual(list(ScheduleSlotMask.objects.values_list('day_of_week', flat=True)), [Weekday.FRIDAY])
+        schedule.delete()
+        self.assertFalse(ScheduleSlotMask.objects.exists())
@@ -5,8 +5,17 @@ from ..services import (
     CertificationService, 
     ScheduleService
 )
-from ..models import Therapist, Specialization, Certification, Schedule
+from ..models import Therapist, Specialization, Certification, Schedule, ScheduleSlotMask, Weekday
+from .. import availability, images, slots
 from datetime import date, time
+from io import BytesIO, StringIO
+import shutil
+import tempfile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
 
 class TherapistServiceTest(TestCase):
     def setUp(self):
@@ -48,6 +57,146 @@ class TherapistServiceTest(TestCase):
         self.therapist.refresh_from_db()
         self.assertTrue(self.therapist.is_active)
 
+    def test_search_therapists_prefix_and_accents(self):
+        Therapist.objects.create(
+            document_type='DNI', document_number='87654321',
+            last_name_paternal='Gómez', first_name='Ana',
+            birth_date=date(1991, 1, 1), gender='Femenino', phone='987654321'
+        )
+        self.assertEqual(list(TherapistService.search_therapists('garc')), [self.therapist])
+        self.assertEqual(TherapistService.search_therapists('GOMEZ').get().first_name, 'Ana')
+        self.assertEqual(TherapistService.search_therapists('juan lop').count(), 1)
+
+    def test_search_therapists_follows_updates(self):
+        self.therapist.last_name_paternal = 'Quispe'
+        self.therapist.save()
+        self.assertEqual(TherapistService.search_therapists('garcia').count(), 0)
+        self.assertEqual(TherapistService.search_therapists('quis').count(), 1)
+
+    def test_search_therapists_without_index(self):
+        from django.db import connection
+        from .. import search
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {search.SEARCH_TABLE}')
+        self.assertEqual(TherapistService.search_therapists('arcí').count(), 1)
+
+    def test_search_ranks_with_a_single_join(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Therapist.objects.create(
+            document_type='DNI', document_number='87654321', last_name_paternal='Juárez',
+            first_name='Juan', address='Jirón Juan', birth_date=date(1991, 1, 1), gender='Femenino', phone='9'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            results = list(TherapistService.search_therapists('juan'))
+        self.assertEqual(len(results), 2)
+        self.assertLessEqual(results[0].search_rank, results[1].search_rank)
+        self.assertEqual(queries[-1]['sql'].count('MATCH'), 1)
+
+    def test_post_migrate_skips_missing_therapist_table(self):
+        from unittest import mock
+        from django.apps import apps
+        from django.db import connection
+        from .. import search, signals
+        with mock.patch.object(connection.introspection, 'table_names', return_value=[]), \
+                mock.patch.object(search, 'create_index') as create_index:
+            signals.create_search_index(apps.get_app_config('therapists'), using='default')
+        create_index.assert_not_called()
+
+class ProfilePictureVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _upload(self, size=(1200, 800)):
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientación: rotada 90°
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_generate_variants(self):
+        therapist = Therapist.objects.create(
+            document_type='DNI', document_number='12345678',
+            last_name_paternal='García', first_name='Juan',
+            birth_date=date(1990, 1, 1), gender='Masculino', phone='123456789',
+            profile_picture=self._upload()
+        )
+        name = therapist.profile_picture.name
+        self.assertEqual(images.generate_variants(name), ['thumb', 'medium'])
+        self.assertEqual(images.generate_variants(name), [])
+
+        with default_storage.open(images.variant_name(name, 'thumb')) as f:
+            thumb = Image.open(f)
+            thumb.load()
+        # La rotación EXIF se aplica y los metadatos se descartan
+        self.assertEqual(thumb.size, (107, 160))
+        self.assertEqual(len(thumb.getexif()), 0)
+
+        # Regenerar reemplaza las variantes sin dejar archivos temporales
+        self.assertEqual(images.generate_variants(name, force=True), ['thumb', 'medium'])
+        _, files = default_storage.listdir(images.variant_name(name, 'thumb').rsplit('/', 1)[0])
+        self.assertEqual(len(files), len(images.VARIANTS))
+
+    def test_variant_names_do_not_collide(self):
+        names = {
+            images.variant_name(name, 'thumb')
+            for name in ('profile_pictures/a.jpg', 'profile_pictures/a.png', 'otros/a.jpg')
+        }
+        self.assertEqual(len(names), 3)
+
+    def test_variant_urls_wait_until_generated(self):
+        from ..serializers import TherapistSerializer
+        therapist = Therapist.objects.create(
+            document_type='DNI', document_number='12345678',
+            last_name_paternal='García', first_name='Juan',
+            birth_date=date(1990, 1, 1), gender='Masculino', phone='123456789',
+            profile_picture=self._upload()
+        )
+        name = therapist.profile_picture.name
+        self.assertIsNone(TherapistSerializer(therapist).data['profile_picture_thumb'])
+
+        images._generate_safely(therapist.pk, name)
+        therapist = Therapist.objects.get(pk=therapist.pk)
+        self.assertIsNotNone(therapist.profile_variants_at)
+        self.assertEqual(
+            TherapistSerializer(therapist).data['profile_picture_thumb'], images.variant_url(name, 'thumb')
+        )
+
+        # Guardar sin cambiar la foto conserva la marca; una foto nueva la borra
+        therapist.first_name = 'Juana'
+        therapist.save()
+        self.assertIsNotNone(Therapist.objects.get(pk=therapist.pk).profile_variants_at)
+        therapist.profile_picture = self._upload(size=(300, 200))
+        therapist.save(update_fields=['profile_picture'])
+        self.assertIsNone(Therapist.objects.get(pk=therapist.pk).profile_variants_at)
+        # Una generación de la foto anterior que termina tarde no marca la nueva
+        self.assertFalse(images.mark_ready(therapist.pk, name))
+
+class LinkTherapistUbigeoCommandTest(TestCase):
+    def test_link_therapist_ubigeo(self):
+        from django.core.management import call_command
+        from Reflexo.models import Country, Region, Province, District
+        peru = Country.objects.create(name='Perú', ubigeo_code='PE')
+        region = Region.objects.create(name='Áncash', ubigeo_code='02')
+        province = Province.objects.create(name='Huaraz', region=region, ubigeo_code='0201')
+        district = District.objects.create(name='Independencia', province=province, ubigeo_code='020105')
+        therapist = Therapist.objects.create(
+            document_type='DNI', document_number='12345678',
+            last_name_paternal='García', first_name='Juan',
+            birth_date=date(1990, 1, 1), gender='Masculino', phone='123456789',
+            country='PERU', department='ancash', province='HUARAZ', district=' independencia '
+        )
+        call_command('link_therapist_ubigeo', stdout=StringIO())
+        therapist.refresh_from_db()
+        self.assertEqual(
+            (therapist.ubigeo_country, therapist.ubigeo_region, therapist.ubigeo_province, therapist.ubigeo_district),
+            (peru, region, province, district)
+        )
+
 class SpecializationServiceTest(TestCase):
     def test_get_active_specializations(self):
         specialization = Specialization.objects.create(
@@ -116,7 +265,7 @@ class ScheduleServiceTest(TestCase):
     def test_get_therapist_schedule(self):
         schedule = Schedule.objects.create(
             therapist=self.therapist,
-            day_of_week='monday',
+            day_of_week=Weekday.MONDAY,
             start_time=time(9, 0),
             end_time=time(17, 0)
         )
@@ -124,13 +273,266 @@ class ScheduleServiceTest(TestCase):
         self.assertEqual(therapist_schedule.count(), 1)
         self.assertIn(schedule, therapist_schedule)
 
+    def test_get_therapist_schedule_in_week_order(self):
+        for day in (Weekday.SUNDAY, Weekday.FRIDAY, Weekday.MONDAY, Weekday.WEDNESDAY):
+            Schedule.objects.create(
+                therapist=self.therapist, day_of_week=day, start_time=time(9, 0), end_time=time(10, 0)
+            )
+        days = list(ScheduleService.get_therapist_schedule(self.therapist.id).values_list('day_of_week', flat=True))
+        self.assertEqual(days, [Weekday.MONDAY, Weekday.WEDNESDAY, Weekday.FRIDAY, Weekday.SUNDAY])
+
+    def test_convert_schedule_weekdays_command(self):
+        from django.core.management import call_command
+        from django.db import connection
+        schedule = Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(10, 0)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE therapists_schedule SET day_of_week = 'Friday' WHERE id = %s", [schedule.id])
+        out = StringIO()
+        call_command('convert_schedule_weekdays', stdout=out)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.day_of_week, Weekday.FRIDAY)
+        self.assertIn('1 horarios', out.getvalue())
+        self.assertEqual(list(ScheduleSlotMask.objects.values_list('day_of_week', flat=True)), [Weekday.FRIDAY])
+        call_command('convert_schedule_weekdays', stdout=out)
+        self.assertIn('0 horarios', out.getvalue())
+
     def test_get_available_therapists_by_day(self):
         schedule = Schedule.objects.create(
             therapist=self.therapist,
-            day_of_week='monday',
+            day_of_week=Weekday.MONDAY,
             start_time=time(9, 0),
             end_time=time(17, 0)
         )
         available_therapists = ScheduleService.get_available_therapists_by_day('monday')
         self.assertEqual(available_therapists.count(), 1)
         self.assertIn(self.therapist, available_therapists)
+
+    def test_check_availability_batch(self):
+        other = Therapist.objects.create(
+            document_type='DNI', document_number='87654321', last_name_paternal='Pérez',
+            first_name='Ana', birth_date=date(1990, 1, 1), gender='Femenino', phone='987654321'
+        )
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(12, 0)
+        )
+        off = Schedule.objects.create(
+            therapist=other, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(12, 0), is_available=False
+        )
+        checks = [
+            (self.therapist.id, 'monday', time(9, 30), time(11, 0)),
+            (self.therapist.id, 'monday', time(11, 0), time(13, 0)),
+            (self.therapist.id, 'tuesday', time(9, 0), time(10, 0)),
+            (other.id, 'monday', time(10, 0), time(11, 0)),
+            (other.id, 'monday', time(12, 0), time(13, 0)),
+        ] * 20
+        with self.assertNumQueries(1):
+            verdicts = ScheduleService.check_availability_batch(checks)
+        self.assertEqual(
+            verdicts[:5],
+            [(True, []), (False, []), (False, []), (False, [off.id]), (False, [])]
+        )
+        self.assertEqual(len(verdicts), len(checks))
+        for check, (available, _) in zip(checks[:5], verdicts):
+            self.assertEqual(ScheduleService.check_therapist_availability(*check), available)
+        # Mismo criterio que la búsqueda por cobertura
+        covering = {row['therapist']['id'] for row in ScheduleService.find_covering_therapists('monday', time(9, 30), time(11, 0))}
+        self.assertEqual(covering, {self.therapist.id})
+        self.assertEqual(ScheduleService.check_availability_batch([]), [])
+
+
+class AvailabilityIndexTest(TestCase):
+    def setUp(self):
+        availability.invalidate()
+        self.therapists = [
+            Therapist.objects.create(
+                document_type='DNI', document_number=f'1000000{i}', last_name_paternal='García',
+                first_name=f'Terapeuta {i}', birth_date=date(1990, 1, 1), gender='Masculino', phone='123456789'
+            )
+            for i in range(4)
+        ]
+        first, second, third, fourth = self.therapists
+        Schedule.objects.create(therapist=first, day_of_week=Weekday.TUESDAY, start_time=time(9, 0), end_time=time(17, 0))
+        Schedule.objects.create(therapist=second, day_of_week=Weekday.TUESDAY, start_time=time(14, 0), end_time=time(16, 0))
+        Schedule.objects.create(
+            therapist=third, day_of_week=Weekday.TUESDAY, start_time=time(8, 0), end_time=time(18, 0), is_available=False
+        )
+        Schedule.objects.create(therapist=fourth, day_of_week=Weekday.TUESDAY, start_time=time(15, 0), end_time=time(16, 30))
+        fourth.is_active = False
+        fourth.save()
+
+    def test_find_covering_therapists(self):
+        with self.assertNumQueries(2):
+            results = ScheduleService.find_covering_therapists('tuesday', time(15, 0), time(16, 30))
+        self.assertEqual([item['therapist']['id'] for item in results], [self.therapists[0].id])
+        self.assertEqual(results[0]['start_time'], time(9, 0))
+        self.assertEqual(ScheduleService.find_covering_therapists('monday', time(15, 0), time(16, 0)), [])
+        covering = ScheduleService.find_covering_therapists('tuesday', time(14, 0), time(16, 0))
+        self.assertEqual([item['therapist']['id'] for item in covering], [t.id for t in self.therapists[:2]])
+
+    def test_get_free_windows(self):
+        windows = ScheduleService.get_free_windows(self.therapists[0].id)
+        self.assertEqual(windows, {Weekday.TUESDAY: [(time(9, 0), time(17, 0))]})
+        self.assertEqual(ScheduleService.get_free_windows(self.therapists[2].id), {})
+        self.assertEqual(ScheduleService.get_free_windows(self.therapists[0].id, 'monday'), {})
+
+    def test_free_windows_subtract_unavailable_intervals(self):
+        index = availability.AvailabilityIndex(1, [
+            (1, 7, Weekday.FRIDAY, time(8, 0), time(12, 0), True),
+            (2, 7, Weekday.FRIDAY, time(11, 0), time(18, 0), True),
+            (3, 7, Weekday.FRIDAY, time(13, 0), time(14, 0), False),
+        ])
+        self.assertEqual(index.free_windows(7), {
+            Weekday.FRIDAY: [(time(8, 0), time(13, 0)), (time(14, 0), time(18, 0))]
+        })
+        updated = index.replaced(2, 3)
+        self.assertEqual(updated.free_windows(7), {Weekday.FRIDAY: [(time(8, 0), time(18, 0))]})
+        self.assertEqual([match[1] for match in updated.covering(Weekday.FRIDAY, time(9, 0), time(10, 0))], [1])
+        # El original no cambia: los lectores que ya lo tenían siguen viendo un estado completo
+        self.assertEqual(len(index.free_windows(7)[Weekday.FRIDAY]), 2)
+
+    def test_covering_matches_linear_scan(self):
+        import random
+        rng = random.Random(7)
+        rows = []
+        for schedule_id in range(1, 301):
+            start = rng.randrange(0, 20 * 60, 15)
+            end = start + rng.randrange(15, 8 * 60, 15)
+            rows.append((
+                schedule_id, schedule_id % 97, Weekday.MONDAY,
+                time(start // 60, start % 60), time(min(end // 60, 23), end % 60), True
+            ))
+        index = availability.AvailabilityIndex(1, rows)
+        for start, end in [(time(8, 0), time(9, 0)), (time(12, 30), time(18, 0)), (time(0, 0), time(23, 0))]:
+            expected = sorted(
+                (therapist_id, schedule_id, s, e) for schedule_id, therapist_id, _, s, e, _ in rows
+                if s <= start and e >= end and s < e
+            )
+            self.assertEqual(index.covering(Weekday.MONDAY, start, end), expected)
+
+    def test_incremental_updates_match_rebuild(self):
+        import random
+        rng = random.Random(11)
+
+        def random_entry(therapist_id):
+            start = rng.randrange(0, 20 * 60, 15)
+            end = start + rng.randrange(15, 3 * 60, 15)
+            return (therapist_id, Weekday.MONDAY, time(start // 60, start % 60), time(end // 60, end % 60), True)
+
+        rows = {schedule_id: random_entry(schedule_id % 41) for schedule_id in range(1, 201)}
+        index = availability.AvailabilityIndex(1, [(pk, *entry) for pk, entry in rows.items()])
+        tree = index.days[Weekday.MONDAY].tree
+        for step in range(200):
+            schedule_id = rng.randrange(1, 261)
+            if schedule_id in rows and rng.random() < 0.5:
+                del rows[schedule_id]
+                index = index.replaced(2 + step, schedule_id)
+            else:
+                rows[schedule_id] = random_entry(schedule_id % 41)
+                index = index.replaced(2 + step, schedule_id, rows[schedule_id])
+            if step == 0:
+                # Un cambio suelto no rearma el árbol del día
+                self.assertIs(index.days[Weekday.MONDAY].tree, tree)
+        rebuilt = availability.AvailabilityIndex(0, [(pk, *entry) for pk, entry in rows.items()])
+        for start, end in [(time(8, 0), time(9, 0)), (time(12, 30), time(14, 0)), (time(0, 0), time(0, 15))]:
+            self.assertEqual(
+                index.covering(Weekday.MONDAY, start, end), rebuilt.covering(Weekday.MONDAY, start, end)
+            )
+
+    def test_index_is_updated_incrementally_on_commit(self):
+        index = availability.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule = Schedule.objects.create(
+                therapist=self.therapists[1], day_of_week=Weekday.MONDAY, start_time=time(10, 0), end_time=time(12, 0)
+            )
+        with self.assertNumQueries(0):
+            updated = availability.get_index()
+        self.assertIsNot(updated, index)
+        self.assertIs(updated.days[Weekday.TUESDAY], index.days[Weekday.TUESDAY])
+        self.assertEqual(
+            [match[0] for match in updated.covering(Weekday.MONDAY, time(10, 0), time(11, 0))], [self.therapists[1].id]
+        )
+        self.assertEqual(index.covering(Weekday.MONDAY, time(10, 0), time(11, 0)), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(availability.get_index().covering(Weekday.MONDAY, time(10, 0), time(11, 0)), [])
+
+    def test_evicted_version_does_not_reuse_old_numbers(self):
+        index = availability.get_index()
+        used = {index.version}
+        for _ in range(3):
+            cache.delete(availability.VERSION_KEY)
+            availability.invalidate()
+            self.assertNotIn(availability.current_version(), used)
+            used.add(availability.current_version())
+        with self.assertNumQueries(1):
+            self.assertIsNot(availability.get_index(), index)
+
+
+class SlotMaskTest(TestCase):
+    def setUp(self):
+        self.therapists = [
+            Therapist.objects.create(
+                document_type='DNI', document_number=f'2000000{i}', last_name_paternal='López',
+                first_name=f'Terapeuta {i}', birth_date=date(1990, 1, 1), gender='Femenino', phone='123456789'
+            )
+            for i in range(3)
+        ]
+        first, second, third = self.therapists
+        Schedule.objects.create(therapist=first, day_of_week=Weekday.MONDAY, start_time=time(8, 0), end_time=time(12, 0))
+        Schedule.objects.create(therapist=second, day_of_week=Weekday.MONDAY, start_time=time(10, 0), end_time=time(14, 0))
+        Schedule.objects.create(
+            therapist=third, day_of_week=Weekday.MONDAY, start_time=time(8, 0), end_time=time(18, 0), is_available=False
+        )
+
+    def test_slot_helpers(self):
+        self.assertEqual(slots.slot_range(time(9, 0), time(10, 0)), 0b1111 << 36)
+        self.assertEqual(slots.slot_range(time(9, 10), time(9, 50)), 0b1111 << 36)
+        self.assertEqual(slots.slot_range(time(9, 10), time(9, 50), partial=False), 0b11 << 37)
+        self.assertEqual(slots.slot_range(time(23, 0), time(23, 59)), 0b1111 << 92)
+        mask = slots.day_mask([(time(8, 0), time(12, 0), True), (time(9, 0), time(9, 20), False)])
+        self.assertEqual(slots.runs(mask), [(32, 36), (38, 48)])
+        self.assertTrue(slots.covers(mask, time(10, 0), time(11, 0)))
+        self.assertFalse(slots.covers(mask, time(8, 30), time(9, 30)))
+        self.assertTrue(slots.overlaps(mask, time(8, 30), time(9, 30)))
+        self.assertEqual(slots.from_bytes(slots.to_bytes(mask)), mask)
+        self.assertEqual(len(slots.to_bytes(slots.FULL_DAY)), 12)
+        self.assertEqual(slots.slot_label(96), '24:00')
+
+    def test_get_slot_masks(self):
+        with self.assertNumQueries(1):
+            masks = ScheduleService.get_slot_masks('monday')
+        self.assertEqual(set(masks), {self.therapists[0].id, self.therapists[1].id})
+        self.assertEqual(slots.runs(masks[self.therapists[0].id]), [(32, 48)])
+
+    def test_get_team_coverage(self):
+        ids = [therapist.id for therapist in self.therapists[:2]]
+        self.assertEqual(ScheduleService.get_team_coverage('monday', ids), [(time(8, 0), time(14, 0))])
+        self.assertEqual(
+            ScheduleService.get_team_coverage('monday', ids, require_all=True), [(time(10, 0), time(12, 0))]
+        )
+        self.assertEqual(ScheduleService.get_team_coverage('monday', [t.id for t in self.therapists], True), [])
+
+    def test_get_availability_matrix(self):
+        with self.assertNumQueries(2):
+            matrix = ScheduleService.get_availability_matrix(60)
+        self.assertEqual(matrix['slots_per_day'], 24)
+        self.assertEqual(matrix['count'], 3)
+        first = matrix['rows'][0]
+        self.assertEqual(first['therapist'], self.therapists[0].id)
+        self.assertEqual(first['days'][0], '0' * 8 + '1' * 4 + '0' * 12)
+        self.assertEqual(first['days'][1], '0' * 24)
+        self.assertEqual(matrix['rows'][2]['days'][0], '0' * 24)
+
+        rle = ScheduleService.get_availability_matrix(30, [self.therapists[1].id], encoding='rle')
+        self.assertEqual(rle['rows'], [{'therapist': self.therapists[1].id, 'days': [[[20, 8]], [], [], [], [], [], []]}])
+        self.assertEqual(slots.bitstring(slots.slot_range(time(9, 0), time(9, 45)), 4)[9], '0')
+
+    def test_rebuild_slot_masks_command(self):
+        from django.core.management import call_command
+        ScheduleSlotMask.objects.all().delete()
+        call_command('rebuild_slot_masks', stdout=StringIO())
+        self.assertEqual(ScheduleSlotMask.objects.count(), 2)
@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from ..models import Therapist, Specialization, Certification, Schedule
+from ..models import Therapist, Specialization, Certification, Schedule, Weekday
 from datetime import date, time
 
 class TherapistViewsTest(APITestCase):
@@ -47,6 +47,7 @@ class TherapistViewsTest(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['first_name'], 'Juan')
+        self.assertIsNone(response.data['profile_picture_thumb'])
 
     def test_soft_delete_therapist(self):
         url = reverse('therapist-detail', args=[self.therapist.id])
@@ -64,6 +65,300 @@ class TherapistViewsTest(APITestCase):
         self.therapist.refresh_from_db()
         self.assertTrue(self.therapist.is_active)
 
+    def test_list_therapists_cursor_pagination(self):
+        for i, last_name in enumerate(['Zapata', 'Álvarez', 'García', 'Benítez']):
+            Therapist.objects.create(
+                document_type='DNI', document_number=f'5000000{i}',
+                last_name_paternal=last_name, first_name='Test',
+                birth_date=date(1990, 1, 1), gender='Femenino', phone='999'
+            )
+        url = reverse('therapist-list')
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        seen = [row['last_name_paternal'] for row in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [row['last_name_paternal'] for row in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(seen, ['Benítez', 'García', 'García', 'Zapata', 'Álvarez'])
+
+    def test_search_therapists(self):
+        url = reverse('therapist-list')
+        response = self.client.get(url, {'search': 'garcia jua'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [self.therapist.id])
+        self.client.delete(reverse('therapist-detail', args=[self.therapist.id]))
+        response = self.client.get(url, {'search': 'garcia', 'active': 'false'})
+        self.assertEqual(len(response.data), 1)
+
+    def test_export_therapists_csv(self):
+        url = reverse('therapist-export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,document_type,document_number'))
+        self.assertIn('87654321', lines[1])
+
+    def test_export_therapists_ndjson_honors_filters(self):
+        import json
+        url = reverse('therapist-export')
+        response = self.client.get(url, {'type': 'ndjson', 'search': 'garcia'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.therapist.id])
+        self.assertEqual(rows[0]['birth_date'], '1990-01-01')
+        response = self.client.get(url, {'type': 'ndjson', 'active': 'false'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_export_therapists_unknown_type(self):
+        response = self.client.get(reverse('therapist-export'), {'type': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_and_update_therapists(self):
+        url = reverse('therapist-bulk')
+        payload = [
+            dict(self.therapist_data, document_number='11111111', first_name='Rosa'),
+            dict(self.therapist_data, document_number='22222222', first_name='Luis'),
+            {'id': self.therapist.id, 'first_name': 'Juan Carlos'},
+        ]
+        with self.assertNumQueries(9):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created', 'updated'])
+        self.assertEqual(Therapist.objects.count(), 3)
+        self.therapist.refresh_from_db()
+        self.assertEqual(self.therapist.first_name, 'Juan Carlos')
+        search = self.client.get(reverse('therapist-list'), {'search': 'rosa'})
+        self.assertEqual(len(search.data), 1)
+
+    def test_bulk_resolves_ubigeo_per_level(self):
+        from Reflexo.models import Region, Province
+        region = Region.objects.create(name='Lima', ubigeo_code='15')
+        provinces = [
+            Province.objects.create(name=f'Provincia {i}', region=region, ubigeo_code=f'150{i}') for i in range(1, 4)
+        ]
+        url = reverse('therapist-bulk')
+        payload = [
+            dict(self.therapist_data, document_number=f'4444444{i}', ubigeo_region=region.id, ubigeo_province=province.id)
+            for i, province in enumerate(provinces)
+        ]
+        # Un SELECT por nivel de ubigeo (no uno por elemento), unicidad y escritura
+        with self.assertNumQueries(2 + 7):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Therapist.objects.filter(ubigeo_region=region).values_list('ubigeo_province_id', flat=True)),
+            [province.id for province in provinces]
+        )
+
+        payload = [
+            dict(self.therapist_data, document_number='55555555', ubigeo_region=999999, ubigeo_province=999999),
+            dict(self.therapist_data, document_number='55555556', ubigeo_region=region.id),
+        ]
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        first, second = response.data['results']
+        self.assertEqual(set(first['errors']), {'ubigeo_region', 'ubigeo_province'})
+        self.assertEqual(second['status'], 'ok')
+
+        # Un ubigeo eliminado no se puede asignar, ni en lote ni uno por uno
+        deleted = Region.objects.create(name='Callao', ubigeo_code='07')
+        deleted.delete()
+        payload = [dict(self.therapist_data, document_number='55555557', ubigeo_region=deleted.id)]
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(
+            reverse('therapist-detail', args=[self.therapist.id]), {'ubigeo_region': deleted.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_rejects_duplicates_without_writing(self):
+        url = reverse('therapist-bulk')
+        payload = [
+            dict(self.therapist_data, document_number='87654321'),
+            dict(self.therapist_data, document_number='33333333'),
+            dict(self.therapist_data, document_number='33333333'),
+            {'id': 999999, 'first_name': 'Nadie'},
+        ]
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['error', 'ok', 'error', 'error'])
+        self.assertEqual(Therapist.objects.count(), 1)
+
+    def test_bulk_deactivate_and_restore(self):
+        url = reverse('therapist-bulk-deactivate')
+        response = self.client.post(url, {'ids': [self.therapist.id, 999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'updated': [self.therapist.id], 'not_found': [999999]})
+        self.therapist.refresh_from_db()
+        self.assertFalse(self.therapist.is_active)
+        response = self.client.post(reverse('therapist-bulk-restore'), {'ids': [self.therapist.id]}, format='json')
+        self.therapist.refresh_from_db()
+        self.assertTrue(self.therapist.is_active)
+
+    def test_list_therapists_conditional_get(self):
+        url = reverse('therapist-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(reverse('therapist-detail', args=[self.therapist.id]), {'first_name': 'Juana'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Una fila que sale del filtro cambia el ETag aunque no haya fechas nuevas
+        other = Therapist.objects.create(
+            document_type='DNI', document_number='77777777', last_name_paternal='Zapata',
+            first_name='Rosa', birth_date=date(1990, 1, 1), gender='Femenino', phone='999'
+        )
+        etag = self.client.get(url)['ETag']
+        Therapist.objects.filter(pk=other.pk).update(is_active=False)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Con paginación por cursor el validador cuesta lo mismo que la página
+        etag = self.client.get(url, {'page_size': 1})['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_therapist_conditional_get(self):
+        url = reverse('therapist-detail', args=[self.therapist.id])
+        etag = self.client.get(url, {'active': 'all'})['ETag']
+        response = self.client.get(url, {'active': 'all'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.delete(url)
+        response = self.client.get(url, {'active': 'all'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filter_therapists_by_ubigeo(self):
+        from Reflexo.models import Region, Province, District
+        region = Region.objects.create(name='Lima', ubigeo_code='15')
+        province = Province.objects.create(name='Lima', region=region, ubigeo_code='1501')
+        district = District.objects.create(name='Miraflores', province=province, ubigeo_code='150122')
+        Therapist.objects.filter(pk=self.therapist.pk).update(
+            ubigeo_region=region, ubigeo_province=province, ubigeo_district=district
+        )
+        url = reverse('therapist-list')
+        for params in ({'region_id': region.id}, {'province_id': province.id},
+                       {'district_id': district.id}, {'ubigeo': '15'}, {'ubigeo': '15012'}):
+            response = self.client.get(url, params)
+            self.assertEqual(len(response.data), 1, params)
+        self.assertEqual(len(self.client.get(url, {'ubigeo': '16'}).data), 0)
+
+        # Asociados solo a la región o a la provincia también aparecen con prefijos cortos
+        only_region = Therapist.objects.create(
+            document_type='DNI', document_number='70000001', last_name_paternal='Solo', first_name='Región',
+            birth_date=date(1990, 1, 1), gender='Femenino', phone='999', ubigeo_region=region
+        )
+        only_province = Therapist.objects.create(
+            document_type='DNI', document_number='70000002', last_name_paternal='Solo', first_name='Provincia',
+            birth_date=date(1990, 1, 1), gender='Femenino', phone='999', ubigeo_province=province
+        )
+        expected = {
+            '1': {self.therapist.id, only_region.id, only_province.id},
+            '15': {self.therapist.id, only_region.id, only_province.id},
+            '150': {self.therapist.id, only_province.id},
+            '1501': {self.therapist.id, only_province.id},
+            '15012': {self.therapist.id},
+        }
+        for prefix, ids in expected.items():
+            response = self.client.get(url, {'ubigeo': prefix})
+            self.assertEqual({row['id'] for row in response.data}, ids, prefix)
+        self.assertEqual(self.client.get(url, {'region_id': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_therapist_facets(self):
+        Therapist.objects.create(
+            document_type='CE', document_number='55555555',
+            last_name_paternal='Rojas', first_name='María', department='Cusco',
+            birth_date=date(1990, 1, 1), gender='Femenino', phone='999'
+        )
+        url = reverse('therapist-facets')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(
+            response.data['facets']['gender'],
+            [{'value': 'Femenino', 'count': 1}, {'value': 'Masculino', 'count': 1}]
+        )
+        with self.assertNumQueries(0):
+            self.client.get(url, {'active': 'TRUE'})
+
+        response = self.client.get(url, {'search': 'rojas'})
+        self.assertEqual(response.data['facets']['document_type'], [{'value': 'CE', 'count': 1}])
+
+        self.client.delete(reverse('therapist-detail', args=[self.therapist.id]))
+        response = self.client.get(url)
+        self.assertEqual(response.data['total'], 1)
+        response = self.client.get(url, {'active': 'all'})
+        self.assertEqual(
+            response.data['facets']['is_active'],
+            [{'value': False, 'count': 1}, {'value': True, 'count': 1}]
+        )
+
+    def test_expand_related_rows(self):
+        Certification.objects.create(
+            therapist=self.therapist, name='Terapia Familiar',
+            issuing_organization='Colegio de Psicólogos', issue_date=date(2020, 1, 1)
+        )
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY,
+            start_time=time(9, 0), end_time=time(13, 0)
+        )
+        for i in range(3):
+            other = Therapist.objects.create(
+                document_type='DNI', document_number=f'6000000{i}',
+                last_name_paternal='Otro', first_name='Test',
+                birth_date=date(1990, 1, 1), gender='Femenino', phone='999'
+            )
+            Schedule.objects.create(therapist=other, day_of_week=Weekday.FRIDAY, start_time=time(8, 0), end_time=time(9, 0))
+
+        url = reverse('therapist-list')
+        # terapeutas + certificaciones + horarios (el ETag sale de esas filas)
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'expand': 'certifications,schedules'})
+        self.assertEqual(len(response.data), 4)
+        row = next(r for r in response.data if r['id'] == self.therapist.id)
+        self.assertEqual(row['certifications'][0]['name'], 'Terapia Familiar')
+        self.assertEqual(row['schedules'][0]['day_of_week'], 'monday')
+        self.assertNotIn('therapist', row['schedules'][0])
+
+        detail = self.client.get(reverse('therapist-detail', args=[self.therapist.id]), {'expand': 'schedules'})
+        self.assertEqual(len(detail.data['schedules']), 1)
+        self.assertNotIn('certifications', detail.data)
+        etag = detail['ETag']
+        schedule = Schedule.objects.get(therapist=self.therapist)
+        schedule.end_time = time(14, 0)
+        schedule.save()
+        detail = self.client.get(
+            reverse('therapist-detail', args=[self.therapist.id]), {'expand': 'schedules'},
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, {'expand': 'patients'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_therapists_invalid_cursor(self):
+        url = reverse('therapist-list')
+        response = self.client.get(url, {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_therapists_cursor_with_wrong_types(self):
+        import base64
+        url = reverse('therapist-list')
+        for position in (b'["a","x"]', b'["a",null]', b'{"a":1}'):
+            cursor = base64.urlsafe_b64encode(position).decode('ascii')
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 class SpecializationViewsTest(APITestCase):
     def test_create_specialization(self):
         data = {
@@ -99,6 +394,14 @@ class CertificationViewsTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Certification.objects.count(), 1)
 
+    def test_filter_certifications_by_therapist(self):
+        Certification.objects.create(
+            therapist=self.therapist, name='Certificación', issuing_organization='XYZ', issue_date=date(2020, 1, 1)
+        )
+        url = reverse('certification-list')
+        self.assertEqual(len(self.client.get(url, {'therapist': self.therapist.id}).data), 1)
+        self.assertEqual(len(self.client.get(url, {'therapist': self.therapist.id + 1}).data), 0)
+
 class ScheduleViewsTest(APITestCase):
     def setUp(self):
         self.therapist = Therapist.objects.create(
@@ -122,3 +425,103 @@ class ScheduleViewsTest(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Schedule.objects.count(), 1)
+        self.assertEqual(response.data['day_of_week'], 'monday')
+        self.assertEqual(Schedule.objects.get().day_of_week, Weekday.MONDAY)
+
+    def test_schedule_day_of_week_accepts_names_and_numbers(self):
+        url = reverse('schedule-list')
+        data = {'therapist': self.therapist.id, 'start_time': '09:00:00', 'end_time': '10:00:00'}
+        self.assertEqual(self.client.post(url, {**data, 'day_of_week': 'friday'}, format='json').status_code, 201)
+        response = self.client.post(url, {**data, 'day_of_week': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['day_of_week'], 'tuesday')
+        response = self.client.post(url, {**data, 'day_of_week': 'lunes'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        listed = self.client.get(url, {'therapist': self.therapist.id})
+        self.assertEqual([row['day_of_week'] for row in listed.data], ['tuesday', 'friday'])
+
+    def test_availability(self):
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.TUESDAY, start_time=time(9, 0), end_time=time(17, 0)
+        )
+        url = reverse('schedule-availability')
+        response = self.client.get(url, {'day': 'tuesday', 'start': '15:00', 'end': '16:30'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['therapist']['id'], self.therapist.id)
+        self.assertEqual(response.data['results'][0]['end_time'], '17:00:00')
+
+        response = self.client.get(url, {'day': 'tuesday', 'start': '16:30', 'end': '18:00'})
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(self.client.get(url, {'day': 'martes', 'start': '15:00', 'end': '16:00'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'day': 'tuesday', 'start': '16:00', 'end': '15:00'}).status_code, 400)
+
+    def test_free_windows(self):
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(13, 0)
+        )
+        url = reverse('schedule-free-windows')
+        response = self.client.get(url, {'therapist': self.therapist.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['windows'], {'monday': [{'start_time': '09:00:00', 'end_time': '13:00:00'}]})
+        self.assertEqual(self.client.get(url, {'therapist': 'x'}).status_code, 400)
+
+    def test_check_availability(self):
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(12, 0)
+        )
+        blocked = Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.FRIDAY, start_time=time(9, 0), end_time=time(12, 0),
+            is_available=False
+        )
+        url = reverse('schedule-check-availability')
+        items = [
+            {'therapist': self.therapist.id, 'day_of_week': 'monday', 'start_time': '10:00', 'end_time': '12:00'},
+            {'therapist': self.therapist.id, 'day_of_week': 'friday', 'start_time': '11:00', 'end_time': '13:00'},
+            {'therapist': self.therapist.id, 'day_of_week': 'monday', 'start_time': '11:00', 'end_time': '13:00'},
+        ]
+        with self.assertNumQueries(1):
+            response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second, third = response.data['results']
+        self.assertTrue(first['available'])
+        self.assertEqual(first['conflicts'], [])
+        self.assertFalse(second['available'])
+        self.assertEqual(second['conflicts'], [blocked.id])
+        self.assertFalse(third['available'])
+        self.assertEqual(third['conflicts'], [])
+
+        invalid = items + [
+            {'therapist': self.therapist.id, 'day_of_week': 'monday', 'start_time': '13:00', 'end_time': '11:00'}
+        ]
+        response = self.client.post(url, invalid, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'][3]['status'], 'error')
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_matrix(self):
+        from Reflexo.models import Region
+        region = Region.objects.create(name='Lima', ubigeo_code='15')
+        Schedule.objects.create(
+            therapist=self.therapist, day_of_week=Weekday.MONDAY, start_time=time(9, 0), end_time=time(11, 0)
+        )
+        url = reverse('schedule-matrix')
+        response = self.client.get(url, {'slot_minutes': 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows'][0]['days'][0], '0' * 9 + '11' + '0' * 13)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'slot_minutes': 60})
+
+        Schedule.objects.filter(therapist=self.therapist).get().delete()
+        response = self.client.get(url, {'slot_minutes': 60, 'encoding': 'rle'})
+        self.assertEqual(response.data['rows'][0]['days'][0], [])
+
+        self.assertEqual(self.client.get(url, {'region': region.id}).data['count'], 0)
+        self.therapist.ubigeo_region = region
+        self.therapist.save()
+        self.assertEqual(self.client.get(url, {'region': region.id}).data['count'], 1)
+        self.assertEqual(self.client.get(url, {'therapists': f'{self.therapist.id + 1}'}).data['count'], 0)
+        self.assertEqual(self.client.get(url, {'slot_minutes': 50}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'encoding': 'hex'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'therapists': '1,x'}).status_code, 400)
@@ -1,6 +1,8 @@
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from ..models import Certification
 from ..serializers import CertificationSerializer
+from ..pagination import CertificationPagination
 
 class CertificationViewSet(viewsets.ModelViewSet):
     """
@@ -8,3 +10,16 @@ class CertificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CertificationSerializer
     queryset = Certification.objects.all()
+    pagination_class = CertificationPagination
+
+    def get_queryset(self):
+        """
+        Permite filtrar por terapeuta con ``?therapist=<id>`` (columna indexada).
+        """
+        qs = Certification.objects.all()
+        therapist = self.request.query_params.get('therapist')
+        if therapist:
+            if not therapist.isdigit():
+                raise ValidationError({'therapist': 'Debe ser un número entero.'})
+            qs = qs.filter(therapist_id=int(therapist))
+        return qs
@@ -1,6 +1,40 @@
-from rest_framework import viewsets
+from django.core.cache import cache as django_cache
+from django.utils.dateparse import parse_time
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from ..models import Schedule
-from ..serializers import ScheduleSerializer
+from ..models.schedule import WEEKDAY_NAMES, parse_weekday
+from ..serializers import ScheduleSerializer, AvailabilityCheckSerializer
+from ..services import ScheduleService
+from ..pagination import SchedulePagination
+from ..cache import versioned_key
+from .. import availability, slots
+
+# Máximo de elementos por verificación de disponibilidad en lote
+MAX_BATCH_CHECKS = 500
+
+MATRIX_CACHE_TIMEOUT = 300
+MATRIX_ENCODINGS = ('bits', 'rle')
+
+
+def _parse_day(value, param='day'):
+    day = parse_weekday(value)
+    if day is None:
+        raise ValidationError({param: f"Debe ser uno de: {', '.join(WEEKDAY_NAMES.values())} (o 1 ... 7)."})
+    return day
+
+
+def _parse_time(value, param):
+    try:
+        parsed = parse_time(value or '')
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: 'Debe ser una hora con formato HH:MM[:SS].'})
+    return parsed
+
 
 class ScheduleViewSet(viewsets.ModelViewSet):
     """
@@ -8,3 +42,155 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ScheduleSerializer
     queryset = Schedule.objects.all()
+    pagination_class = SchedulePagination
+
+    def get_queryset(self):
+        """
+        Permite filtrar por terapeuta con ``?therapist=<id>``. El orden
+        (terapeuta, día, hora de inicio) sigue el índice compuesto, así que
+        la semana sale de lunes a domingo sin ordenar en el cliente.
+        """
+        qs = Schedule.objects.order_by('therapist_id', 'day_of_week', 'start_time')
+        therapist = self.request.query_params.get('therapist')
+        if therapist:
+            if not therapist.isdigit():
+                raise ValidationError({'therapist': 'Debe ser un número entero.'})
+            qs = qs.filter(therapist_id=int(therapist))
+        return qs
+
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Terapeutas disponibles durante todo el rango pedido:
+        ``?day=tuesday&start=15:00&end=16:30``.
+        """
+        params = request.query_params
+        day = _parse_day(params.get('day'))
+        start = _parse_time(params.get('start'), 'start')
+        end = _parse_time(params.get('end'), 'end')
+        if start >= end:
+            raise ValidationError({'end': 'Debe ser posterior a start.'})
+
+        results = ScheduleService.find_covering_therapists(day, start, end)
+        for item in results:
+            item['start_time'] = item['start_time'].isoformat()
+            item['end_time'] = item['end_time'].isoformat()
+        return Response({
+            'day_of_week': WEEKDAY_NAMES[day],
+            'start_time': start.isoformat(),
+            'end_time': end.isoformat(),
+            'count': len(results),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], url_path='free-windows')
+    def free_windows(self, request):
+        """
+        Ventanas libres de un terapeuta por día: ``?therapist=<id>`` y,
+        opcionalmente, ``&day=monday``.
+        """
+        params = request.query_params
+        therapist = params.get('therapist', '')
+        if not therapist.isdigit():
+            raise ValidationError({'therapist': 'Debe ser un número entero.'})
+        day = _parse_day(params['day']) if params.get('day') else None
+
+        windows = ScheduleService.get_free_windows(int(therapist), day)
+        return Response({
+            'therapist': int(therapist),
+            'windows': {
+                WEEKDAY_NAMES[day]: [
+                    {'start_time': start.isoformat(), 'end_time': end.isoformat()} for start, end in intervals
+                ]
+                for day, intervals in windows.items()
+            },
+        })
+
+    @action(detail=False, methods=['post'], url_path='check-availability')
+    def check_availability(self, request):
+        """
+        Verifica varios ``{therapist, day_of_week, start_time, end_time}`` a
+        la vez con una sola consulta. Cada resultado indica si una ventana
+        libre del terapeuta cubre el rango y los IDs de los horarios no
+        disponibles que se solapan con él.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Se esperaba una lista de verificaciones."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > MAX_BATCH_CHECKS:
+            return Response(
+                {"detail": f"Máximo {MAX_BATCH_CHECKS} verificaciones por petición."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results, checks = [], []
+        for index, item in enumerate(items):
+            results.append({"index": index, "status": "ok"})
+            if not isinstance(item, dict):
+                results[index].update(status='error', errors={"non_field_errors": ["Se esperaba un objeto."]})
+                continue
+            serializer = AvailabilityCheckSerializer(data=item)
+            if not serializer.is_valid():
+                results[index].update(status='error', errors=serializer.errors)
+                continue
+            data = serializer.validated_data
+            checks.append((index, (data['therapist'], data['day_of_week'], data['start_time'], data['end_time'])))
+        if any(result['status'] == 'error' for result in results):
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        verdicts = ScheduleService.check_availability_batch([check for _, check in checks])
+        for (index, (therapist_id, day, start, end)), (available, conflicting) in zip(checks, verdicts):
+            results[index].update(
+                therapist=therapist_id,
+                day_of_week=WEEKDAY_NAMES[day],
+                start_time=start.isoformat(),
+                end_time=end.isoformat(),
+                available=available,
+                conflicts=conflicting,
+            )
+        return Response({"results": results})
+
+    @action(detail=False, methods=['get'])
+    def matrix(self, request):
+        """
+        Grilla semanal de disponibilidad de los terapeutas activos:
+        ``?slot_minutes=60`` (múltiplo de 15), ``&therapists=1,2,3``,
+        ``&region=<id>`` y ``&encoding=bits|rle``. Se cachea por versión de
+        los horarios y de los terapeutas.
+        """
+        params = request.query_params
+        slot_minutes = params.get('slot_minutes', '60')
+        if not slot_minutes.isdigit() or slots.slot_factor(int(slot_minutes)) is None:
+            raise ValidationError({'slot_minutes': 'Debe ser un múltiplo de 15 que divida el día (15, 30, 60, ...).'})
+        encoding = params.get('encoding', 'bits')
+        if encoding not in MATRIX_ENCODINGS:
+            raise ValidationError({'encoding': f"Debe ser uno de: {', '.join(MATRIX_ENCODINGS)}."})
+        therapist_ids = None
+        if params.get('therapists'):
+            values = [value.strip() for value in params['therapists'].split(',') if value.strip()]
+            if not all(value.isdigit() for value in values):
+                raise ValidationError({'therapists': 'Debe ser una lista de IDs separados por comas.'})
+            therapist_ids = sorted({int(value) for value in values})
+        region_id = params.get('region')
+        if region_id:
+            if not region_id.isdigit():
+                raise ValidationError({'region': 'Debe ser un número entero.'})
+            region_id = int(region_id)
+        else:
+            region_id = None
+
+        key = versioned_key('therapists:schedule-matrix', {
+            'schedules': availability.current_version(),
+            'slot_minutes': int(slot_minutes),
+            'therapists': therapist_ids,
+            'region': region_id,
+            'encoding': encoding,
+        })
+        data = django_cache.get(key)
+        if data is None:
+            data = ScheduleService.get_availability_matrix(int(slot_minutes), therapist_ids, region_id, encoding)
+            django_cache.set(key, data, MATRIX_CACHE_TIMEOUT)
+        return Response(data)
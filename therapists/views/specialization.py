@@ -1,6 +1,7 @@
 from rest_framework import viewsets
 from ..models import Specialization
 from ..serializers import SpecializationSerializer
+from ..pagination import SpecializationPagination
 
 class SpecializationViewSet(viewsets.ModelViewSet):
     """
@@ -8,3 +9,4 @@ class SpecializationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SpecializationSerializer
     queryset = Specialization.objects.all()
+    pagination_class = SpecializationPagination
@@ -4,12 +4,74 @@ Vistas para la aplicación de terapeutas.
 Maneja las operaciones CRUD y renderizado de templates.
 """
 
+from django.core.cache import cache as django_cache
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.response import Response
-from ..models import Therapist
-from ..serializers import TherapistSerializer
+from django.db.models import Prefetch, Q
+from ..models import Therapist, Certification, Schedule
+from ..serializers import TherapistSerializer, TherapistBulkItemSerializer
+from ..services import TherapistService
+from ..pagination import TherapistPagination
+from ..filters import TherapistSearchFilter
+from ..exporters import EXPORTERS
+from .. import conditional
+from ..cache import versioned_key
+from Reflexo.normalization import fold
+
+# Máximo de elementos aceptados por las operaciones masivas
+MAX_BULK_ITEMS = 1000
+
+# Relaciones disponibles en ``?expand=`` y cómo se precargan
+EXPAND_PREFETCHES = {
+    'certifications': lambda: Prefetch(
+        'certifications', queryset=Certification.objects.order_by('-issue_date', 'id')  # pylint: disable=no-member
+    ),
+    'schedules': lambda: Prefetch(
+        'schedules', queryset=Schedule.objects.order_by('day_of_week', 'start_time')  # pylint: disable=no-member
+    ),
+}
+
+# Segundos que se conservan las facetas (además se invalidan con cada escritura)
+FACETS_CACHE_TIMEOUT = 300
+
+# Parámetro de consulta -> FK de ubicación
+UBIGEO_ID_FILTERS = {
+    'region_id': 'ubigeo_region_id',
+    'province_id': 'ubigeo_province_id',
+    'district_id': 'ubigeo_district_id',
+}
+
+
+# FK de ubicación -> largo de su código de ubigeo
+UBIGEO_LEVEL_CODES = (
+    ('ubigeo_region', 2),
+    ('ubigeo_province', 4),
+    ('ubigeo_district', 6),
+)
+
+
+def _ubigeo_prefix_filter(code):
+    """
+    Terapeutas con algún nivel de ubicación cuyo código empieza con
+    ``code``. Se consideran los niveles con código de al menos ese largo,
+    así un terapeuta asociado solo a la región o a la provincia también
+    aparece con los prefijos más cortos. Un código completo se compara con
+    la columna única de su nivel; un prefijo, como rango.
+    """
+    upper = code[:-1] + chr(ord(code[-1]) + 1)
+    condition = Q()
+    for field, length in UBIGEO_LEVEL_CODES:
+        if length == len(code):
+            condition |= Q(**{f'{field}__ubigeo_code': code})
+        elif length > len(code):
+            condition |= Q(**{f'{field}__ubigeo_code__gte': code, f'{field}__ubigeo_code__lt': upper})
+    return condition
+
 
 class TherapistViewSet(viewsets.ModelViewSet):
     """
@@ -18,7 +80,8 @@ class TherapistViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TherapistSerializer
     queryset = Therapist.objects.all()  # pylint: disable=no-member
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [TherapistSearchFilter]
+    pagination_class = TherapistPagination
     search_fields = [
         'first_name', 'last_name_paternal', 'last_name_maternal',
         'document_number', 'document_type', 'email', 'phone', 'country',
@@ -29,22 +92,91 @@ class TherapistViewSet(viewsets.ModelViewSet):
         """
         Filtra terapeutas por estado activo/inactivo.
         Por defecto muestra solo activos.
+        También filtra por ubicación: ``region_id``, ``province_id``,
+        ``district_id`` o un prefijo de código ``ubigeo``.
         """
         qs = Therapist.objects.all()  # pylint: disable=no-member
-        active = self.request.query_params.get('active', 'true').lower()
+        params = self.request.query_params
+        active = params.get('active', 'true').lower()
         if active in ('true', '1', 'yes'):
             qs = qs.filter(is_active=True)
         elif active in ('false', '0', 'no'):
             qs = qs.filter(is_active=False)
+
+        for param, field in UBIGEO_ID_FILTERS.items():
+            value = params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({param: 'Debe ser un número entero.'})
+                qs = qs.filter(**{field: int(value)})
+
+        ubigeo = params.get('ubigeo')
+        if ubigeo:
+            if not ubigeo.isdigit() or len(ubigeo) > 6:
+                raise ValidationError({'ubigeo': 'Debe ser un código de ubigeo de hasta 6 dígitos.'})
+            qs = qs.filter(_ubigeo_prefix_filter(ubigeo))
+
+        expand = self.get_expand()
+        if expand:
+            qs = qs.prefetch_related(*(EXPAND_PREFETCHES[name]() for name in expand))
         return qs
 
+    def get_expand(self):
+        """
+        Relaciones pedidas con ``?expand=certifications,schedules``.
+        Solo aplica a listado y detalle.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return ()
+        raw = self.request.query_params.get('expand', '')
+        expand = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in expand if name not in EXPAND_PREFETCHES]
+        if unknown:
+            raise ValidationError({'expand': f"Relaciones no soportadas: {', '.join(unknown)}"})
+        return expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista terapeutas con soporte de GET condicional (ETag de la página).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        # El enlace a la página siguiente también forma parte de la respuesta
+        next_link = self.paginator.get_next_link() if page is not None else None
+        etag = conditional.page_validators(request, rows, self.get_expand(), [next_link])
+        not_modified = conditional.not_modified_response(request, etag, None)
+        if not_modified is not None:
+            return not_modified
+
+        data = self.get_serializer(rows, many=True).data
+        response = self.get_paginated_response(data) if page is not None else Response(data)
+        return conditional.set_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Obtiene un terapeuta con soporte de GET condicional.
+        """
+        instance = self.get_object()
+        etag, last_modified = conditional.instance_validators(request, instance, self.get_expand())
+        not_modified = conditional.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(instance).data)
+        return conditional.set_validators(response, etag, last_modified)
+
     def destroy(self, request, *args, **kwargs):
         """
         Soft delete - marca como inactivo en lugar de eliminar.
         """
         instance = self.get_object()
         instance.is_active = False
-        instance.save(update_fields=['is_active'])
+        instance.save(update_fields=['is_active', 'updated_at'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'])
@@ -53,8 +185,212 @@ class TherapistViewSet(viewsets.ModelViewSet):
         Endpoint personalizado para obtener terapeutas inactivos.
         """
         queryset = Therapist.objects.filter(is_active=False)  # pylint: disable=no-member
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         return Response(self.get_serializer(queryset, many=True).data)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta los terapeutas en streaming (CSV por defecto o NDJSON con
+        ``?type=ndjson``), respetando los filtros ``active`` y ``search``.
+        """
+        export_type = request.query_params.get('type', 'csv').lower()
+        if export_type not in EXPORTERS:
+            return Response(
+                {"detail": f"Tipo de exportación no soportado: {export_type}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        content_type, extension, generator = EXPORTERS[export_type]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(generator(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="therapists.{extension}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Conteos por género, departamento, tipo de documento y estado para
+        la búsqueda o filtro actual. Se cachean por filtro normalizado.
+        """
+        key = versioned_key('therapists:facets', self._normalized_filters(request))
+        data = django_cache.get(key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            data = TherapistService.get_facet_counts(queryset)
+            django_cache.set(key, data, FACETS_CACHE_TIMEOUT)
+        return Response(data)
+
+    def _normalized_filters(self, request):
+        """Filtros de la petición en forma canónica, para usarlos como clave de caché"""
+        params = request.query_params
+        active = params.get('active', 'true').lower()
+        if active in ('true', '1', 'yes'):
+            active = 'true'
+        elif active in ('false', '0', 'no'):
+            active = 'false'
+        else:
+            active = 'all'
+        normalized = {'active': active}
+        search_param = TherapistSearchFilter.search_param
+        if params.get(search_param):
+            normalized['search'] = ' '.join(fold(params[search_param]).split())
+        for param in (*UBIGEO_ID_FILTERS, 'ubigeo'):
+            if params.get(param):
+                normalized[param] = params[param]
+        return normalized
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Crea o actualiza varios terapeutas en una sola transacción.
+        Los elementos con ``id`` se actualizan (parcialmente) y el resto se crea.
+        Si algún elemento es inválido no se guarda nada.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Se esperaba una lista de terapeutas."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > MAX_BULK_ITEMS:
+            return Response(
+                {"detail": f"Máximo {MAX_BULK_ITEMS} terapeutas por petición."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results, entries = self._validate_bulk_items(items)
+        if any(result['status'] == 'error' for result in results):
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        to_create, to_update, update_fields = [], [], set()
+        for index, instance, data in entries:
+            if instance is None:
+                to_create.append(Therapist(**data))
+            else:
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                update_fields.update(data)
+                to_update.append(instance)
+
+        created = iter(TherapistService.bulk_save_therapists(to_create, to_update, sorted(update_fields)))
+        for index, instance, data in entries:
+            if instance is None:
+                results[index].update(status='created', id=next(created).pk)
+            else:
+                results[index].update(status='updated', id=instance.pk)
+
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if to_create else status.HTTP_200_OK
+        )
+
+    def _validate_bulk_items(self, items):
+        """
+        Valida cada elemento del lote. La existencia de los ``id``, la de
+        cada nivel de ubigeo y la unicidad de ``document_number`` se
+        resuelven con una consulta cada una.
+        """
+        results = [{"index": index, "status": "ok"} for index in range(len(items))]
+        ids = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index].update(status='error', errors={"non_field_errors": ["Se esperaba un objeto."]})
+            elif item.get('id') is not None:
+                try:
+                    ids.append(int(item['id']))
+                except (TypeError, ValueError):
+                    results[index].update(status='error', errors={"id": ["ID inválido."]})
+        existing = Therapist.objects.in_bulk(ids)  # pylint: disable=no-member
+
+        entries = []
+        for index, item in enumerate(items):
+            if results[index]['status'] == 'error':
+                continue
+            instance = None
+            if item.get('id') is not None:
+                instance = existing.get(int(item['id']))
+                if instance is None:
+                    results[index].update(status='error', errors={"id": ["No encontrado."]})
+                    continue
+            serializer = TherapistBulkItemSerializer(instance, data=item, partial=instance is not None)
+            if not serializer.is_valid():
+                results[index].update(status='error', errors=serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            data.pop('id', None)
+            entries.append((index, instance, data))
+
+        # FKs de ubigeo: un ``in_bulk`` por nivel para todo el lote, solo vivos
+        for field in TherapistBulkItemSerializer.UBIGEO_FIELDS:
+            pks = {data[field] for _, _, data in entries if data.get(field) is not None}
+            if not pks:
+                continue
+            found = Therapist._meta.get_field(field).related_model.objects.in_bulk(pks)
+            for index, instance, data in entries:
+                if data.get(field) is None:
+                    continue
+                if data[field] in found:
+                    data[field] = found[data[field]]
+                else:
+                    results[index]['status'] = 'error'
+                    results[index].setdefault('errors', {})[field] = [
+                        PrimaryKeyRelatedField.default_error_messages['does_not_exist'].format(pk_value=data[field])
+                    ]
+        entries = [entry for entry in entries if results[entry[0]]['status'] != 'error']
+
+        # Unicidad de document_number: dentro del lote y contra la base de datos
+        owners = {}
+        for index, instance, data in entries:
+            number = data.get('document_number', instance.document_number if instance else None)
+            if number in owners:
+                results[index].update(status='error', errors={"document_number": ["Duplicado dentro del lote."]})
+            else:
+                owners[number] = (index, instance.pk if instance else None)
+        taken = Therapist.objects.filter(  # pylint: disable=no-member
+            document_number__in=list(owners)
+        ).values_list('document_number', 'id')
+        for number, therapist_id in taken:
+            index, own_id = owners[number]
+            if therapist_id != own_id:
+                results[index].update(
+                    status='error',
+                    errors={"document_number": ["Ya existe un terapeuta con este número de documento."]}
+                )
+        return results, entries
+
+    @action(detail=False, methods=['post'], url_path='bulk-deactivate')
+    def bulk_deactivate(self, request):
+        """
+        Soft delete masivo: ``{"ids": [...]}`` en un solo UPDATE.
+        """
+        return self._bulk_set_active(request, False)
+
+    @action(detail=False, methods=['post'], url_path='bulk-restore')
+    def bulk_restore(self, request):
+        """
+        Restauración masiva: ``{"ids": [...]}`` en un solo UPDATE.
+        """
+        return self._bulk_set_active(request, True)
+
+    def _bulk_set_active(self, request, is_active):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        try:
+            ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError):
+            ids = None
+        if not ids or len(ids) > MAX_BULK_ITEMS:
+            return Response(
+                {"detail": f"Se esperaba una lista 'ids' de hasta {MAX_BULK_ITEMS} elementos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        found = TherapistService.bulk_set_active(ids, is_active)
+        return Response({
+            "updated": sorted(found),
+            "not_found": sorted(set(ids) - found),
+        })
+
     @action(detail=True, methods=['post', 'patch'])
     def restore(self, request, pk=None):
         """
@@ -68,7 +404,7 @@ class TherapistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         therapist.is_active = True
-        therapist.save(update_fields=['is_active'])
+        therapist.save(update_fields=['is_active', 'updated_at'])
         return Response(self.get_serializer(therapist).data)
 
 
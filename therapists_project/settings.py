@@ -87,6 +87,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Los contadores de versión de los índices en memoria (ubigeo,
+# disponibilidad) y de las cachés derivadas viven en esta caché: todos los
+# procesos deben compartirla para enterarse de las escrituras de los demás.
+# Fuera de DEBUG no se acepta un backend local al proceso (ver Reflexo.apps).
+# Con DatabaseCache hay que crear la tabla con ``manage.py createcachetable``.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 